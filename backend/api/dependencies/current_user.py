@@ -2,9 +2,12 @@
 Authentication dependencies
 """
 from functools import wraps
-from ninja.security import HttpBearer
+from uuid import UUID
+from asgiref.sync import sync_to_async
+from ninja.security import APIKeyQuery, HttpBearer
 from ninja.errors import HttpError
 from apps.users.services.auth_service import AuthService
+from apps.users.permissions import RoleSet
 
 
 class AuthBearer(HttpBearer):
@@ -20,8 +23,79 @@ class AuthBearer(HttpBearer):
             return None
 
 
-# Create instance to use as dependency
+class PrincipalBearer(HttpBearer):
+    """
+    Bearer token authentication from signed claims only
+    request.auth is an AuthPrincipal (id, role, is_active) - no user row is
+    loaded, so role-gated endpoints authorize without SQL. Use auth_bearer
+    instead when the endpoint needs the full User.
+    """
+
+    def authenticate(self, request, token):
+        """Authenticate request with bearer token claims"""
+        try:
+            auth_service = AuthService()
+            return auth_service.get_current_principal(token)
+        except Exception:
+            return None
+
+
+def ticket_resource(request) -> str:
+    """The project a ?ticket= request is for, from the URL path"""
+    project_id = request.resolver_match.kwargs.get('project_id') if request.resolver_match else None
+    try:
+        return str(UUID(str(project_id)))
+    except ValueError:
+        return ''
+
+
+class TicketQuery(APIKeyQuery):
+    """
+    Link ticket in the ?ticket= query string, for URLs the browser fetches
+    itself (<img src>, downloads) and cannot add an Authorization header to
+
+    Query strings end up in access logs, proxy logs and Referer headers, so
+    an access token is never accepted here. A ticket comes from
+    POST /api/projects/{id}/tickets: it expires after JWT_TICKET_LIFETIME
+    and only opens its purpose on that one project, so a leaked URL exposes
+    little. request.auth is an AuthPrincipal.
+    """
+    param_name = 'ticket'
+
+    def __init__(self, purpose: str):
+        self.purpose = purpose
+        super().__init__()
+
+    def authenticate(self, request, key):
+        if not key:
+            return None
+        try:
+            return AuthService().get_ticket_principal(key, self.purpose, ticket_resource(request))
+        except Exception:
+            return None
+
+
+class AsyncAuthBearer(HttpBearer):
+    """AuthBearer for async endpoints (the user lookup runs in a worker thread)"""
+    is_async = True
+
+    async def authenticate(self, request, token):
+        return await sync_to_async(AuthBearer().authenticate)(request, token)
+
+
+class AsyncTicketQuery(TicketQuery):
+    """TicketQuery for async endpoints (browser EventSource cannot send headers either)"""
+    is_async = True
+
+    async def authenticate(self, request, key):
+        return await sync_to_async(super().authenticate)(request, key)
+
+
+# Create instances to use as dependency
 auth_bearer = AuthBearer()
+principal_bearer = PrincipalBearer()
+stream_auth = [AsyncAuthBearer(), AsyncTicketQuery('events')]
+file_auth = [principal_bearer, TicketQuery('files')]
 
 
 def get_current_user(request):
@@ -33,12 +107,15 @@ def require_roles(*allowed_roles):
     """
     Decorator to restrict endpoint access to specific roles
     Admin ALWAYS has access unless explicitly excluded with 'no_admin'
+    Roles are normalized (sales/sale, developer/dev) once at decoration time
 
     Usage:
         @require_roles('admin', 'sales')  # Allow admin and sales
         @require_roles('sales')            # Allow admin and sales (admin implicit)
         @require_roles('customer', 'no_admin')  # ONLY customer, no admin
     """
+    role_set = RoleSet(allowed_roles)
+
     def decorator(func):
         @wraps(func)
         def wrapper(request, *args, **kwargs):
@@ -46,33 +123,8 @@ def require_roles(*allowed_roles):
             if not user:
                 raise HttpError(401, "Authentication required")
 
-            # Admin always has access unless explicitly excluded
-            exclude_admin = 'no_admin' in allowed_roles
-            if user.role == 'admin' and not exclude_admin:
-                return func(request, *args, **kwargs)
-
-            # Normalize user role
-            normalized_role = user.role
-            if normalized_role in ['sales', 'sale']:
-                normalized_role = 'sale'
-            elif normalized_role in ['developer', 'dev']:
-                normalized_role = 'dev'
-
-            # Normalize and filter allowed roles
-            allowed = []
-            for role in allowed_roles:
-                if role == 'no_admin':
-                    continue
-                if role in ['sales', 'sale']:
-                    allowed.append('sale')
-                elif role in ['developer', 'dev']:
-                    allowed.append('dev')
-                else:
-                    allowed.append(role)
-
-            # Check if user role is in allowed roles
-            if normalized_role not in allowed:
-                raise HttpError(403, f"Access denied. Required roles: {', '.join(allowed_roles)}")
+            if not role_set.allows(user.role):
+                raise HttpError(403, f"Access denied. Required roles: {role_set.label}")
 
             return func(request, *args, **kwargs)
         return wrapper
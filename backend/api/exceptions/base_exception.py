@@ -43,3 +43,9 @@ class ConflictException(APIException):
     """Resource conflict"""
     status_code = 409
     default_message = "Resource conflict"
+
+
+class ServiceUnavailableException(APIException):
+    """Server temporarily overloaded"""
+    status_code = 503
+    default_message = "Service temporarily unavailable"
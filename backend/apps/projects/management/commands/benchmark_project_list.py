@@ -0,0 +1,132 @@
+"""
+Django management command to benchmark the project list endpoints
+Usage: python manage.py benchmark_project_list [--projects 100000] [--repeat 3]
+"""
+import json
+import time
+import tracemalloc
+from typing import List
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from pydantic import TypeAdapter
+from apps.customers.models import Customer
+from apps.projects.models import Project
+from apps.projects.schemas.project_schema import ProjectListOut
+from apps.projects.services.project_list_service import ProjectListService, parse_fields
+from apps.users.models import User
+
+BATCH_SIZE = 5000
+
+
+class Rollback(Exception):
+    """Raised to discard the generated projects"""
+
+
+def legacy_list(queryset) -> bytes:
+    """The list endpoint before pagination: every row, full columns, dicts built in Python"""
+    projects = queryset.select_related('customer__user', 'project_manager').distinct()
+    result = []
+    for project in projects:
+        result.append({
+            'id': project.id,
+            'name': project.name,
+            'status': project.status,
+            'priority': project.priority,
+            'customer': {
+                'id': project.customer.id,
+                'company_name': project.customer.company_name,
+                'user_email': project.customer.user.email,
+                'user_name': project.customer.user.full_name
+            },
+            'project_manager': {
+                'id': project.project_manager.id,
+                'full_name': project.project_manager.full_name,
+                'email': project.project_manager.email,
+                'role': project.project_manager.role
+            } if project.project_manager else None,
+            'created_at': project.created_at,
+            'updated_at': project.updated_at
+        })
+    # What ninja then did with the response: validate, dump, encode
+    adapter = TypeAdapter(List[ProjectListOut])
+    return json.dumps(adapter.dump_python(adapter.validate_python(result), mode='json')).encode()
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request time and memory of the project list before and after pagination/projection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--projects',
+            type=int,
+            default=100000,
+            help='Projects to generate (rolled back afterwards)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per case; the best time is reported'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['projects'])
+                self.report(options['projects'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, count: int) -> None:
+        self.stdout.write(f'Generating {count} projects...')
+        owner = User.objects.create_user(email='bench-owner@example.com', password=None, full_name='Bench Owner')
+        manager = User.objects.create_user(email='bench-pm@example.com', password=None, full_name='Bench PM', role='admin')
+        customer = Customer.objects.create(user=owner, company_name='Bench Co')
+        description = 'Lorem ipsum dolor sit amet. ' * 80  # ~2 KB, typical of real briefs
+        for start in range(0, count, BATCH_SIZE):
+            Project.objects.bulk_create([
+                Project(
+                    name=f'Project {index}', customer=customer, project_manager=manager, description=description,
+                    repository_url=f'https://git.example.com/project-{index}',
+                    staging_url=f'https://staging-{index}.example.com',
+                    production_url=f'https://project-{index}.example.com',
+                )
+                for index in range(start, min(start + BATCH_SIZE, count))
+            ])
+
+    @staticmethod
+    def measure(render, repeat: int):
+        """(best seconds, peak traced bytes, response bytes) of render()"""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = render()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        tracemalloc.start()
+        render()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return best, peak, len(body)
+
+    def report(self, count: int, repeat: int) -> None:
+        queryset = Project.objects.all()
+        cases = [
+            ('before: all rows, dicts', lambda: legacy_list(queryset)),
+            ('after: all rows, projected', lambda: ProjectListService.render(queryset, parse_fields(None))[0]),
+            ('after: page of 50', lambda: ProjectListService.render(queryset, parse_fields(None), page_size=50)[0]),
+            ('after: page of 200', lambda: ProjectListService.render(queryset, parse_fields(None), page_size=200)[0]),
+            ('after: 50, fields=id,name',
+             lambda: ProjectListService.render(queryset, parse_fields('id,name'), page_size=50)[0]),
+        ]
+
+        self.stdout.write("\n" + "="*72)
+        self.stdout.write(f"Projects: {count}")
+        self.stdout.write(f"{'Case':<30}{'Time':>12}{'Peak memory':>16}{'Body':>14}")
+        for label, render in cases:
+            elapsed, peak, size = self.measure(render, repeat)
+            self.stdout.write(
+                f"{label:<30}{elapsed * 1000:>10.1f}ms{peak / 1024 ** 2:>14.2f}MB{size / 1024:>12.1f}KB"
+            )
+        self.stdout.write("="*72 + "\n")
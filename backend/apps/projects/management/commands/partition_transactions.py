@@ -0,0 +1,73 @@
+"""
+Django management command for monthly partitions of the transactions table
+Usage:
+    python manage.py partition_transactions --convert [--keep-legacy]   # one-off, maintenance window
+    python manage.py partition_transactions [--months-ahead 3] [--retain-months 36 [--drop-detached]]
+Run the second form daily from cron so next months' partitions always exist.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.projects.models import Transaction
+from core.database.partitioning import MonthlyPartitioner, PartitioningError
+
+
+class Command(BaseCommand):
+    help = 'Convert transactions to monthly range partitions on created_at and maintain them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Rebuild the table as a partitioned table and copy all rows (takes an exclusive lock)'
+        )
+        parser.add_argument(
+            '--keep-legacy',
+            action='store_true',
+            help='With --convert, keep the old table as transactions_legacy instead of dropping it'
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Future monthly partitions to keep created (default: 3)'
+        )
+        parser.add_argument(
+            '--retain-months',
+            type=int,
+            help='Detach partitions older than this many months'
+        )
+        parser.add_argument(
+            '--drop-detached',
+            action='store_true',
+            help='Drop detached partitions instead of keeping them as archive tables'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Print the DDL without running it'
+        )
+
+    def handle(self, *args, **options):
+        partitioner = MonthlyPartitioner(Transaction._meta.db_table, 'created_at', dry_run=options['dry_run'])
+
+        try:
+            if options['convert']:
+                partitioner.convert(months_ahead=options['months_ahead'], keep_legacy=options['keep_legacy'])
+            else:
+                created = partitioner.ensure_partitions(months_ahead=options['months_ahead'])
+                detached = []
+                if options['retain_months'] is not None:
+                    detached = partitioner.detach_partitions(options['retain_months'], drop=options['drop_detached'])
+                if not options['dry_run']:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Created {len(created)} partitions, detached {len(detached)}'
+                    ))
+        except PartitioningError as exc:
+            raise CommandError(str(exc))
+
+        if options['dry_run']:
+            for statement in partitioner.statements:
+                self.stdout.write(f'{statement};')
+        elif options['convert']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Converted {partitioner.table} ({len(partitioner.statements)} statements)'
+            ))
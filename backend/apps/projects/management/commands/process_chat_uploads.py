@@ -0,0 +1,25 @@
+"""
+Django management command to finish chat upload housekeeping
+Usage: python manage.py process_chat_uploads [--limit N]
+"""
+from django.core.management.base import BaseCommand
+from apps.projects.services.chat_upload_service import ChatUploadService, thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Generate pending attachment thumbnails and delete expired unfinished uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=500,
+            help='Thumbnails to generate in this run'
+        )
+
+    def handle(self, *args, **options):
+        generated = thumbnails.pending(limit=options['limit'])
+        purged = ChatUploadService.purge_expired()
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {generated} pending thumbnails, deleted {purged} expired uploads'
+        ))
@@ -0,0 +1,14 @@
+"""
+Django management command to delete expired idempotency records
+Usage: python manage.py purge_idempotency_keys
+"""
+from django.core.management.base import BaseCommand
+from apps.projects.services.idempotency_service import IdempotencyService
+
+
+class Command(BaseCommand):
+    help = 'Delete Idempotency-Key records (database fallback) past their TTL'
+
+    def handle(self, *args, **options):
+        deleted = IdempotencyService.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency records'))
@@ -0,0 +1,61 @@
+"""
+Django management command to recompute finance aggregates from scratch
+Usage: python manage.py rebuild_finance_aggregates [--check]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.projects.models import FinanceTotals, ProjectFinanceStats
+from apps.projects.models.finance import COUNTER_FIELDS
+from apps.projects.services.finance_aggregate_service import FinanceAggregateService
+from apps.projects.services.customer_leaderboard import customer_leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized finance totals and the customer revenue leaderboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare stored aggregates with a fresh computation without writing'
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            totals = FinanceAggregateService.rebuild()
+            customer_leaderboard.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt finance aggregates for {totals.total_projects} projects'
+            ))
+            return
+
+        per_project = FinanceAggregateService.compute_all()
+        expected = FinanceAggregateService.sum_counters(per_project.values())
+        stored = FinanceTotals.objects.filter(pk=FinanceTotals.SINGLETON_ID).first()
+        if stored is None:
+            raise CommandError('Finance totals have not been built yet')
+
+        mismatches = [
+            f'  totals.{field}: stored={getattr(stored, field)} expected={expected[field]}'
+            for field in COUNTER_FIELDS
+            if getattr(stored, field) != expected[field]
+        ]
+
+        stored_stats = {stats.project_id: stats for stats in ProjectFinanceStats.objects.iterator()}
+        for project_id, counters in per_project.items():
+            stats = stored_stats.pop(project_id, None)
+            if stats is None:
+                mismatches.append(f'  project {project_id}: missing stats row')
+                continue
+            for field in COUNTER_FIELDS:
+                if getattr(stats, field) != counters[field]:
+                    mismatches.append(
+                        f'  project {project_id}.{field}: stored={getattr(stats, field)} expected={counters[field]}'
+                    )
+        for project_id in stored_stats:
+            mismatches.append(f'  project {project_id}: stale stats row')
+
+        if mismatches:
+            self.stdout.write('\n'.join(mismatches))
+            raise CommandError(f'{len(mismatches)} finance aggregate mismatches found')
+
+        self.stdout.write(self.style.SUCCESS('Finance aggregates match a full recomputation'))
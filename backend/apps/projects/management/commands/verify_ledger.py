@@ -0,0 +1,45 @@
+"""
+Django management command to replay and check the transaction ledger
+Usage: python manage.py verify_ledger [--repair]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.projects.services.ledger_service import LedgerService
+
+# Problems listed individually before the output is summarized
+MAX_LISTED = 20
+
+
+class Command(BaseCommand):
+    help = 'Replay the ledger entries and compare them with the running balances and the transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Post the missing entries and rewrite running balances from the replay'
+        )
+
+    def handle(self, *args, **options):
+        report = LedgerService.verify(repair=options['repair'])
+
+        problems = {
+            'balance mismatches': report['balance_mismatches'],
+            'unbalanced scopes': report['unbalanced'],
+            'transactions not matching their entries': report['drifted_transactions'],
+            'deleted transactions with open entries': report['orphaned_transactions'],
+        }
+        found = False
+        for label, items in problems.items():
+            if not items:
+                continue
+            found = True
+            self.stdout.write(self.style.WARNING(f'{len(items)} {label}'))
+            for item in items[:MAX_LISTED]:
+                self.stdout.write(f'  {item}')
+
+        if not found:
+            self.stdout.write(self.style.SUCCESS(f"Ledger OK ({report['entries']} entries replayed)"))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS('Repaired; run again to confirm'))
+        else:
+            raise CommandError('Ledger verification failed (use --repair to fix)')
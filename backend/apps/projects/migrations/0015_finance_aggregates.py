@@ -0,0 +1,127 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0014_projecttemplate_options"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FinanceTotals",
+            fields=[
+                ("total_projects", models.IntegerField(default=0)),
+                ("completed_projects", models.IntegerField(default=0)),
+                ("in_progress_projects", models.IntegerField(default=0)),
+                ("accepted_proposals", models.IntegerField(default=0)),
+                ("deposit_paid_count", models.IntegerField(default=0)),
+                ("deposit_pending_count", models.IntegerField(default=0)),
+                (
+                    "deposit_paid_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "deposit_pending_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("phases_total", models.IntegerField(default=0)),
+                ("phases_completed", models.IntegerField(default=0)),
+                ("phases_paid", models.IntegerField(default=0)),
+                (
+                    "phase_paid_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "phase_pending_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "completed_deposit_revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "completed_phase_revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "pending_revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.PositiveSmallIntegerField(
+                        default=1, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Finance Totals",
+                "verbose_name_plural": "Finance Totals",
+                "db_table": "finance_totals",
+            },
+        ),
+        migrations.CreateModel(
+            name="ProjectFinanceStats",
+            fields=[
+                ("total_projects", models.IntegerField(default=0)),
+                ("completed_projects", models.IntegerField(default=0)),
+                ("in_progress_projects", models.IntegerField(default=0)),
+                ("accepted_proposals", models.IntegerField(default=0)),
+                ("deposit_paid_count", models.IntegerField(default=0)),
+                ("deposit_pending_count", models.IntegerField(default=0)),
+                (
+                    "deposit_paid_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "deposit_pending_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("phases_total", models.IntegerField(default=0)),
+                ("phases_completed", models.IntegerField(default=0)),
+                ("phases_paid", models.IntegerField(default=0)),
+                (
+                    "phase_paid_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "phase_pending_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "completed_deposit_revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "completed_phase_revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "pending_revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "project",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="finance_stats",
+                        serialize=False,
+                        to="projects.project",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Project Finance Stats",
+                "verbose_name_plural": "Project Finance Stats",
+                "db_table": "project_finance_stats",
+            },
+        ),
+    ]
@@ -0,0 +1,186 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:50
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal, InvalidOperation
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+PHASE_COLUMNS = [
+    "name", "days", "amount", "payment_percentage", "tasks",
+    "completed", "completed_at", "completed_by",
+    "payment_submitted", "payment_submitted_at",
+    "payment_approved", "payment_approved_at", "payment_approved_by",
+    "payment_proof",
+]
+DATETIME_COLUMNS = {"completed_at", "payment_submitted_at", "payment_approved_at"}
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _json_amount(value):
+    if value is None:
+        return 0
+    return int(value) if value == value.to_integral_value() else str(value)
+
+
+def _to_decimal(value):
+    try:
+        return Decimal(str(value or 0))
+    except InvalidOperation:
+        return Decimal("0")
+
+
+def backfill_phases(apps, schema_editor):
+    """Copy every Proposal.phases JSON entry into a ProposalPhase row"""
+    Proposal = apps.get_model("projects", "Proposal")
+    ProposalPhase = apps.get_model("projects", "ProposalPhase")
+
+    batch = []
+    for proposal_id, phases in Proposal.objects.values_list("id", "phases").iterator():
+        for index, phase in enumerate(phases or []):
+            data = dict(phase) if isinstance(phase, dict) else {"name": str(phase)}
+            values = {}
+            for column in PHASE_COLUMNS:
+                if column not in data:
+                    continue
+                value = data.pop(column)
+                if column in DATETIME_COLUMNS:
+                    value = parse_datetime(value) if isinstance(value, str) else None
+                elif column == "amount":
+                    value = _to_decimal(value)
+                elif column == "days":
+                    value = _to_int(value)
+                elif column == "payment_percentage":
+                    value = _to_int(value)
+                    value = 100 if value is None else value
+                elif column in ("name", "tasks"):
+                    value = str(value or "")
+                elif column in ("completed", "payment_submitted", "payment_approved"):
+                    value = bool(value)
+                elif column in ("completed_by", "payment_approved_by"):
+                    value = str(value) if value else None
+                elif column == "payment_proof":
+                    value = value if isinstance(value, dict) else {}
+                values[column] = value
+            batch.append(ProposalPhase(proposal_id=proposal_id, index=index, extra=data, **values))
+
+        if len(batch) >= 1000:
+            ProposalPhase.objects.bulk_create(batch)
+            batch = []
+
+    ProposalPhase.objects.bulk_create(batch)
+
+
+def restore_phases_json(apps, schema_editor):
+    """Rebuild Proposal.phases JSON from ProposalPhase rows"""
+    Proposal = apps.get_model("projects", "Proposal")
+    ProposalPhase = apps.get_model("projects", "ProposalPhase")
+
+    phases_by_proposal = {}
+    for phase in ProposalPhase.objects.order_by("proposal_id", "index").iterator():
+        data = dict(phase.extra or {})
+        for column in PHASE_COLUMNS:
+            value = getattr(phase, column)
+            if column in DATETIME_COLUMNS:
+                value = value.isoformat() if value else None
+            elif column == "amount":
+                value = _json_amount(value)
+            data[column] = value
+        phases_by_proposal.setdefault(phase.proposal_id, []).append(data)
+
+    for proposal_id, phases in phases_by_proposal.items():
+        Proposal.objects.filter(id=proposal_id).update(phases=phases)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0015_finance_aggregates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProposalPhase",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "index",
+                    models.PositiveSmallIntegerField(
+                        help_text="Vị trí giai đoạn (0-based)"
+                    ),
+                ),
+                ("name", models.CharField(blank=True, default="", max_length=255)),
+                ("days", models.IntegerField(blank=True, null=True)),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("payment_percentage", models.IntegerField(default=100)),
+                ("tasks", models.TextField(blank=True, default="")),
+                ("completed", models.BooleanField(default=False)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "completed_by",
+                    models.CharField(blank=True, max_length=64, null=True),
+                ),
+                ("payment_submitted", models.BooleanField(default=False)),
+                ("payment_submitted_at", models.DateTimeField(blank=True, null=True)),
+                ("payment_approved", models.BooleanField(default=False)),
+                ("payment_approved_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "payment_approved_by",
+                    models.CharField(blank=True, max_length=64, null=True),
+                ),
+                ("payment_proof", models.JSONField(blank=True, default=dict)),
+                ("extra", models.JSONField(blank=True, default=dict)),
+                (
+                    "proposal",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="phase_items",
+                        to="projects.proposal",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Proposal Phase",
+                "verbose_name_plural": "Proposal Phases",
+                "db_table": "proposal_phases",
+                "ordering": ["index"],
+                "indexes": [
+                    models.Index(
+                        fields=["payment_approved", "proposal"],
+                        name="proposal_phase_paid_idx",
+                    ),
+                    models.Index(
+                        fields=["payment_approved_at"],
+                        name="proposal_phase_paid_at_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="proposalphase",
+            constraint=models.UniqueConstraint(
+                fields=("proposal", "index"), name="uniq_proposal_phase_index"
+            ),
+        ),
+        migrations.RunPython(backfill_phases, restore_phases_json),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:50
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0016_proposalphase"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="proposal",
+            name="phases",
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0017_remove_proposal_phases"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["status", "completed_at"], name="transaction_completed_at_idx"
+            ),
+        ),
+    ]
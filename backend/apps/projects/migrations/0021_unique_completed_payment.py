@@ -0,0 +1,55 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:01
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+def cancel_duplicate_payments(apps, schema_editor):
+    """Keep the newest completed row per payment; older duplicates become cancelled"""
+    Transaction = apps.get_model("projects", "Transaction")
+    seen = {}
+    duplicates = (
+        Transaction.objects
+        .filter(status="completed", transaction_type__in=["deposit", "phase"])
+        .order_by("-created_at", "-id")
+        .only("id", "project_id", "proposal_id", "transaction_type", "phase_index", "metadata")
+    )
+    for row in duplicates.iterator():
+        key = (row.project_id, row.proposal_id, row.transaction_type, row.phase_index)
+        if row.proposal_id is None:
+            continue
+        if key not in seen:
+            seen[key] = row.id
+            continue
+        row.status = "cancelled"
+        row.metadata = {**(row.metadata or {}), "cancellation_reason": "duplicate", "duplicate_of": str(seen[key])}
+        row.save(update_fields=["status", "metadata"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0020_idempotency_keys"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_payments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="transaction",
+            constraint=models.UniqueConstraint(
+                models.F("project"),
+                models.F("proposal"),
+                models.F("transaction_type"),
+                django.db.models.functions.comparison.Coalesce(
+                    models.F("phase_index"), models.Value(-1)
+                ),
+                condition=models.Q(
+                    ("status", "completed"),
+                    ("transaction_type__in", ["deposit", "phase"]),
+                ),
+                name="uniq_completed_payment",
+            ),
+        ),
+    ]
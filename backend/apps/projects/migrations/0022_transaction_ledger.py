@@ -0,0 +1,165 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("customers", "0002_initial"),
+        ("projects", "0021_unique_completed_payment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(
+                        choices=[("project", "Project"), ("customer", "Customer")],
+                        max_length=20,
+                    ),
+                ),
+                ("owner_id", models.UUIDField(help_text="Project or customer id")),
+                (
+                    "cash",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "adjustments",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "refunds",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "pending",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("entry_count", models.IntegerField(default=0)),
+                ("last_entry_id", models.BigIntegerField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Ledger Balance",
+                "verbose_name_plural": "Ledger Balances",
+                "db_table": "ledger_balances",
+            },
+        ),
+        migrations.CreateModel(
+            name="LedgerEntry",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "debit_account",
+                    models.CharField(
+                        choices=[
+                            ("cash", "Cash received"),
+                            ("revenue", "Deposit and phase payments"),
+                            ("adjustments", "Adjustments"),
+                            ("refunds", "Refunds"),
+                            ("pending", "Payments awaiting confirmation"),
+                            ("unconfirmed", "Unconfirmed payments (contra of pending)"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "credit_account",
+                    models.CharField(
+                        choices=[
+                            ("cash", "Cash received"),
+                            ("revenue", "Deposit and phase payments"),
+                            ("adjustments", "Adjustments"),
+                            ("refunds", "Refunds"),
+                            ("pending", "Payments awaiting confirmation"),
+                            ("unconfirmed", "Unconfirmed payments (contra of pending)"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("transaction_status", models.CharField(max_length=20)),
+                ("transaction_type", models.CharField(max_length=20)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Ledger Entry",
+                "verbose_name_plural": "Ledger Entries",
+                "db_table": "ledger_entries",
+                "ordering": ["id"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="ledgerbalance",
+            constraint=models.UniqueConstraint(
+                fields=("scope", "owner_id"), name="uniq_ledger_balance_owner"
+            ),
+        ),
+        migrations.AddField(
+            model_name="ledgerentry",
+            name="customer",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="ledger_entries",
+                to="customers.customer",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ledgerentry",
+            name="project",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="ledger_entries",
+                to="projects.project",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ledgerentry",
+            name="transaction",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="ledger_entries",
+                to="projects.transaction",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ledgerentry",
+            index=models.Index(
+                fields=["transaction", "id"], name="ledger_entry_transaction_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ledgerentry",
+            index=models.Index(
+                fields=["project", "id"], name="ledger_entry_project_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ledgerentry",
+            index=models.Index(
+                fields=["customer", "id"], name="ledger_entry_customer_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0022_transaction_ledger"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chatmessage",
+            index=models.Index(
+                fields=["project", "created_at", "id"], name="chat_msg_proj_created_idx"
+            ),
+        ),
+    ]
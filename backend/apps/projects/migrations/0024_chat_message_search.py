@@ -0,0 +1,75 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:17
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    # Keep the document current on insert and on edits of the text
+    """
+    CREATE TRIGGER chat_messages_search_vector_update
+    BEFORE INSERT OR UPDATE OF message ON chat_messages
+    FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(search_vector, 'pg_catalog.simple', message)
+    """,
+    "UPDATE chat_messages SET search_vector = to_tsvector('pg_catalog.simple', message)",
+    "CREATE INDEX chat_msg_search_idx ON chat_messages USING gin (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS chat_msg_search_idx",
+    "DROP TRIGGER IF EXISTS chat_messages_search_vector_update ON chat_messages",
+]
+
+# External-content FTS5 table over chat_messages.rowid (tests, local development)
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE chat_messages_fts USING fts5(message, content='chat_messages', content_rowid='rowid')",
+    """
+    CREATE TRIGGER chat_messages_fts_insert AFTER INSERT ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts(rowid, message) VALUES (new.rowid, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER chat_messages_fts_delete AFTER DELETE ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts(chat_messages_fts, rowid, message) VALUES ('delete', old.rowid, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER chat_messages_fts_update AFTER UPDATE OF message ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts(chat_messages_fts, rowid, message) VALUES ('delete', old.rowid, old.message);
+        INSERT INTO chat_messages_fts(rowid, message) VALUES (new.rowid, new.message);
+    END
+    """,
+    "INSERT INTO chat_messages_fts(chat_messages_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS chat_messages_fts_insert",
+    "DROP TRIGGER IF EXISTS chat_messages_fts_delete",
+    "DROP TRIGGER IF EXISTS chat_messages_fts_update",
+    "DROP TABLE IF EXISTS chat_messages_fts",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0023_chat_message_history_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatmessage",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(
+            run_for_vendor({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            run_for_vendor({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
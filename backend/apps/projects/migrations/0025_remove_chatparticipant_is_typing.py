@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0024_chat_message_search"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="chatparticipant",
+            name="is_typing",
+        ),
+    ]
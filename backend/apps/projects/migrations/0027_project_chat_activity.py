@@ -0,0 +1,58 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:27
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+
+def backfill_activity(apps, schema_editor):
+    """Set the activity fields of existing projects from their messages in one UPDATE"""
+    Project = apps.get_model("projects", "Project")
+    ChatMessage = apps.get_model("projects", "ChatMessage")
+
+    messages = ChatMessage.objects.filter(project_id=OuterRef("id")).order_by()
+    latest = messages.order_by("-created_at", "-id")
+    Project.objects.update(
+        message_count=Coalesce(
+            Subquery(messages.values("project_id").annotate(count=Count("id")).values("count")), 0
+        ),
+        last_message_at=Subquery(latest.values("created_at")[:1]),
+        last_message_preview=Coalesce(Subquery(latest.annotate(
+            preview=Substr("message", 1, 200)
+        ).values("preview")[:1]), Value("")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("customers", "0002_initial"),
+        ("projects", "0026_chat_attachments"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="last_message_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="last_message_preview",
+            field=models.CharField(blank=True, default="", max_length=200),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="message_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                fields=["-last_message_at", "-id"], name="project_last_message_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
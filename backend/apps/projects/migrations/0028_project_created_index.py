@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("customers", "0002_initial"),
+        ("projects", "0027_project_chat_activity"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="project_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0028_project_created_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatupload",
+            name="writing_until",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Claim of the chunk being written; abandoned after this",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:20
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import migrations
+from django.db.models import Sum
+
+ZERO = Decimal("0")
+BATCH_SIZE = 1000
+
+# Frozen copy of the posting rules in ledger_service as of 0022
+DEBIT_NORMAL = {"cash", "refunds", "pending"}
+BALANCE_ACCOUNTS = ["cash", "revenue", "adjustments", "refunds", "pending"]
+
+
+def _add(postings, debit, credit, amount):
+    if debit <= credit:
+        postings[(debit, credit)] = postings.get((debit, credit), ZERO) + amount
+    else:
+        postings[(credit, debit)] = postings.get((credit, debit), ZERO) - amount
+
+
+def _target(status, transaction_type, amount):
+    amount = Decimal(amount or 0)
+    postings = {}
+    if status == "completed":
+        if transaction_type == "refund":
+            _add(postings, "refunds", "cash", amount)
+        elif transaction_type == "adjustment":
+            _add(postings, "cash", "adjustments", amount)
+        else:
+            _add(postings, "cash", "revenue", amount)
+    elif status == "pending" and transaction_type != "refund":
+        _add(postings, "pending", "unconfirmed", amount)
+    return postings
+
+
+def backfill_ledger(apps, schema_editor):
+    """
+    Post every transaction that predates the ledger, then rebuild the
+    running balances from all entries. Idempotent: only the difference
+    between a transaction's state and what it already posted is added,
+    the same as `manage.py verify_ledger --repair`.
+    """
+    Transaction = apps.get_model("projects", "Transaction")
+    Project = apps.get_model("projects", "Project")
+    LedgerEntry = apps.get_model("projects", "LedgerEntry")
+    LedgerBalance = apps.get_model("projects", "LedgerBalance")
+
+    posted = defaultdict(dict)
+    rows = LedgerEntry.objects.order_by().values("transaction_id", "debit_account", "credit_account").annotate(
+        total=Sum("amount")
+    )
+    for row in rows:
+        _add(posted[row["transaction_id"]], row["debit_account"], row["credit_account"], row["total"])
+
+    customers = dict(Project.objects.values_list("id", "customer_id"))
+    batch = []
+    transactions = Transaction.objects.only("id", "project_id", "status", "transaction_type", "amount")
+    for txn in transactions.order_by("created_at", "id").iterator(chunk_size=BATCH_SIZE):
+        target = _target(txn.status, txn.transaction_type, txn.amount)
+        done = posted.get(txn.id, {})
+        for pair in sorted(set(target) | set(done)):
+            delta = target.get(pair, ZERO) - done.get(pair, ZERO)
+            if delta == ZERO:
+                continue
+            debit, credit = pair if delta > ZERO else (pair[1], pair[0])
+            batch.append(LedgerEntry(
+                transaction_id=txn.id,
+                project_id=txn.project_id,
+                customer_id=customers.get(txn.project_id),
+                debit_account=debit,
+                credit_account=credit,
+                amount=abs(delta),
+                transaction_status=txn.status,
+                transaction_type=txn.transaction_type,
+            ))
+        if len(batch) >= BATCH_SIZE:
+            LedgerEntry.objects.bulk_create(batch)
+            batch = []
+    LedgerEntry.objects.bulk_create(batch)
+
+    balances = defaultdict(lambda: {**{a: ZERO for a in BALANCE_ACCOUNTS}, "entry_count": 0, "last_entry_id": None})
+    for entry in LedgerEntry.objects.order_by("id").iterator(chunk_size=5000):
+        scopes = [("project", entry.project_id)]
+        if entry.customer_id is not None:
+            scopes.append(("customer", entry.customer_id))
+        for scope in scopes:
+            balance = balances[scope]
+            for account, side in ((entry.debit_account, 1), (entry.credit_account, -1)):
+                if account in BALANCE_ACCOUNTS:
+                    balance[account] += (side if account in DEBIT_NORMAL else -side) * entry.amount
+            balance["entry_count"] += 1
+            balance["last_entry_id"] = entry.id
+
+    LedgerBalance.objects.all().delete()
+    LedgerBalance.objects.bulk_create([
+        LedgerBalance(scope=scope, owner_id=owner_id, **values)
+        for (scope, owner_id), values in balances.items()
+    ], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0029_chat_upload_writing_until"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,24 @@
 from .project import Project, ProjectStatus, ProjectPriority
 from .project_template import ProjectTemplate, ProjectTemplateCategory
 from .chat import ChatMessage, ChatParticipant
+from .proposal_phase import ProposalPhase
 from .proposal import Proposal, ProposalStatus
 from .feedback import ProjectFeedback
 from .transaction import Transaction, TransactionType, TransactionStatus
+from .finance import ProjectFinanceStats, FinanceTotals
+from .idempotency import IdempotencyKey, IdempotencyState
+from .ledger import LedgerAccount, LedgerBalance, LedgerEntry, LedgerScope
+from .attachment import ChatAttachment, ChatUpload, StoredFile, ThumbnailStatus, UploadStatus
 
 __all__ = [
     'Project', 'ProjectStatus', 'ProjectPriority',
     'ProjectTemplate', 'ProjectTemplateCategory',
     'ChatMessage', 'ChatParticipant',
-    'Proposal', 'ProposalStatus',
+    'Proposal', 'ProposalStatus', 'ProposalPhase',
     'ProjectFeedback',
-    'Transaction', 'TransactionType', 'TransactionStatus'
+    'Transaction', 'TransactionType', 'TransactionStatus',
+    'ProjectFinanceStats', 'FinanceTotals',
+    'IdempotencyKey', 'IdempotencyState',
+    'LedgerAccount', 'LedgerBalance', 'LedgerEntry', 'LedgerScope',
+    'ChatAttachment', 'ChatUpload', 'StoredFile', 'ThumbnailStatus', 'UploadStatus'
 ]
@@ -0,0 +1,157 @@
+"""
+Chat attachment models
+Content-addressed file blobs, resumable upload sessions and the
+attachments that chat messages reference
+"""
+from django.db import models
+from django.urls import reverse
+from core.database.base_model import BaseModel
+from apps.users.models import User
+from .project import Project
+from .chat import ChatMessage
+
+
+class ThumbnailStatus(models.TextChoices):
+    PENDING = 'pending', 'Pending'
+    DONE = 'done', 'Done'
+    SKIPPED = 'skipped', 'Skipped (not an image)'
+    FAILED = 'failed', 'Failed'
+
+
+class StoredFile(BaseModel):
+    """
+    One file body, stored once per SHA-256 in the chat_attachments storage
+    Identical uploads (any user, any project) share the row and the blob.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100)
+    name = models.CharField(max_length=255, help_text="Path in the chat_attachments storage")
+
+    thumbnail_name = models.CharField(max_length=255, blank=True, default='')
+    thumbnail_status = models.CharField(
+        max_length=20,
+        choices=ThumbnailStatus.choices,
+        default=ThumbnailStatus.PENDING
+    )
+
+    class Meta:
+        db_table = 'stored_files'
+        verbose_name = 'Stored File'
+        verbose_name_plural = 'Stored Files'
+        indexes = [
+            models.Index(fields=['thumbnail_status'], name='stored_file_thumb_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} bytes)"
+
+
+class ChatAttachment(BaseModel):
+    """A file uploaded to a project chat, attached to a message once sent"""
+
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='chat_attachments'
+    )
+    uploaded_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='chat_attachments'
+    )
+    message = models.ForeignKey(
+        ChatMessage,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='attachment_files'
+    )
+    file = models.ForeignKey(
+        StoredFile,
+        on_delete=models.PROTECT,
+        related_name='attachments'
+    )
+    filename = models.CharField(max_length=255)
+
+    class Meta:
+        db_table = 'chat_attachments'
+        verbose_name = 'Chat Attachment'
+        verbose_name_plural = 'Chat Attachments'
+        ordering = ['created_at']
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def size(self):
+        return self.file.size
+
+    @property
+    def content_type(self):
+        return self.file.content_type
+
+    @property
+    def url(self):
+        return reverse('api-1.0.0:download_attachment', args=[self.project_id, self.id])
+
+    @property
+    def thumbnail_url(self):
+        if self.file.thumbnail_status != ThumbnailStatus.DONE:
+            return None
+        return f"{self.url}?thumbnail=true"
+
+
+class UploadStatus(models.TextChoices):
+    OPEN = 'open', 'Open'
+    COMPLETE = 'complete', 'Complete'
+    FAILED = 'failed', 'Failed'
+
+
+class ChatUpload(BaseModel):
+    """
+    Resumable upload session
+    Chunks are appended to a temporary file at the offset the server
+    reports (received); when received reaches size the file is hashed and
+    moved into content-addressed storage.
+    """
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='chat_uploads'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='chat_uploads'
+    )
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True, default='', help_text="Expected digest, if the client sent one")
+    received = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=UploadStatus.choices, default=UploadStatus.OPEN)
+    attachment = models.OneToOneField(
+        ChatAttachment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload'
+    )
+    expires_at = models.DateTimeField()
+    writing_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Claim of the chunk being written; abandoned after this"
+    )
+
+    class Meta:
+        db_table = 'chat_uploads'
+        verbose_name = 'Chat Upload'
+        verbose_name_plural = 'Chat Uploads'
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='chat_upload_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
@@ -1,6 +1,7 @@
 """
 Chat model for project communication
 """
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from core.database.base_model import BaseModel
 from apps.users.models import User
@@ -24,13 +25,18 @@ class ChatMessage(BaseModel):
 
     message = models.TextField()
 
-    # Attachments (optional)
+    # Full-text search document, maintained by a database trigger on insert
+    # and edit (PostgreSQL; SQLite uses an FTS5 table). See ChatSearchService.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Attachments (optional) - external URLs; uploaded files are ChatAttachment rows
     attachments = models.JSONField(
         default=list,
         help_text="List of file URLs attached to this message"
     )
 
-    # Read status
+    # Read status - no longer written; read state is derived per viewer from
+    # ChatParticipant.last_read_at (ChatService.apply_read_state)
     is_read = models.BooleanField(default=False)
     read_at = models.DateTimeField(null=True, blank=True)
 
@@ -51,10 +57,19 @@ class ChatMessage(BaseModel):
         verbose_name = 'Chat Message'
         verbose_name_plural = 'Chat Messages'
         ordering = ['created_at']
+        indexes = [
+            # History paging and delta fetch (before/after cursors)
+            models.Index(fields=['project', 'created_at', 'id'], name='chat_msg_proj_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender.full_name}: {self.message[:50]}"
 
+    @property
+    def files(self):
+        """Uploaded attachments (prefetch attachment_files__file when listing)"""
+        return list(self.attachment_files.all())
+
 
 class ChatParticipant(BaseModel):
     """Track participants and their last read time in project chat"""
@@ -72,7 +87,6 @@ class ChatParticipant(BaseModel):
     )
 
     last_read_at = models.DateTimeField(null=True, blank=True)
-    is_typing = models.BooleanField(default=False)
 
     class Meta:
         db_table = 'chat_participants'
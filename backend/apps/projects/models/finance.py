@@ -0,0 +1,87 @@
+"""
+Finance aggregate models
+Materialized totals behind the admin finance dashboard, maintained
+incrementally by FinanceAggregateService
+"""
+from django.db import models
+
+
+class FinanceCounters(models.Model):
+    """
+    Counters shared by the per-project contribution and the global totals
+    Every field here is summed across projects; see COUNTER_FIELDS
+    """
+
+    # Projects
+    total_projects = models.IntegerField(default=0)
+    completed_projects = models.IntegerField(default=0)
+    in_progress_projects = models.IntegerField(default=0)
+
+    # Accepted proposals
+    accepted_proposals = models.IntegerField(default=0)
+
+    # Deposits (all accepted proposals)
+    deposit_paid_count = models.IntegerField(default=0)
+    deposit_pending_count = models.IntegerField(default=0)
+    deposit_paid_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    deposit_pending_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # Phases (all accepted proposals)
+    phases_total = models.IntegerField(default=0)
+    phases_completed = models.IntegerField(default=0)
+    phases_paid = models.IntegerField(default=0)
+    phase_paid_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    phase_pending_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # Revenue recognised on completed projects / still expected on running ones
+    completed_deposit_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    completed_phase_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+COUNTER_FIELDS = [
+    field.name for field in FinanceCounters._meta.local_fields
+    if field.name != 'updated_at'
+]
+
+
+class ProjectFinanceStats(FinanceCounters):
+    """
+    One project's current contribution to FinanceTotals
+    Kept so a change can be applied to the totals as (new - old) deltas.
+    No FK constraint: the row is removed by the project post_delete handler
+    after its values have been subtracted from the totals.
+    """
+    project = models.OneToOneField(
+        'Project',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        related_name='finance_stats'
+    )
+
+    class Meta:
+        db_table = 'project_finance_stats'
+        verbose_name = 'Project Finance Stats'
+        verbose_name_plural = 'Project Finance Stats'
+
+
+class FinanceTotals(FinanceCounters):
+    """
+    Single-row materialized finance aggregate (pk is always 1)
+    The row only exists once a full rebuild has run, so incremental
+    deltas are never applied on top of an uninitialized total.
+    """
+    SINGLETON_ID = 1
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=SINGLETON_ID, editable=False)
+
+    class Meta:
+        db_table = 'finance_totals'
+        verbose_name = 'Finance Totals'
+        verbose_name_plural = 'Finance Totals'
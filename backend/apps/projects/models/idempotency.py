@@ -0,0 +1,42 @@
+"""
+Idempotency key model
+Database fallback for idempotent payment requests when Redis is unavailable
+"""
+from django.db import models
+
+
+class IdempotencyState(models.TextChoices):
+    IN_PROGRESS = 'in_progress', 'In progress'
+    COMPLETED = 'completed', 'Completed'
+
+
+class IdempotencyKey(models.Model):
+    """
+    First response to a request carrying an Idempotency-Key header
+    One row per (scope, key); scope is the user plus endpoint. The unique
+    constraint is what makes a concurrent duplicate wait for the first.
+    """
+    scope = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 of method, path and body")
+
+    state = models.CharField(max_length=20, choices=IdempotencyState.choices, default=IdempotencyState.IN_PROGRESS)
+    response_body = models.JSONField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    locked_until = models.DateTimeField(help_text="An in-progress claim older than this is abandoned")
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='uniq_idempotency_scope_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} ({self.state})"
@@ -0,0 +1,142 @@
+"""
+Ledger models
+Append-only double-entry journal of money movements, with running
+balances per project and per customer, maintained by LedgerService
+"""
+from django.db import models
+
+
+class LedgerAccount(models.TextChoices):
+    CASH = 'cash', 'Cash received'
+    REVENUE = 'revenue', 'Deposit and phase payments'
+    ADJUSTMENTS = 'adjustments', 'Adjustments'
+    REFUNDS = 'refunds', 'Refunds'
+    PENDING = 'pending', 'Payments awaiting confirmation'
+    UNCONFIRMED = 'unconfirmed', 'Unconfirmed payments (contra of pending)'
+
+
+# Debit-normal accounts grow with debits; the rest grow with credits
+DEBIT_NORMAL = {LedgerAccount.CASH.value, LedgerAccount.REFUNDS.value, LedgerAccount.PENDING.value}
+
+# Accounts kept as running balance columns (UNCONFIRMED always mirrors PENDING)
+BALANCE_ACCOUNTS = [
+    LedgerAccount.CASH.value, LedgerAccount.REVENUE.value, LedgerAccount.ADJUSTMENTS.value,
+    LedgerAccount.REFUNDS.value, LedgerAccount.PENDING.value,
+]
+
+
+class LedgerScope(models.TextChoices):
+    PROJECT = 'project', 'Project'
+    CUSTOMER = 'customer', 'Customer'
+
+
+class AppendOnlyError(Exception):
+    """Ledger entries are never changed; post a correcting entry instead"""
+
+
+class LedgerEntry(models.Model):
+    """
+    One posting: amount debited to one account and credited to another
+    Rows are only ever inserted. A changed or deleted Transaction is
+    corrected by posting the difference, so replaying the entries in id
+    order reproduces every balance.
+
+    No FK constraints: entries outlive the transactions and projects they
+    describe (and transactions may live in a partitioned table).
+    """
+    id = models.BigAutoField(primary_key=True)
+    transaction = models.ForeignKey(
+        'Transaction',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='ledger_entries'
+    )
+    project = models.ForeignKey(
+        'Project',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='ledger_entries'
+    )
+    customer = models.ForeignKey(
+        'customers.Customer',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='ledger_entries'
+    )
+
+    debit_account = models.CharField(max_length=20, choices=LedgerAccount.choices)
+    credit_account = models.CharField(max_length=20, choices=LedgerAccount.choices)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+
+    # Transaction state that produced the entry (for audit)
+    transaction_status = models.CharField(max_length=20)
+    transaction_type = models.CharField(max_length=20)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'ledger_entries'
+        verbose_name = 'Ledger Entry'
+        verbose_name_plural = 'Ledger Entries'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['transaction', 'id'], name='ledger_entry_transaction_idx'),
+            models.Index(fields=['project', 'id'], name='ledger_entry_project_idx'),
+            models.Index(fields=['customer', 'id'], name='ledger_entry_customer_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} DR {self.debit_account} / CR {self.credit_account} {self.amount}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise AppendOnlyError("Ledger entries cannot be modified")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise AppendOnlyError("Ledger entries cannot be deleted")
+
+
+class LedgerBalance(models.Model):
+    """
+    Running balance of one project or customer after its latest entry
+    Each account column is signed by its normal side, so every column is
+    positive in normal use: received = revenue, refunded = refunds.
+    """
+    scope = models.CharField(max_length=20, choices=LedgerScope.choices)
+    owner_id = models.UUIDField(help_text="Project or customer id")
+
+    cash = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    adjustments = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refunds = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    entry_count = models.IntegerField(default=0)
+    last_entry_id = models.BigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'ledger_balances'
+        verbose_name = 'Ledger Balance'
+        verbose_name_plural = 'Ledger Balances'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'owner_id'], name='uniq_ledger_balance_owner'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.owner_id}: cash {self.cash}"
+
+    @property
+    def received(self):
+        return self.revenue
+
+    @property
+    def refunded(self):
+        return self.refunds
+
+    @property
+    def net_received(self):
+        return self.revenue - self.refunds
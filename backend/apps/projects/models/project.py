@@ -28,6 +28,10 @@ class ProjectPriority(models.TextChoices):
     URGENT = 'urgent', 'Urgent'
 
 
+# Maintained by ChatService with UPDATEs; saves must name their update_fields
+ACTIVITY_FIELDS = ('last_message_at', 'last_message_preview', 'message_count')
+
+
 class Project(BaseModel):
     """Project model for managing software projects"""
     
@@ -85,11 +89,22 @@ class Project(BaseModel):
     repository_url = models.URLField(null=True, blank=True)
     staging_url = models.URLField(null=True, blank=True)
     production_url = models.URLField(null=True, blank=True)
+
+    # Chat activity, denormalized for the inbox; maintained with UPDATEs by
+    # ChatService.post and .forget; a full save() of a stale instance would
+    # write old values back, so other code saves with update_fields
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=200, blank=True, default='')
+    message_count = models.PositiveIntegerField(default=0)
     
     class Meta:
         db_table = 'projects'
         verbose_name = 'Project'
         verbose_name_plural = 'Projects'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='project_created_idx'),
+            models.Index(fields=['-last_message_at', '-id'], name='project_last_message_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -1,10 +1,11 @@
 """
 Proposal model for negotiation between sales and customers
 """
-from django.db import models
+from django.db import models, transaction
 from core.database.base_model import BaseModel
 from apps.users.models import User
 from .project import Project
+from .proposal_phase import ProposalPhase, phases_replaced
 
 
 class ProposalStatus(models.TextChoices):
@@ -116,15 +117,8 @@ class Proposal(BaseModel):
         help_text="Thông tin chứng từ thanh toán (transaction_id, screenshot_url, etc.) - Dành cho tích hợp SePay"
     )
 
-    # Phases (Giai đoạn thực hiện)
-    phases = models.JSONField(
-        default=list,
-        help_text="Các giai đoạn thực hiện dự án"
-    )
-    # Example: [
-    #   {"name": "Giai đoạn 2", "days": 10, "amount": 10000000, "payment_percentage": 100, "tasks": "..."},
-    #   {"name": "Giai đoạn 3", "days": 15, "amount": 20000000, "payment_percentage": 50, "tasks": "..."},
-    # ]
+    # Phases (Giai đoạn thực hiện) are stored in ProposalPhase rows,
+    # see the phases property below
 
     # Team members
     team_members = models.JSONField(
@@ -207,3 +201,44 @@ class Proposal(BaseModel):
 
     def __str__(self):
         return f"Proposal #{self.id} - {self.project.name} - {self.get_status_display()}"
+
+    @property
+    def phases(self):
+        """
+        Phases as a list of dicts, same shape as the former JSON field
+        Example: [
+          {"name": "Giai đoạn 2", "days": 10, "amount": 10000000, "payment_percentage": 100, "tasks": "..."},
+        ]
+        Use prefetch_related('phase_items') when reading many proposals.
+        """
+        pending = self.__dict__.get('_pending_phases')
+        if pending is not None:
+            return [dict(phase) for phase in pending]
+        if self._state.adding:
+            return []
+        return [phase.to_dict() for phase in self.phase_items.all()]
+
+    @phases.setter
+    def phases(self, value):
+        # Written to ProposalPhase rows on the next save()
+        self.__dict__['_pending_phases'] = [
+            phase.dict() if hasattr(phase, 'dict') else dict(phase) for phase in (value or [])
+        ]
+
+    def save(self, *args, **kwargs):
+        pending = self.__dict__.pop('_pending_phases', None)
+        if pending is None:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.replace_phases(pending)
+
+    def replace_phases(self, phases):
+        """Replace all phase rows with the given list of phase dicts"""
+        with transaction.atomic():
+            ProposalPhase.objects.filter(proposal=self).delete()
+            ProposalPhase.objects.bulk_create([
+                ProposalPhase.from_dict(self, index, phase) for index, phase in enumerate(phases)
+            ])
+            phases_replaced.send(sender=ProposalPhase, proposal=self)
@@ -0,0 +1,136 @@
+"""
+Proposal phase model
+One row per phase of a proposal; holds the phase's work and payment state
+"""
+from datetime import datetime
+from decimal import Decimal
+from django.db import models
+from django.dispatch import Signal
+from django.utils.dateparse import parse_datetime
+from core.database.base_model import BaseModel
+
+
+# Sent after a proposal's phase rows are replaced in bulk (no per-row signals)
+phases_replaced = Signal()
+
+
+PHASE_COLUMNS = [
+    'name', 'days', 'amount', 'payment_percentage', 'tasks',
+    'completed', 'completed_at', 'completed_by',
+    'payment_submitted', 'payment_submitted_at',
+    'payment_approved', 'payment_approved_at', 'payment_approved_by',
+    'payment_proof',
+]
+
+DATETIME_COLUMNS = {'completed_at', 'payment_submitted_at', 'payment_approved_at'}
+
+
+def _to_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return parse_datetime(str(value))
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def json_amount(value):
+    """Decimal amount for JSON: an int when whole (as VND amounts were stored), else an exact string"""
+    if value is None:
+        return 0
+    if value == value.to_integral_value():
+        return int(value)
+    return str(value)
+
+
+class ProposalPhase(BaseModel):
+    """
+    Giai đoạn thực hiện của proposal
+    Replaces the Proposal.phases JSON list; Proposal.phases still returns
+    the same list of dicts built from these rows.
+    """
+    proposal = models.ForeignKey(
+        'Proposal',
+        on_delete=models.CASCADE,
+        related_name='phase_items'
+    )
+    index = models.PositiveSmallIntegerField(help_text="Vị trí giai đoạn (0-based)")
+
+    # Definition
+    name = models.CharField(max_length=255, blank=True, default='')
+    days = models.IntegerField(null=True, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    payment_percentage = models.IntegerField(default=100)
+    tasks = models.TextField(blank=True, default='')
+
+    # Work state
+    completed = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    completed_by = models.CharField(max_length=64, null=True, blank=True)
+
+    # Payment state
+    payment_submitted = models.BooleanField(default=False)
+    payment_submitted_at = models.DateTimeField(null=True, blank=True)
+    payment_approved = models.BooleanField(default=False)
+    payment_approved_at = models.DateTimeField(null=True, blank=True)
+    payment_approved_by = models.CharField(max_length=64, null=True, blank=True)
+    payment_proof = models.JSONField(default=dict, blank=True)
+
+    # Keys from the legacy JSON that have no column
+    extra = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        db_table = 'proposal_phases'
+        verbose_name = 'Proposal Phase'
+        verbose_name_plural = 'Proposal Phases'
+        ordering = ['index']
+        constraints = [
+            models.UniqueConstraint(fields=['proposal', 'index'], name='uniq_proposal_phase_index'),
+        ]
+        indexes = [
+            models.Index(fields=['payment_approved', 'proposal'], name='proposal_phase_paid_idx'),
+            models.Index(fields=['payment_approved_at'], name='proposal_phase_paid_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"Phase {self.index + 1} - {self.name}"
+
+    @classmethod
+    def from_dict(cls, proposal, index, data):
+        """Build a row from a phase dict in the legacy JSON shape"""
+        data = dict(data)
+        values = {}
+        for column in PHASE_COLUMNS:
+            if column not in data:
+                continue
+            value = data.pop(column)
+            if column in DATETIME_COLUMNS:
+                value = _to_datetime(value)
+            elif column == 'amount':
+                value = Decimal(str(value or 0))
+            elif column in ('days', 'payment_percentage'):
+                value = _to_int(value)
+                if value is None and column == 'payment_percentage':
+                    value = 100
+            elif column in ('name', 'tasks'):
+                value = value or ''
+            elif column == 'payment_proof':
+                value = value or {}
+            values[column] = value
+        return cls(proposal=proposal, index=index, extra=data, **values)
+
+    def to_dict(self):
+        """Phase in the legacy JSON shape (datetimes as ISO strings)"""
+        data = dict(self.extra or {})
+        for column in PHASE_COLUMNS:
+            value = getattr(self, column)
+            if column in DATETIME_COLUMNS:
+                value = value.isoformat() if value else None
+            elif column == 'amount':
+                value = json_amount(value)
+            data[column] = value
+        return data
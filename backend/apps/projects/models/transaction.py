@@ -4,6 +4,8 @@ Track all payment transactions for deposits and phases
 """
 import uuid
 from django.db import models
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from decimal import Decimal
 
@@ -22,6 +24,10 @@ class TransactionStatus(models.TextChoices):
     CANCELLED = 'cancelled', 'Cancelled'
 
 
+# Payment kinds that can be completed at most once per proposal and phase
+UNIQUE_PAYMENT_TYPES = [TransactionType.DEPOSIT, TransactionType.PHASE]
+
+
 class Transaction(models.Model):
     """
     Transaction record for all payments
@@ -128,6 +134,24 @@ class Transaction(models.Model):
             models.Index(fields=['project', 'status']),
             models.Index(fields=['customer', 'created_at']),
             models.Index(fields=['transaction_type', 'status']),
+            # Revenue reports: completed transactions by completion time
+            models.Index(fields=['status', 'completed_at'], name='transaction_completed_at_idx'),
+            # Keyset pagination on (created_at, id), globally and per filter
+            models.Index(fields=['-created_at', '-id'], name='transaction_created_id_idx'),
+            models.Index(fields=['project', '-created_at', '-id'], name='transaction_proj_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='transaction_stat_created_idx'),
+        ]
+        constraints = [
+            # One completed deposit / phase payment per proposal phase;
+            # phase_index is NULL for deposits, so it is compared as -1.
+            # Once the table is partitioned (partition_transactions) this is
+            # enforced per monthly partition, which still covers concurrent
+            # approvals: they are written in the same month.
+            models.UniqueConstraint(
+                F('project'), F('proposal'), F('transaction_type'), Coalesce(F('phase_index'), Value(-1)),
+                condition=Q(status=TransactionStatus.COMPLETED, transaction_type__in=UNIQUE_PAYMENT_TYPES),
+                name='uniq_completed_payment',
+            ),
         ]
 
     def __str__(self):
@@ -0,0 +1,14 @@
+from .project_policy import (
+    ProjectAccessPolicy,
+    project_policy,
+    proposal_policy,
+    transaction_policy,
+    feedback_policy,
+    project_finance_policy,
+)
+
+__all__ = [
+    'ProjectAccessPolicy',
+    'project_policy', 'proposal_policy', 'transaction_policy', 'feedback_policy',
+    'project_finance_policy',
+]
@@ -0,0 +1,86 @@
+"""
+Project ownership policy
+Expresses "who may touch this project-scoped row" as SQL filters so the
+check is part of the lookup query instead of lazy FK loads in Python
+"""
+from typing import Iterable
+from django.db.models import Q, Exists, OuterRef, BooleanField, ExpressionWrapper
+from django.shortcuts import get_object_or_404
+from ninja.errors import HttpError
+from apps.users.models import UserRole
+from apps.users.permissions import normalize_role
+
+
+class ProjectAccessPolicy:
+    """
+    Ownership rule for a model reachable from Project
+
+    project_path: lookup prefix from the model to its project
+                  ('' for Project, 'project__' for Proposal/Transaction/...)
+    restricted:   roles that must own the project; other roles pass
+                  - customer: project.customer.user
+                  - sale:     project.project_manager
+                  - dev:      project.team_members
+    """
+
+    def __init__(self, project_path: str = '', restricted: Iterable[str] = (UserRole.CUSTOMER,)):
+        self.project_path = project_path
+        self.restricted = frozenset(normalize_role(role) for role in restricted)
+
+    def filter_q(self, user) -> Q:
+        """Q selecting rows the user may access (empty Q when unrestricted)"""
+        role = normalize_role(user.role)
+        if role not in self.restricted:
+            return Q()
+
+        path = self.project_path
+        if role == UserRole.CUSTOMER:
+            return Q(**{f'{path}customer__user_id': user.id})
+        if role == UserRole.SALE:
+            return Q(**{f'{path}project_manager_id': user.id})
+        if role == UserRole.DEV:
+            return Q(self._team_member_exists(user))
+        return Q(pk__in=[])
+
+    def _team_member_exists(self, user):
+        # EXISTS instead of a join so M2M rows never duplicate results
+        from apps.projects.models import Project
+        project_ref = OuterRef(f'{self.project_path}id') if self.project_path else OuterRef('pk')
+        return Exists(Project.team_members.through.objects.filter(
+            project_id=project_ref,
+            user_id=user.id
+        ))
+
+    def scope(self, queryset, user):
+        """Restrict queryset to rows the user may access"""
+        q = self.filter_q(user)
+        return queryset.filter(q) if q else queryset
+
+    def get_or_403(self, queryset, user, message: str = "Not authorized", **lookup):
+        """
+        Fetch one row and check ownership in the same query
+        404 when the row does not exist, 403 when the user may not access it
+        """
+        q = self.filter_q(user)
+        if not q:
+            return get_object_or_404(queryset, **lookup)
+
+        obj = get_object_or_404(
+            queryset.annotate(
+                _policy_allowed=ExpressionWrapper(q, output_field=BooleanField())
+            ),
+            **lookup
+        )
+        if not obj._policy_allowed:
+            raise HttpError(403, message)
+        return obj
+
+
+# Shared rules: customers may only reach their own projects
+project_policy = ProjectAccessPolicy()
+proposal_policy = ProjectAccessPolicy('project__')
+transaction_policy = ProjectAccessPolicy('project__')
+feedback_policy = ProjectAccessPolicy('project__')
+
+# Finance details: customers own the project, sales must manage it
+project_finance_policy = ProjectAccessPolicy(restricted=(UserRole.CUSTOMER, UserRole.SALE))
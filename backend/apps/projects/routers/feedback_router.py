@@ -9,6 +9,7 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from api.dependencies.current_user import auth_bearer
 from apps.projects.models import Project, ProjectStatus, ProjectFeedback
+from apps.projects.permissions import project_policy
 from apps.projects.schemas.feedback_schema import (
     AcceptanceSubmit,
     FeedbackOut,
@@ -69,11 +70,11 @@ def submit_acceptance(request, project_id: str, payload: AcceptanceSubmit):
     - If rejecting: complaint or revision_details required
     """
     user = request.auth
-    project = get_object_or_404(Project, id=project_id)
 
-    # Must be customer of the project
-    if user.role != 'customer' or project.customer.user != user:
+    # Must be customer of the project (ownership checked in the lookup query)
+    if user.role != 'customer':
         raise HttpError(403, "Not authorized")
+    project = project_policy.get_or_403(Project.objects.all(), user, "Not authorized", id=project_id)
 
     # Project must be PENDING_ACCEPTANCE or REVISION_REQUIRED
     if project.status not in [ProjectStatus.PENDING_ACCEPTANCE, ProjectStatus.REVISION_REQUIRED]:
@@ -139,7 +140,7 @@ def submit_acceptance(request, project_id: str, payload: AcceptanceSubmit):
     else:
         project.status = ProjectStatus.REVISION_REQUIRED
 
-    project.save()
+    project.save(update_fields=['status', 'end_date', 'updated_at'])
 
     return serialize_feedback(feedback)
 
@@ -152,12 +153,7 @@ def get_acceptance_status(request, project_id: str):
     Sales/Admin: project feedback
     """
     user = request.auth
-    project = get_object_or_404(Project, id=project_id)
-
-    # Check permissions
-    if user.role == 'customer':
-        if project.customer.user != user:
-            raise HttpError(403, "Not authorized")
+    project = project_policy.get_or_403(Project.objects.all(), user, "Not authorized", id=project_id)
 
     feedback = ProjectFeedback.objects.filter(project=project).first()
 
@@ -194,7 +190,7 @@ def complete_revision(request, feedback_id: str, payload: RevisionComplete):
 
     # Change project status back to PENDING_ACCEPTANCE
     feedback.project.status = ProjectStatus.PENDING_ACCEPTANCE
-    feedback.project.save()
+    feedback.project.save(update_fields=['status', 'updated_at'])
 
     return serialize_feedback(feedback)
 
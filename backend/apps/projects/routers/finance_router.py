@@ -7,16 +7,29 @@ from typing import List, Dict
 from ninja import Router
 from ninja.errors import HttpError
 from django.db.models import Sum, Count, Q, F
-from django.shortcuts import get_object_or_404
-from api.dependencies.current_user import auth_bearer, require_roles
-from apps.projects.models import Project, Proposal, ProjectStatus
+from django.utils import timezone
+from api.dependencies.current_user import auth_bearer, principal_bearer, require_roles
+from apps.projects.models import (
+    Project, Proposal, ProjectFinanceStats,
+    Transaction, TransactionType, TransactionStatus
+)
+from apps.projects.permissions import project_finance_policy
+from apps.projects.services.finance_aggregate_service import FinanceAggregateService
+from apps.projects.services.customer_leaderboard import customer_leaderboard
+from core.utils.export import EXPORT_FORMATS, streaming_export
+from core.utils.periods import PERIOD_TRUNC, iter_buckets, local_day_bounds, resolve_range
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 router = Router(tags=['Finance & Statistics'])
 
+# Money received; refunds are reported separately
+REVENUE_TYPES = [TransactionType.DEPOSIT, TransactionType.PHASE]
 
-@router.get("/finance/dashboard", auth=auth_bearer)
+MAX_REVENUE_BUCKETS = 1000
+
+
+@router.get("/finance/dashboard", auth=principal_bearer)
 @require_roles('admin')
 def get_finance_dashboard(request):
     """
@@ -25,67 +38,32 @@ def get_finance_dashboard(request):
     """
     user = request.auth
 
-    # Total statistics
-    all_projects = Project.objects.all()
-    completed_projects = all_projects.filter(status=ProjectStatus.COMPLETED)
-
-    # Get all proposals
-    all_proposals = Proposal.objects.filter(status='accepted')
-    completed_proposals = Proposal.objects.filter(
-        status='accepted',
-        project__status=ProjectStatus.COMPLETED
-    )
-
-    # Calculate totals
-    total_revenue = Decimal('0')
-    total_deposit = Decimal('0')
-    total_phase_payments = Decimal('0')
-    pending_revenue = Decimal('0')
-
-    for proposal in completed_proposals:
-        # Add deposit if paid
-        if proposal.deposit_paid:
-            total_deposit += proposal.deposit_amount
-
-        # Add phase payments
-        if proposal.phases:
-            for phase in proposal.phases:
-                if phase.get('payment_approved'):
-                    total_phase_payments += Decimal(str(phase.get('amount', 0)))
-
-    total_revenue = total_deposit + total_phase_payments
-
-    # Calculate pending revenue (accepted but not completed)
-    for proposal in all_proposals.filter(~Q(project__status=ProjectStatus.COMPLETED)):
-        if proposal.deposit_paid:
-            # Count phases not yet paid
-            if proposal.phases:
-                for phase in proposal.phases:
-                    if not phase.get('payment_approved'):
-                        pending_revenue += Decimal(str(phase.get('amount', 0)))
+    # Single-row read of the incrementally maintained aggregates
+    totals = FinanceAggregateService.get_totals()
+    total_revenue = totals.completed_deposit_revenue + totals.completed_phase_revenue
 
     return {
         'summary': {
             'total_revenue': float(total_revenue),
-            'total_deposit': float(total_deposit),
-            'total_phase_payments': float(total_phase_payments),
-            'pending_revenue': float(pending_revenue),
-            'total_projects': all_projects.count(),
-            'completed_projects': completed_projects.count(),
-            'in_progress_projects': all_projects.filter(status=ProjectStatus.IN_PROGRESS).count(),
-            'total_proposals': all_proposals.count(),
-            'accepted_proposals': all_proposals.filter(status='accepted').count(),
+            'total_deposit': float(totals.completed_deposit_revenue),
+            'total_phase_payments': float(totals.completed_phase_revenue),
+            'pending_revenue': float(totals.pending_revenue),
+            'total_projects': totals.total_projects,
+            'completed_projects': totals.completed_projects,
+            'in_progress_projects': totals.in_progress_projects,
+            'total_proposals': totals.accepted_proposals,
+            'accepted_proposals': totals.accepted_proposals,
         },
         'breakdown': {
             'by_status': [
                 {
                     'status': 'completed',
-                    'count': completed_projects.count(),
+                    'count': totals.completed_projects,
                     'revenue': float(total_revenue)
                 },
                 {
                     'status': 'in_progress',
-                    'count': all_projects.filter(status=ProjectStatus.IN_PROGRESS).count(),
+                    'count': totals.in_progress_projects,
                     'revenue': 0  # Not yet completed
                 }
             ]
@@ -102,18 +80,14 @@ def get_project_financial_details(request, project_id: str):
     Access: Admin (all), Sales (managed projects), Customer (own projects)
     """
     user = request.auth
-    project = get_object_or_404(Project, id=project_id)
 
-    # Role-based access control
+    # Role-based access control, evaluated in the lookup query:
+    # Customer sees own projects, Sales sees managed projects, Admin sees all
     if user.role == 'customer':
-        # Customer can only see their own projects
-        if project.customer.user != user:
-            raise HttpError(403, "You can only view financial details of your own projects")
-    elif user.role in ['sales', 'sale']:
-        # Sales can only see projects they manage
-        if project.project_manager != user:
-            raise HttpError(403, "You can only view financial details of projects you manage")
-    # Admin can see all (already passed through @require_roles)
+        message = "You can only view financial details of your own projects"
+    else:
+        message = "You can only view financial details of projects you manage"
+    project = project_finance_policy.get_or_403(Project.objects.all(), user, message, id=project_id)
 
     # Get proposal
     proposal = Proposal.objects.filter(project=project, status='accepted').first()
@@ -129,29 +103,26 @@ def get_project_financial_details(request, project_id: str):
     deposit_paid = proposal.deposit_amount if proposal.deposit_paid else Decimal('0')
     deposit_pending = Decimal('0') if proposal.deposit_paid else proposal.deposit_amount
 
+    phases = list(proposal.phase_items.all())
     phase_breakdown = []
     total_phase_paid = Decimal('0')
     total_phase_pending = Decimal('0')
 
-    if proposal.phases:
-        for i, phase in enumerate(proposal.phases):
-            phase_amount = Decimal(str(phase.get('amount', 0)))
-            is_paid = phase.get('payment_approved', False)
-
-            if is_paid:
-                total_phase_paid += phase_amount
-            else:
-                total_phase_pending += phase_amount
-
-            phase_breakdown.append({
-                'phase_index': i,
-                'phase_name': phase.get('name'),
-                'amount': float(phase_amount),
-                'paid': is_paid,
-                'paid_at': phase.get('payment_approved_at'),
-                'completed': phase.get('completed', False),
-                'completed_at': phase.get('completed_at')
-            })
+    for phase in phases:
+        if phase.payment_approved:
+            total_phase_paid += phase.amount
+        else:
+            total_phase_pending += phase.amount
+
+        phase_breakdown.append({
+            'phase_index': phase.index,
+            'phase_name': phase.name,
+            'amount': float(phase.amount),
+            'paid': phase.payment_approved,
+            'paid_at': phase.payment_approved_at.isoformat() if phase.payment_approved_at else None,
+            'completed': phase.completed,
+            'completed_at': phase.completed_at.isoformat() if phase.completed_at else None
+        })
 
     total_paid = deposit_paid + total_phase_paid
     total_pending = deposit_pending + total_phase_pending
@@ -176,9 +147,9 @@ def get_project_financial_details(request, project_id: str):
         },
         'phases': phase_breakdown,
         'phase_summary': {
-            'total_phases': len(proposal.phases) if proposal.phases else 0,
-            'completed_phases': sum(1 for p in (proposal.phases or []) if p.get('completed')),
-            'paid_phases': sum(1 for p in (proposal.phases or []) if p.get('payment_approved')),
+            'total_phases': len(phases),
+            'completed_phases': sum(1 for p in phases if p.completed),
+            'paid_phases': sum(1 for p in phases if p.payment_approved),
             'total_phase_value': float(total_phase_paid + total_phase_pending),
             'paid_phase_value': float(total_phase_paid),
             'pending_phase_value': float(total_phase_pending)
@@ -186,61 +157,81 @@ def get_project_financial_details(request, project_id: str):
     }
 
 
-@router.get("/finance/revenue-by-period", auth=auth_bearer)
+@router.get("/finance/revenue-by-period", auth=principal_bearer)
 @require_roles('admin')
-def get_revenue_by_period(request, period: str = 'month'):
+def get_revenue_by_period(request, period: str = 'month', start_date: date = None, end_date: date = None):
     """
     🔒 ADMIN ONLY: Get revenue grouped by time period
     period: 'day', 'week', 'month', 'year'
+    start_date/end_date: inclusive local dates (default: last 30 days /
+    12 weeks / 12 months / 5 years up to today)
+
+    Buckets completed transactions by completed_at in TIME_ZONE in one
+    GROUP BY query; buckets with no transactions are returned as zero.
     """
     user = request.auth
 
-    # Get completed projects with proposals
-    completed_projects = Project.objects.filter(
-        status=ProjectStatus.COMPLETED
-    ).select_related('customer')
-
-    revenue_data = []
-
-    for project in completed_projects:
-        proposal = Proposal.objects.filter(
-            project=project,
-            status='accepted'
-        ).first()
-
-        if not proposal or not project.end_date:
-            continue
-
-        # Calculate total revenue
-        revenue = Decimal('0')
-        if proposal.deposit_paid:
-            revenue += proposal.deposit_amount
-
-        if proposal.phases:
-            for phase in proposal.phases:
-                if phase.get('payment_approved'):
-                    revenue += Decimal(str(phase.get('amount', 0)))
-
-        revenue_data.append({
-            'project_id': str(project.id),
-            'project_name': project.name,
-            'customer_name': project.customer.company_name,
-            'completed_date': project.end_date.isoformat(),
-            'revenue': float(revenue)
+    trunc = PERIOD_TRUNC.get(period)
+    if trunc is None:
+        raise HttpError(400, f"Invalid period. Must be one of: {', '.join(PERIOD_TRUNC)}")
+
+    start_date, end_date = resolve_range(period, start_date, end_date)
+    if start_date > end_date:
+        raise HttpError(400, "start_date must be before end_date")
+
+    buckets = list(iter_buckets(period, start_date, end_date))
+    if len(buckets) > MAX_REVENUE_BUCKETS:
+        raise HttpError(400, f"Range too large: at most {MAX_REVENUE_BUCKETS} {period} buckets")
+
+    tz = timezone.get_current_timezone()
+    range_start, range_end = local_day_bounds(start_date, end_date)
+
+    rows = Transaction.objects.filter(
+        status=TransactionStatus.COMPLETED,
+        completed_at__gte=range_start,
+        completed_at__lt=range_end,
+    ).annotate(
+        bucket=trunc('completed_at', tzinfo=tz)
+    ).values('bucket').annotate(
+        revenue=Sum('amount', filter=Q(transaction_type__in=REVENUE_TYPES), default=Decimal('0')),
+        refunded=Sum('amount', filter=Q(transaction_type=TransactionType.REFUND), default=Decimal('0')),
+        transaction_count=Count('id'),
+        project_count=Count('project', distinct=True),
+    ).order_by('bucket')
+
+    by_bucket = {timezone.localtime(row['bucket'], tz).date(): row for row in rows}
+
+    data = []
+    for bucket in buckets:
+        row = by_bucket.get(bucket, {})
+        revenue = row.get('revenue', Decimal('0'))
+        refunded = row.get('refunded', Decimal('0'))
+        data.append({
+            'period_start': bucket.isoformat(),
+            'revenue': float(revenue),
+            'refunded': float(refunded),
+            'net_revenue': float(revenue - refunded),
+            'transaction_count': row.get('transaction_count', 0),
+            'project_count': row.get('project_count', 0),
         })
 
-    # Sort by date
-    revenue_data.sort(key=lambda x: x['completed_date'], reverse=True)
+    total_revenue = sum(item['revenue'] for item in data)
+    total_refunded = sum(item['refunded'] for item in data)
 
     return {
         'period': period,
-        'data': revenue_data,
-        'total_revenue': sum(item['revenue'] for item in revenue_data),
-        'project_count': len(revenue_data)
+        'timezone': str(tz),
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'data': data,
+        'total_revenue': total_revenue,
+        'total_refunded': total_refunded,
+        'net_revenue': total_revenue - total_refunded,
+        'transaction_count': sum(item['transaction_count'] for item in data)
     }
 
 
-@router.get("/finance/payment-status-summary", auth=auth_bearer)
+@router.get("/finance/payment-status-summary", auth=principal_bearer)
 @require_roles('admin')
 def get_payment_status_summary(request):
     """
@@ -249,129 +240,101 @@ def get_payment_status_summary(request):
     """
     user = request.auth
 
-    # Get all accepted proposals
-    proposals = Proposal.objects.filter(status='accepted')
-
-    deposit_paid_count = 0
-    deposit_pending_count = 0
-    total_deposit_paid = Decimal('0')
-    total_deposit_pending = Decimal('0')
-
-    phase_stats = {
-        'total_phases': 0,
-        'completed_phases': 0,
-        'paid_phases': 0,
-        'pending_phases': 0,
-        'total_phase_revenue': Decimal('0'),
-        'pending_phase_revenue': Decimal('0')
-    }
-
-    for proposal in proposals:
-        # Deposit stats
-        if proposal.deposit_paid:
-            deposit_paid_count += 1
-            total_deposit_paid += proposal.deposit_amount
-        else:
-            deposit_pending_count += 1
-            total_deposit_pending += proposal.deposit_amount
-
-        # Phase stats
-        if proposal.phases:
-            for phase in proposal.phases:
-                phase_amount = Decimal(str(phase.get('amount', 0)))
-                phase_stats['total_phases'] += 1
-
-                if phase.get('completed'):
-                    phase_stats['completed_phases'] += 1
-
-                if phase.get('payment_approved'):
-                    phase_stats['paid_phases'] += 1
-                    phase_stats['total_phase_revenue'] += phase_amount
-                else:
-                    phase_stats['pending_phases'] += 1
-                    phase_stats['pending_phase_revenue'] += phase_amount
+    totals = FinanceAggregateService.get_totals()
+    deposit_count = totals.deposit_paid_count + totals.deposit_pending_count
+    pending_phases = totals.phases_total - totals.phases_paid
 
     return {
         'deposits': {
-            'paid_count': deposit_paid_count,
-            'pending_count': deposit_pending_count,
-            'total_paid_amount': float(total_deposit_paid),
-            'total_pending_amount': float(total_deposit_pending),
-            'payment_rate_percent': round((deposit_paid_count / (deposit_paid_count + deposit_pending_count)) * 100, 2) if (deposit_paid_count + deposit_pending_count) > 0 else 0
+            'paid_count': totals.deposit_paid_count,
+            'pending_count': totals.deposit_pending_count,
+            'total_paid_amount': float(totals.deposit_paid_amount),
+            'total_pending_amount': float(totals.deposit_pending_amount),
+            'payment_rate_percent': round((totals.deposit_paid_count / deposit_count) * 100, 2) if deposit_count > 0 else 0
         },
         'phases': {
-            'total': phase_stats['total_phases'],
-            'completed': phase_stats['completed_phases'],
-            'paid': phase_stats['paid_phases'],
-            'pending': phase_stats['pending_phases'],
-            'total_revenue': float(phase_stats['total_phase_revenue']),
-            'pending_revenue': float(phase_stats['pending_phase_revenue']),
-            'payment_rate_percent': round((phase_stats['paid_phases'] / phase_stats['total_phases']) * 100, 2) if phase_stats['total_phases'] > 0 else 0
+            'total': totals.phases_total,
+            'completed': totals.phases_completed,
+            'paid': totals.phases_paid,
+            'pending': pending_phases,
+            'total_revenue': float(totals.phase_paid_amount),
+            'pending_revenue': float(totals.phase_pending_amount),
+            'payment_rate_percent': round((totals.phases_paid / totals.phases_total) * 100, 2) if totals.phases_total > 0 else 0
         },
         'overall': {
-            'total_revenue': float(total_deposit_paid + phase_stats['total_phase_revenue']),
-            'pending_revenue': float(total_deposit_pending + phase_stats['pending_phase_revenue'])
+            'total_revenue': float(totals.deposit_paid_amount + totals.phase_paid_amount),
+            'pending_revenue': float(totals.deposit_pending_amount + totals.phase_pending_amount)
         }
     }
 
 
-@router.get("/finance/top-customers", auth=auth_bearer)
+FINANCE_EXPORT_COLUMNS = [
+    'project_id', 'project_name', 'project_status', 'customer_company', 'customer_email',
+    'accepted_proposals', 'deposit_paid_amount', 'deposit_pending_amount',
+    'phases_total', 'phases_completed', 'phases_paid', 'phase_paid_amount', 'phase_pending_amount',
+    'total_paid', 'total_pending',
+]
+
+
+@router.get("/finance/projects/export", auth=principal_bearer)
 @require_roles('admin')
-def get_top_customers_by_revenue(request, limit: int = 10):
+def export_project_finances(request, format: str = 'csv', status: str = None):
+    """
+    🔒 ADMIN ONLY: Per-project payment report as a streamed CSV or XLSX file
+    Read from the maintained per-project finance stats
+    """
+    user = request.auth
+
+    if format not in EXPORT_FORMATS:
+        raise HttpError(400, f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    # Builds the stats on first use
+    FinanceAggregateService.get_totals()
+
+    stats = ProjectFinanceStats.objects.select_related('project__customer__user').order_by('project__created_at')
+    if status:
+        stats = stats.filter(project__status=status)
+
+    def rows():
+        for s in stats.iterator(chunk_size=2000):
+            yield [
+                str(s.project_id), s.project.name, s.project.status,
+                s.project.customer.company_name, s.project.customer.user.email,
+                s.accepted_proposals, s.deposit_paid_amount, s.deposit_pending_amount,
+                s.phases_total, s.phases_completed, s.phases_paid, s.phase_paid_amount, s.phase_pending_amount,
+                s.deposit_paid_amount + s.phase_paid_amount, s.deposit_pending_amount + s.phase_pending_amount,
+            ]
+
+    filename = f"project-finances-{timezone.localdate().isoformat()}"
+    return streaming_export(format, filename, FINANCE_EXPORT_COLUMNS, rows(), request=request)
+
+
+@router.get("/finance/top-customers", auth=principal_bearer)
+@require_roles('admin')
+def get_top_customers_by_revenue(request, limit: int = 10, offset: int = 0):
     """
     🔒 ADMIN ONLY: Get top customers by total revenue
-    Sorted by revenue, with project count
+    Sorted by net completed payments, with project count
+    Paginate with offset/limit; ranking is served from the leaderboard
+
+    Revenue is completed deposit and phase transactions minus completed
+    refunds on any of the customer's projects, and project_count is the
+    projects with a completed payment. This used to count only projects
+    in COMPLETED status and ignored refunds, so customers with work in
+    progress now rank by what they have actually paid.
     """
     user = request.auth
 
-    # Get all completed projects
-    completed_projects = Project.objects.filter(
-        status=ProjectStatus.COMPLETED
-    ).select_related('customer')
-
-    customer_revenue = {}
-
-    for project in completed_projects:
-        proposal = Proposal.objects.filter(
-            project=project,
-            status='accepted'
-        ).first()
-
-        if not proposal:
-            continue
-
-        customer_id = str(project.customer.id)
-        if customer_id not in customer_revenue:
-            customer_revenue[customer_id] = {
-                'customer_id': customer_id,
-                'customer_name': project.customer.company_name,
-                'customer_email': project.customer.user.email,
-                'total_revenue': Decimal('0'),
-                'project_count': 0
-            }
-
-        # Calculate revenue
-        revenue = Decimal('0')
-        if proposal.deposit_paid:
-            revenue += proposal.deposit_amount
-
-        if proposal.phases:
-            for phase in proposal.phases:
-                if phase.get('payment_approved'):
-                    revenue += Decimal(str(phase.get('amount', 0)))
-
-        customer_revenue[customer_id]['total_revenue'] += revenue
-        customer_revenue[customer_id]['project_count'] += 1
-
-    # Convert to list and sort by revenue
-    top_customers = list(customer_revenue.values())
-    top_customers.sort(key=lambda x: x['total_revenue'], reverse=True)
-
-    # Convert Decimal to float for JSON
-    for customer in top_customers:
-        customer['total_revenue'] = float(customer['total_revenue'])
+    if limit < 1 or limit > 100:
+        raise HttpError(400, "limit must be between 1 and 100")
+    if offset < 0:
+        raise HttpError(400, "offset must be >= 0")
+
+    top_customers, total_customers = customer_leaderboard.page(offset=offset, limit=limit)
 
     return {
-        'top_customers': top_customers[:limit],
-        'total_customers': len(top_customers)
+        'top_customers': top_customers,
+        'total_customers': total_customers,
+        'offset': offset,
+        'limit': limit
     }
@@ -3,22 +3,52 @@ Project API endpoints
 """
 from uuid import UUID
 from typing import List
+from asgiref.sync import sync_to_async
 from ninja import Router
 from ninja.errors import HttpError
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
-from apps.projects.models import Project, ChatMessage, ChatParticipant
+from apps.projects.models import Project, ChatMessage, ChatParticipant, ChatAttachment, ThumbnailStatus
 from apps.projects.schemas.project_schema import (
-    ProjectOut, ProjectListOut, ChatMessageOut, ChatMessageCreate
+    ProjectOut, ProjectListOut, ProjectInboxOut, ChatMessageOut, ChatMessageCreate, ChatReadUpTo, ChatSearchResultOut,
+    ChatTyping, ChatPresenceOut, ChatUploadStart, ChatUploadOut, LinkTicketIn, LinkTicketOut
 )
-from api.dependencies.current_user import auth_bearer, require_roles
+from apps.projects.services.chat_service import ChatService
+from apps.projects.services.chat_search_service import ChatSearchService
+from apps.projects.services.chat_presence_service import chat_presence
+from apps.projects.services.chat_stream_service import ChatStreamService
+from apps.projects.services.chat_unread_service import chat_unread_counters
+from apps.projects.services.chat_upload_service import ChatUploadService, storage as attachment_storage
+from apps.projects.services.project_list_service import ProjectListService, parse_fields, project_paginator
+from apps.users.services.auth_service import AuthService
+from api.dependencies.current_user import auth_bearer, principal_bearer, require_roles, stream_auth, file_auth
 from core.responses.api_response import APIResponse
+from core.utils.pagination import HAS_MORE_HEADER, KeysetPaginator
 
 router = Router(tags=['Projects'])
 
+# Inbox pages follow the project_last_message_idx index
+inbox_paginator = KeysetPaginator(ordering=('-last_message_at', '-id'))
+
+
+def project_list_response(queryset, fields: str, cursor: str, page_size: int) -> HttpResponse:
+    """Render a project list page; the body is already JSON, so ninja is bypassed"""
+    body, page = ProjectListService.render(queryset, parse_fields(fields), cursor=cursor, page_size=page_size)
+    response = HttpResponse(body, content_type='application/json')
+    project_paginator.set_headers(response, page)
+    return response
+
 
 @router.get("", response=List[ProjectListOut], auth=auth_bearer)
-def list_projects(request, status: str = None):
-    """List projects for current user"""
+def list_projects(request, status: str = None, fields: str = None, cursor: str = None, page_size: int = None):
+    """
+    List projects for current user, newest first
+    Every project unless page_size or cursor is given; then keyset-
+    paginated (X-Next-Cursor / X-Has-More headers, ?cursor=).
+    ?fields=id,name,status returns only those fields and loads only
+    their columns.
+    """
     user = request.auth
 
     if user.is_customer:
@@ -28,80 +58,60 @@ def list_projects(request, status: str = None):
         # Sales/Admin see projects they manage
         queryset = Project.objects.filter(project_manager=user)
     else:
-        # Developers see projects they're assigned to
+        # Developers see projects they're assigned to (one row each, no DISTINCT needed)
         queryset = Project.objects.filter(team_members=user)
 
     if status:
         queryset = queryset.filter(status=status)
 
-    projects = queryset.select_related('customer__user', 'project_manager').distinct()
+    return project_list_response(queryset, fields, cursor, page_size)
 
-    # Manually serialize to match schema
-    result = []
-    for project in projects:
-        result.append({
-            'id': project.id,
-            'name': project.name,
-            'status': project.status,
-            'priority': project.priority,
-            'customer': {
-                'id': project.customer.id,
-                'company_name': project.customer.company_name,
-                'user_email': project.customer.user.email,
-                'user_name': project.customer.user.full_name
-            },
-            'project_manager': {
-                'id': project.project_manager.id,
-                'full_name': project.project_manager.full_name,
-                'email': project.project_manager.email,
-                'role': project.project_manager.role
-            } if project.project_manager else None,
-            'created_at': project.created_at,
-            'updated_at': project.updated_at
-        })
 
-    return result
-
-
-@router.get("/all", response=List[ProjectListOut], auth=auth_bearer)
+@router.get("/all", response=List[ProjectListOut], auth=principal_bearer)
 @require_roles('admin')
-def list_all_projects(request, status: str = None):
-    """🔒 ADMIN ONLY: List all projects in the system"""
-    user = request.auth
-
-    # Get all projects
+def list_all_projects(request, status: str = None, fields: str = None, cursor: str = None, page_size: int = None):
+    """🔒 ADMIN ONLY: List all projects in the system (paginated like the project list)"""
     queryset = Project.objects.all()
 
     if status:
         queryset = queryset.filter(status=status)
 
-    projects = queryset.select_related('customer__user', 'project_manager').distinct()
+    return project_list_response(queryset, fields, cursor, page_size)
+
+
+@router.get("/inbox", response=List[ProjectInboxOut], auth=principal_bearer)
+def get_inbox(request, response: HttpResponse, cursor: str = None, limit: int = None):
+    """
+    Projects the user chats in, latest message first, with unread badges
+    One query per page. Follow X-Next-Cursor while X-Has-More is true.
+    """
+    page = inbox_paginator.paginate(ChatService.inbox(request.auth.id), cursor=cursor, page_size=limit)
+    inbox_paginator.set_headers(response, page)
+    return page['items']
+
+
+@router.get("/unread-counts", auth=principal_bearer)
+def get_unread_counts(request):
+    """
+    Unread chat message counts for every project the user takes part in
+    One Redis read (or one grouped query without Redis); projects without
+    unread messages are listed with 0.
+    """
+    counts = chat_unread_counters.counts(request.auth.id)
+    return {"counts": counts, "total": sum(counts.values())}
+
+
+@router.post("/presence/heartbeat", auth=principal_bearer)
+def presence_heartbeat(request):
+    """Keep the user online (clients without an open event stream)"""
+    chat_presence.touch(request.auth.id)
+    return {"success": True}
 
-    # Manually serialize to match schema
-    result = []
-    for project in projects:
-        result.append({
-            'id': project.id,
-            'name': project.name,
-            'status': project.status,
-            'priority': project.priority,
-            'customer': {
-                'id': project.customer.id,
-                'company_name': project.customer.company_name,
-                'user_email': project.customer.user.email,
-                'user_name': project.customer.user.full_name
-            },
-            'project_manager': {
-                'id': project.project_manager.id,
-                'full_name': project.project_manager.full_name,
-                'email': project.project_manager.email,
-                'role': project.project_manager.role
-            } if project.project_manager else None,
-            'created_at': project.created_at,
-            'updated_at': project.updated_at
-        })
 
-    return result
+@router.get("/chat/search", response=List[ChatSearchResultOut], auth=principal_bearer)
+def search_all_messages(request, q: str, limit: int = 20):
+    """Full-text search over the chats of every project the user takes part in"""
+    return ChatSearchService.search(request.auth.id, q, limit=limit)
 
 
 @router.get("/{project_id}", response=ProjectOut, auth=auth_bearer)
@@ -152,8 +162,15 @@ def get_project(request, project_id: UUID):
 
 # Chat endpoints
 @router.get("/{project_id}/messages", response=List[ChatMessageOut], auth=auth_bearer)
-def list_messages(request, project_id: UUID, limit: int = 50):
-    """Get chat messages for a project"""
+def list_messages(request, response: HttpResponse, project_id: UUID, limit: int = 50,
+                  before: UUID = None, after: UUID = None):
+    """
+    Get chat messages for a project, oldest first
+    Without cursors returns the newest page. Pass the id of the oldest
+    message held as ?before= to scroll back, or of the newest as ?after=
+    to fetch only what is new. X-Has-More says whether more remain in
+    that direction.
+    """
     try:
         project = Project.objects.get(id=project_id)
 
@@ -163,16 +180,28 @@ def list_messages(request, project_id: UUID, limit: int = 50):
             if not (user.role in ['admin'] or project.project_manager == user):
                 return APIResponse.error_response("Permission denied")
 
-        messages = ChatMessage.objects.filter(
-            project=project
-        ).select_related('sender').order_by('-created_at')[:limit]
+        anchors = {}
+        for name, message_id in (('before', before), ('after', after)):
+            if message_id:
+                anchors[name] = ChatService.anchor(project.id, message_id)
+                if anchors[name] is None:
+                    raise HttpError(404, f"Message {message_id} not found")
 
-        return list(reversed(list(messages)))
+        page = ChatService.page(project.id, limit=limit, **anchors)
+        ChatService.apply_read_state(project.id, user.id, page['items'])
+        response[HAS_MORE_HEADER] = 'true' if page['has_more'] else 'false'
+        return page['items']
 
     except Project.DoesNotExist:
         return APIResponse.error_response("Project not found")
 
 
+@router.get("/{project_id}/messages/search", response=List[ChatSearchResultOut], auth=principal_bearer)
+def search_messages(request, project_id: UUID, q: str, limit: int = 20):
+    """Full-text search over one project's chat (participants only), best match first"""
+    return ChatSearchService.search(request.auth.id, q, project_id=project_id, limit=limit)
+
+
 @router.post("/{project_id}/messages", response=ChatMessageOut, auth=auth_bearer)
 def send_message(request, project_id: UUID, payload: ChatMessageCreate):
     """Send a chat message"""
@@ -186,18 +215,22 @@ def send_message(request, project_id: UUID, payload: ChatMessageCreate):
                 return APIResponse.error_response("Permission denied")
 
         # Create message
-        message = ChatMessage.objects.create(
-            project=project,
-            sender=user,
-            message=payload.message,
-            message_type=payload.message_type or ChatMessage.MessageType.TEXT,
-            attachments=payload.attachments or []
-        )
+        with transaction.atomic():
+            message = ChatService.post(
+                project,
+                user,
+                payload.message,
+                message_type=payload.message_type or ChatMessage.MessageType.TEXT,
+                attachments=payload.attachments
+            )
+            ChatUploadService.attach(message, payload.attachment_ids)
+        ChatStreamService.publish_message(message)
 
         # Update participant's last activity
         ChatParticipant.objects.filter(project=project, user=user).update(
             last_read_at=timezone.now()
         )
+        chat_unread_counters.message_sent(message)
 
         return message
 
@@ -205,17 +238,164 @@ def send_message(request, project_id: UUID, payload: ChatMessageCreate):
         return APIResponse.error_response("Project not found")
 
 
+@router.post("/{project_id}/uploads", response=ChatUploadOut, auth=principal_bearer)
+def start_upload(request, project_id: UUID, payload: ChatUploadStart):
+    """
+    Start a resumable file upload for the project chat
+    Then PUT the raw bytes in chunks to /uploads/{id}?offset=<received>.
+    If sha256 names a file already stored, the upload completes at once.
+    """
+    if not Project.objects.filter(id=project_id).exists():
+        raise HttpError(404, "Project not found")
+    if not chat_presence.can_access(project_id, request.auth):
+        raise HttpError(403, "Permission denied")
+    return ChatUploadService.start(
+        project_id, request.auth.id, payload.filename, payload.size,
+        content_type=payload.content_type, sha256=payload.sha256
+    )
+
+
+@router.put("/{project_id}/uploads/{upload_id}", response=ChatUploadOut, auth=principal_bearer)
+def upload_chunk(request, project_id: UUID, upload_id: UUID, offset: int):
+    """
+    Append the request body (raw bytes, not multipart) at offset
+    A 409 means offset is not where the server is; GET the upload and
+    continue from its received. The last chunk completes the upload.
+    """
+    length = request.META.get('CONTENT_LENGTH')
+    if not length:
+        raise HttpError(411, "Content-Length required")
+    return ChatUploadService.write_chunk(project_id, upload_id, request.auth.id, offset, request, int(length))
+
+
+@router.get("/{project_id}/uploads/{upload_id}", response=ChatUploadOut, auth=principal_bearer)
+def get_upload(request, project_id: UUID, upload_id: UUID):
+    """Upload progress; received is the offset to resume from"""
+    return ChatUploadService.get(project_id, upload_id, request.auth.id)
+
+
+@router.post("/{project_id}/tickets", response=LinkTicketOut, auth=principal_bearer)
+def issue_link_ticket(request, project_id: UUID, payload: LinkTicketIn):
+    """
+    Short-lived ticket for chat URLs the browser loads itself
+    Append it as ?ticket= to the events stream (purpose 'events') or to
+    attachment and thumbnail links (purpose 'files'); it opens nothing else.
+    """
+    if not chat_presence.can_access(project_id, request.auth):
+        raise HttpError(403, "Permission denied")
+    return AuthService().issue_ticket(request.auth, payload.purpose, project_id)
+
+
+@router.get("/{project_id}/attachments/{attachment_id}", auth=file_auth)
+def download_attachment(request, project_id: UUID, attachment_id: UUID, thumbnail: bool = False):
+    """
+    Download a chat attachment, or its JPEG thumbnail with ?thumbnail=true
+    Accepts ?ticket= (purpose 'files') so it can be used directly as a link or <img src>.
+    Files never change, so responses are cacheable by the browser.
+    """
+    if not chat_presence.can_access(project_id, request.auth):
+        raise HttpError(403, "Permission denied")
+    attachment = ChatAttachment.objects.select_related('file').filter(id=attachment_id, project_id=project_id).first()
+    if attachment is None:
+        raise HttpError(404, "Attachment not found")
+
+    stored = attachment.file
+    etag = f'"{stored.sha256}{"-thumb" if thumbnail else ""}"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponse(status=304)
+    if thumbnail:
+        if stored.thumbnail_status != ThumbnailStatus.DONE:
+            raise HttpError(404, "No thumbnail")
+        name, content_type = stored.thumbnail_name, 'image/jpeg'
+    else:
+        name, content_type = stored.name, stored.content_type
+
+    response = FileResponse(
+        attachment_storage().open(name, 'rb'),
+        content_type=content_type,
+        as_attachment=not thumbnail,
+        filename=attachment.filename
+    )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
+@router.get("/{project_id}/events", auth=stream_auth)
+async def stream_events(request, project_id: UUID, last_event_id: str = None):
+    """
+    Server-Sent Events stream of new chat messages
+    Reconnecting clients resume from the Last-Event-ID header (sent by
+    EventSource automatically) or the last_event_id query parameter.
+    """
+    project = await Project.objects.filter(id=project_id).afirst()
+    if project is None:
+        raise HttpError(404, "Project not found")
+    if not await sync_to_async(ChatStreamService.can_access)(project, request.auth):
+        raise HttpError(403, "Permission denied")
+
+    response = StreamingHttpResponse(
+        ChatStreamService.stream(project.id, request.headers.get('Last-Event-ID') or last_event_id, request.auth.id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx must not buffer the stream
+    return response
+
+
+@router.post("/{project_id}/typing", auth=principal_bearer)
+def set_typing(request, project_id: UUID, payload: ChatTyping):
+    """
+    Typing indicator; send while typing and once with typing=false
+    Kept in Redis only. Repeats within a second are coalesced, and
+    changes are pushed on the chat event stream.
+    """
+    if not chat_presence.can_access(project_id, request.auth):
+        raise HttpError(403, "Permission denied")
+    if chat_presence.set_typing(project_id, request.auth.id, payload.typing):
+        ChatStreamService.publish_typing(project_id, request.auth.id, payload.typing)
+    return {"success": True}
+
+
+@router.get("/{project_id}/presence", response=List[ChatPresenceOut], auth=principal_bearer)
+def get_presence(request, project_id: UUID):
+    """Online, last-seen and typing state of every chat member, in one cache read"""
+    if not chat_presence.can_access(project_id, request.auth):
+        raise HttpError(403, "Permission denied")
+    return chat_presence.project_presence(project_id)
+
+
+def read_up_to(project_id, user, message) -> int:
+    """Advance the user's read pointer to message; returns what remains unread"""
+    if ChatService.read_up_to(project_id, user.id, message):
+        ChatStreamService.publish_read(project_id, user.id, message)
+    unread = chat_unread_counters.unread_by_project(user.id, project_id).get(str(project_id), 0)
+    chat_unread_counters.mark_read(user.id, project_id, unread)
+    return unread
+
+
+@router.post("/{project_id}/messages/read", auth=auth_bearer)
+def mark_messages_read(request, project_id: UUID, payload: ChatReadUpTo):
+    """
+    Mark every message up to payload.up_to as read
+    One UPDATE of the participant's last_read_at; per-message read state
+    is derived from it when messages are listed.
+    """
+    message = ChatService.anchor(project_id, payload.up_to)
+    if message is None:
+        raise HttpError(404, "Message not found")
+    return {"success": True, "unread": read_up_to(project_id, request.auth, message)}
+
+
 @router.post("/{project_id}/messages/{message_id}/read", auth=auth_bearer)
 def mark_message_read(request, project_id: UUID, message_id: UUID):
-    """Mark a message as read"""
+    """Mark a message as read (kept for older clients; same as reading up to it)"""
     try:
-        message = ChatMessage.objects.get(id=message_id, project_id=project_id)
+        message = ChatMessage.objects.only('id', 'created_at', 'sender_id').get(id=message_id, project_id=project_id)
 
         # Only allow marking messages sent by others
-        if message.sender != request.auth:
-            message.is_read = True
-            message.read_at = timezone.now()
-            message.save()
+        if message.sender_id != request.auth.id:
+            read_up_to(project_id, request.auth, message)
 
         return {"success": True}
 
@@ -225,29 +405,6 @@ def mark_message_read(request, project_id: UUID, message_id: UUID):
 
 @router.get("/{project_id}/unread-count", auth=auth_bearer)
 def get_unread_count(request, project_id: UUID):
-    """Get unread message count for current user"""
-    try:
-        project = Project.objects.get(id=project_id)
-        user = request.auth
-
-        # Get last read time
-        participant = ChatParticipant.objects.filter(project=project, user=user).first()
-
-        if not participant:
-            return {"count": 0}
-
-        # Count messages after last read time
-        if participant.last_read_at:
-            count = ChatMessage.objects.filter(
-                project=project,
-                created_at__gt=participant.last_read_at
-            ).exclude(sender=user).count()
-        else:
-            count = ChatMessage.objects.filter(
-                project=project
-            ).exclude(sender=user).count()
-
-        return {"count": count}
-
-    except Project.DoesNotExist:
-        return APIResponse.error_response("Project not found")
+    """Get unread message count for current user (see /unread-counts for all projects)"""
+    counts = chat_unread_counters.counts(request.auth.id)
+    return {"count": counts.get(str(project_id), 0)}
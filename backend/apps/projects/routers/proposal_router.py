@@ -6,11 +6,13 @@ from typing import List
 from decimal import Decimal
 from ninja import Router
 from ninja.errors import HttpError
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from api.dependencies.current_user import auth_bearer, require_roles
 from apps.projects.models import (
     Proposal,
+    ProposalPhase,
     ProposalStatus,
     Project,
     ProjectStatus,
@@ -18,6 +20,10 @@ from apps.projects.models import (
     TransactionType,
     TransactionStatus,
 )
+from apps.projects.permissions import project_policy, proposal_policy
+from apps.projects.services.customer_leaderboard import customer_leaderboard
+from apps.projects.services.ledger_service import LedgerService
+from apps.projects.services.idempotency_service import idempotent
 from apps.projects.schemas.proposal_schema import (
     ProposalCreate,
     ProposalUpdate,
@@ -31,7 +37,7 @@ router = Router(tags=['Proposals'])
 
 def serialize_proposal(proposal):
     """Helper function to serialize proposal with proper type conversion"""
-    # Convert nested Decimal values in phases
+    # Convert nested Decimal values in phases (built from ProposalPhase rows)
     phases_data = []
     for phase in proposal.phases:
         phase_copy = phase.copy()
@@ -107,21 +113,54 @@ def record_payment_transaction(
     """
     Ensure we always have a transaction record when money moves.
     This keeps the admin transaction table in sync with deposit/phase approvals.
+    Upserts the row for (project, proposal, type, phase); safe to call concurrently.
     """
     if not project.customer or not project.customer.user:
         return None
 
     completed_at = timezone.now()
     metadata = metadata or {}
+    lookup = {
+        'project': project,
+        'proposal': proposal,
+        'transaction_type': transaction_type,
+        'phase_index': phase_index,
+    }
+    payment = Transaction(
+        **lookup,
+        customer=project.customer.user,
+        status=TransactionStatus.COMPLETED,
+        amount=amount,
+        phase_name=phase_name,
+        payment_method=payment_method,
+        transaction_reference=transaction_reference,
+        description=description,
+        completed_at=completed_at,
+        metadata=metadata,
+    )
 
-    existing = Transaction.objects.filter(
-        project=project,
-        proposal=proposal,
-        transaction_type=transaction_type,
-        phase_index=phase_index,
-    ).order_by('-created_at').first()
+    with transaction.atomic():
+        # INSERT ... ON CONFLICT DO NOTHING: a completed row already there
+        # (uniq_completed_payment) makes this a no-op instead of an error
+        Transaction.objects.bulk_create([payment], ignore_conflicts=True)
+        # Row lock: concurrent approvals of the same payment update one row in turn
+        rows = list(Transaction.objects.select_for_update().filter(**lookup).order_by('-created_at'))
+        earlier = [row for row in rows if row.id != payment.id]
+
+        if not earlier:
+            # Inserted; bulk_create sends no post_save, so post to the ledger here
+            LedgerService.sync_transaction(payment)
+            customer_id = project.customer_id
+            transaction.on_commit(lambda: customer_leaderboard.refresh_customer(customer_id))
+            return payment
+
+        if len(earlier) == len(rows):
+            existing = next(row for row in rows if row.status == TransactionStatus.COMPLETED)
+        else:
+            # Inserted beside an unfinished row of the same payment (e.g. pending): complete that one instead
+            Transaction.objects.filter(id=payment.id).delete()
+            existing = earlier[0]
 
-    if existing:
         fields_to_update = set()
 
         if existing.amount != amount:
@@ -160,22 +199,6 @@ def record_payment_transaction(
             existing.save(update_fields=[*fields_to_update, 'updated_at'])
         return existing
 
-    return Transaction.objects.create(
-        project=project,
-        proposal=proposal,
-        customer=project.customer.user,
-        transaction_type=transaction_type,
-        status=TransactionStatus.COMPLETED,
-        amount=amount,
-        phase_index=phase_index,
-        phase_name=phase_name,
-        payment_method=payment_method,
-        transaction_reference=transaction_reference,
-        description=description,
-        completed_at=completed_at,
-        metadata=metadata,
-    )
-
 
 @router.post("/projects/{project_id}/proposals", response=ProposalOut, auth=auth_bearer)
 @require_roles('admin', 'sales')
@@ -241,15 +264,17 @@ def list_proposals(request, project_id: str):
     - Sales/Admin: see all including DRAFT
     """
     user = request.auth
-    project = get_object_or_404(Project, id=project_id)
 
-    # Check permissions for customer
-    if user.role == 'customer':
-        # Customer must be the project's customer
-        if project.customer.user != user:
-            raise HttpError(403, "You can only view proposals for your own projects")
+    # Customer must be the project's customer (checked in the lookup query)
+    project = project_policy.get_or_403(
+        Project.objects.all(), user,
+        "You can only view proposals for your own projects",
+        id=project_id
+    )
 
-    proposals = Proposal.objects.filter(project=project).select_related('created_by', 'project')
+    proposals = Proposal.objects.filter(project=project).select_related(
+        'created_by', 'project'
+    ).prefetch_related('phase_items')
 
     # Filter based on role
     if user.role == 'customer':
@@ -272,14 +297,15 @@ def get_proposal(request, proposal_id: str):
     Customer viewing marks it as VIEWED
     """
     user = request.auth
-    proposal = get_object_or_404(Proposal, id=proposal_id)
 
-    # Check permissions
-    if user.role == 'customer':
-        # Customer must be the project's customer
-        if proposal.project.customer.user != user:
-            raise HttpError(403, "You can only view proposals for your own projects")
+    # Customer must be the project's customer (checked in the lookup query)
+    proposal = proposal_policy.get_or_403(
+        Proposal.objects.select_related('project', 'created_by'), user,
+        "You can only view proposals for your own projects",
+        id=proposal_id
+    )
 
+    if user.role == 'customer':
         # Mark as viewed if it was sent
         if proposal.status == ProposalStatus.SENT:
             proposal.status = ProposalStatus.VIEWED
@@ -296,15 +322,17 @@ def update_proposal(request, proposal_id: str, payload: ProposalUpdate):
     - Customer: can only update customer_approvals field
     """
     user = request.auth
-    proposal = get_object_or_404(Proposal, id=proposal_id)
+    proposal = proposal_policy.get_or_403(
+        Proposal.objects.select_related('project', 'created_by'), user,
+        "Not authorized",
+        id=proposal_id
+    )
 
     # Update fields
     update_data = payload.dict(exclude_unset=True)
 
     # Customer can only update customer_approvals
     if user.role == 'customer':
-        if proposal.project.customer.user != user:
-            raise HttpError(403, "Not authorized")
         # Only allow customer_approvals field
         if 'customer_approvals' in update_data:
             proposal.customer_approvals = update_data['customer_approvals']
@@ -417,11 +445,13 @@ def accept_proposal(request, proposal_id: str, payload: CustomerResponse):
     Changes project status to DEPOSIT (waiting for deposit payment)
     """
     user = request.auth
-    proposal = get_object_or_404(Proposal, id=proposal_id)
 
-    # Must be customer of the project
-    if proposal.project.customer.user != user:
-        raise HttpError(403, "You can only accept proposals for your own projects")
+    # Must be customer of the project (checked in the lookup query)
+    proposal = proposal_policy.get_or_403(
+        Proposal.objects.select_related('project', 'created_by'), user,
+        "You can only accept proposals for your own projects",
+        id=proposal_id
+    )
 
     # Cannot accept if already rejected
     if proposal.status == ProposalStatus.REJECTED:
@@ -439,7 +469,7 @@ def accept_proposal(request, proposal_id: str, payload: CustomerResponse):
 
     # Update project status to DEPOSIT (waiting for payment)
     proposal.project.status = ProjectStatus.DEPOSIT
-    proposal.project.save()
+    proposal.project.save(update_fields=['status', 'updated_at'])
 
     return serialize_proposal(proposal)
 
@@ -452,11 +482,13 @@ def reject_proposal(request, proposal_id: str, payload: CustomerResponse):
     Changes status to NEGOTIATING (continue discussion)
     """
     user = request.auth
-    proposal = get_object_or_404(Proposal, id=proposal_id)
 
-    # Must be customer of the project
-    if proposal.project.customer.user != user:
-        raise HttpError(403, "You can only reject proposals for your own projects")
+    # Must be customer of the project (checked in the lookup query)
+    proposal = proposal_policy.get_or_403(
+        Proposal.objects.select_related('project', 'created_by'), user,
+        "You can only reject proposals for your own projects",
+        id=proposal_id
+    )
 
     if proposal.status in [ProposalStatus.ACCEPTED, ProposalStatus.REJECTED]:
         raise HttpError(400, "Proposal already responded to")
@@ -472,6 +504,8 @@ def reject_proposal(request, proposal_id: str, payload: CustomerResponse):
 
 @router.post("/proposals/{proposal_id}/submit-payment", response=ProposalOut, auth=auth_bearer)
 @require_roles('customer', 'no_admin')
+@idempotent
+@transaction.atomic
 def submit_payment(request, proposal_id: str):
     """
     🔒 CUSTOMER ONLY: Submit deposit payment (AUTO APPROVED)
@@ -484,11 +518,13 @@ def submit_payment(request, proposal_id: str):
     This design supports future SePay integration where webhook will verify
     """
     user = request.auth
-    proposal = get_object_or_404(Proposal, id=proposal_id)
 
-    # Must be customer of the project
-    if proposal.project.customer.user != user:
-        raise HttpError(403, "You can only submit payment for your own projects")
+    # Must be customer of the project (checked in the lookup query)
+    proposal = proposal_policy.get_or_403(
+        Proposal.objects.select_related('project', 'created_by'), user,
+        "You can only submit payment for your own projects",
+        id=proposal_id
+    )
 
     # Proposal must be accepted
     if proposal.status != ProposalStatus.ACCEPTED:
@@ -538,7 +574,7 @@ def submit_payment(request, proposal_id: str):
     # Start the project IMMEDIATELY
     proposal.project.status = ProjectStatus.IN_PROGRESS
     proposal.project.start_date = now.date()
-    proposal.project.save()
+    proposal.project.save(update_fields=['status', 'start_date', 'updated_at'])
 
     # 🎯 AUTO-ASSIGN DEVELOPERS WHEN DEPOSIT IS APPROVED
     from apps.projects.services.project_service import ProjectService
@@ -553,6 +589,8 @@ def submit_payment(request, proposal_id: str):
 
 @router.post("/proposals/{proposal_id}/confirm-payment", response=ProposalOut, auth=auth_bearer)
 @require_roles('admin', 'sales')
+@idempotent
+@transaction.atomic
 def confirm_deposit_payment(request, proposal_id: str):
     """
     🔒 ADMIN/SALES ONLY: [DEPRECATED] Confirm deposit payment
@@ -596,7 +634,7 @@ def confirm_deposit_payment(request, proposal_id: str):
     # Change project status to IN_PROGRESS (start project)
     proposal.project.status = ProjectStatus.IN_PROGRESS
     proposal.project.start_date = timezone.now().date()
-    proposal.project.save()
+    proposal.project.save(update_fields=['status', 'start_date', 'updated_at'])
 
     # 🎯 AUTO-ASSIGN DEVELOPERS WHEN DEPOSIT IS APPROVED
     from apps.projects.services.project_service import ProjectService
@@ -610,6 +648,8 @@ def confirm_deposit_payment(request, proposal_id: str):
 
 @router.post("/proposals/{proposal_id}/submit-full-payment", response=ProposalOut, auth=auth_bearer)
 @require_roles('customer', 'no_admin')
+@idempotent
+@transaction.atomic
 def submit_full_payment(request, proposal_id: str):
     """
     🔒 CUSTOMER ONLY: Submit full payment for entire project (deposit + all phases)
@@ -623,11 +663,13 @@ def submit_full_payment(request, proposal_id: str):
     This is an alternative to paying deposit first, then paying each phase separately.
     """
     user = request.auth
-    proposal = get_object_or_404(Proposal, id=proposal_id)
 
-    # Must be customer of the project
-    if proposal.project.customer.user != user:
-        raise HttpError(403, "You can only submit payment for your own projects")
+    # Must be customer of the project (checked in the lookup query)
+    proposal = proposal_policy.get_or_403(
+        Proposal.objects.select_related('project', 'created_by'), user,
+        "You can only submit payment for your own projects",
+        id=proposal_id
+    )
 
     # Proposal must be accepted
     if proposal.status != ProposalStatus.ACCEPTED:
@@ -641,9 +683,10 @@ def submit_full_payment(request, proposal_id: str):
         raise HttpError(400, "Deposit already paid. Cannot switch to full payment option.")
 
     # Calculate total amount (deposit + all phases)
+    phases = list(proposal.phase_items.all())
     total_amount = Decimal(str(proposal.deposit_amount or 0))
-    for phase in proposal.phases:
-        total_amount += Decimal(str(phase.get('amount', 0)))
+    for phase in phases:
+        total_amount += phase.amount
 
     # Mark as full payment
     now = timezone.now()
@@ -658,29 +701,35 @@ def submit_full_payment(request, proposal_id: str):
     proposal.payment_submitted_at = now
 
     # Mark all phases as paid
-    phases = proposal.phases
-    for idx, phase in enumerate(phases):
-        phase['completed'] = True
-        phase['completed_at'] = now.isoformat()
-        phase['completed_by'] = 'system'  # System auto-complete
-        phase['payment_submitted'] = True
-        phase['payment_submitted_at'] = now.isoformat()
-        phase['payment_approved'] = True
-        phase['payment_approved_at'] = now.isoformat()
-        phase['payment_approved_by'] = str(user.id)
-        phase['payment_proof'] = {
+    for phase in phases:
+        phase.completed = True
+        phase.completed_at = now
+        phase.completed_by = 'system'  # System auto-complete
+        phase.payment_submitted = True
+        phase.payment_submitted_at = now
+        phase.payment_approved = True
+        phase.payment_approved_at = now
+        phase.payment_approved_by = str(user.id)
+        phase.payment_proof = {
             'submitted_by': str(user.id),
             'submitted_at': now.isoformat(),
             'approved_by': str(user.id),
             'approved_at': now.isoformat(),
             'approved_by_name': user.full_name,
-            'amount': str(phase.get('amount', 0)),
-            'phase_name': phase.get('name'),
+            'amount': str(phase.to_dict()['amount']),
+            'phase_name': phase.name,
             'status': 'approved',
             'full_payment': True  # Flag to indicate this was from full payment
         }
+        phase.updated_at = now
+
+    ProposalPhase.objects.bulk_update(phases, [
+        'completed', 'completed_at', 'completed_by',
+        'payment_submitted', 'payment_submitted_at',
+        'payment_approved', 'payment_approved_at', 'payment_approved_by',
+        'payment_proof', 'updated_at',
+    ])
 
-    proposal.phases = phases
     proposal.payment_proof = {
         'submitted_by': str(user.id),
         'submitted_at': now.isoformat(),
@@ -695,6 +744,7 @@ def submit_full_payment(request, proposal_id: str):
         'auto_approved': True
     }
 
+    # Saved after the phase rows so the finance aggregates see both
     proposal.save()
 
     # Create transaction record for full payment
@@ -717,7 +767,7 @@ def submit_full_payment(request, proposal_id: str):
     # Start the project IMMEDIATELY
     proposal.project.status = ProjectStatus.IN_PROGRESS
     proposal.project.start_date = now.date()
-    proposal.project.save()
+    proposal.project.save(update_fields=['status', 'start_date', 'updated_at'])
 
     # 🎯 AUTO-ASSIGN DEVELOPERS
     from apps.projects.services.project_service import ProjectService
@@ -731,6 +781,7 @@ def submit_full_payment(request, proposal_id: str):
 
 @router.post("/proposals/{proposal_id}/phases/{phase_index}/complete", response=ProposalOut, auth=auth_bearer)
 @require_roles('admin', 'sales')
+@transaction.atomic
 def mark_phase_complete(request, proposal_id: str, phase_index: int):
     """
     🔒 ADMIN/SALES ONLY: Mark a phase as completed
@@ -742,7 +793,7 @@ def mark_phase_complete(request, proposal_id: str, phase_index: int):
     """
     user = request.auth
 
-    proposal = get_object_or_404(Proposal, id=proposal_id)
+    proposal = get_object_or_404(Proposal.objects.select_related('project', 'created_by'), id=proposal_id)
 
     # Proposal must be accepted and deposit paid
     if proposal.status != ProposalStatus.ACCEPTED:
@@ -751,37 +802,40 @@ def mark_phase_complete(request, proposal_id: str, phase_index: int):
     if not proposal.deposit_paid:
         raise HttpError(400, "Deposit must be paid before starting phases")
 
-    # Validate phase index
-    if phase_index < 0 or phase_index >= len(proposal.phases):
-        raise HttpError(400, f"Invalid phase index. Must be 0-{len(proposal.phases)-1}")
+    # Get phase (and the previous one) with a row lock
+    phases = {
+        phase.index: phase
+        for phase in proposal.phase_items.select_for_update().filter(index__in=[phase_index - 1, phase_index])
+    }
+    phase = phases.get(phase_index)
 
-    # Get phase
-    phases = proposal.phases
-    phase = phases[phase_index]
+    # Validate phase index
+    if phase_index < 0 or phase is None:
+        raise HttpError(400, f"Invalid phase index. Must be 0-{proposal.phase_items.count()-1}")
 
     # Already completed
-    if phase.get('completed'):
+    if phase.completed:
         raise HttpError(400, "Phase already marked as completed")
 
     # Check if previous phase is paid (except for first phase)
     if phase_index > 0:
-        prev_phase = phases[phase_index - 1]
-        if not prev_phase.get('payment_approved'):
+        prev_phase = phases.get(phase_index - 1)
+        if not prev_phase or not prev_phase.payment_approved:
             raise HttpError(400, "Previous phase payment must be approved first")
 
-    # Mark as completed
-    phase['completed'] = True
-    phase['completed_at'] = timezone.now().isoformat()
-    phase['completed_by'] = str(user.id)
-
-    proposal.phases = phases
-    proposal.save()
+    # Mark as completed (only this phase row is written)
+    phase.completed = True
+    phase.completed_at = timezone.now()
+    phase.completed_by = str(user.id)
+    phase.save(update_fields=['completed', 'completed_at', 'completed_by', 'updated_at'])
 
     return serialize_proposal(proposal)
 
 
 @router.post("/proposals/{proposal_id}/phases/{phase_index}/submit-payment", response=ProposalOut, auth=auth_bearer)
 @require_roles('customer', 'no_admin')
+@idempotent
+@transaction.atomic
 def submit_phase_payment(request, proposal_id: str, phase_index: int):
     """
     🔒 CUSTOMER ONLY: Submit payment for a completed phase
@@ -792,63 +846,65 @@ def submit_phase_payment(request, proposal_id: str, phase_index: int):
     3. Auto-approved → Phase fully paid, next phase can start
     """
     user = request.auth
-    proposal = get_object_or_404(Proposal, id=proposal_id)
 
-    # Must be customer of the project
-    if proposal.project.customer.user != user:
-        raise HttpError(403, "You can only submit payment for your own projects")
+    # Must be customer of the project (checked in the lookup query)
+    proposal = proposal_policy.get_or_403(
+        Proposal.objects.select_related('project', 'created_by'), user,
+        "You can only submit payment for your own projects",
+        id=proposal_id
+    )
 
     # Proposal must be accepted
     if proposal.status != ProposalStatus.ACCEPTED:
         raise HttpError(400, "Proposal must be accepted first")
 
-    # Validate phase index
-    if phase_index < 0 or phase_index >= len(proposal.phases):
-        raise HttpError(400, f"Invalid phase index. Must be 0-{len(proposal.phases)-1}")
+    # Get phase with a row lock
+    phase = proposal.phase_items.select_for_update().filter(index=phase_index).first()
 
-    # Get phase
-    phases = proposal.phases
-    phase = phases[phase_index]
+    # Validate phase index
+    if phase_index < 0 or phase is None:
+        raise HttpError(400, f"Invalid phase index. Must be 0-{proposal.phase_items.count()-1}")
 
     # Phase must be completed by sale first
-    if not phase.get('completed'):
+    if not phase.completed:
         raise HttpError(400, "Phase must be completed by sales team first")
 
     # Already paid
-    if phase.get('payment_approved'):
+    if phase.payment_approved:
         raise HttpError(400, "Payment already approved for this phase")
 
-    # Mark payment as submitted AND auto-approve
-    now = timezone.now().isoformat()
-    phase['payment_submitted'] = True
-    phase['payment_submitted_at'] = now
-    phase['payment_approved'] = True  # AUTO APPROVE
-    phase['payment_approved_at'] = now
-    phase['payment_approved_by'] = str(user.id)  # Customer approved their own payment
-    phase['payment_proof'] = {
+    # Mark payment as submitted AND auto-approve (only this phase row is written)
+    now = timezone.now()
+    phase.payment_submitted = True
+    phase.payment_submitted_at = now
+    phase.payment_approved = True  # AUTO APPROVE
+    phase.payment_approved_at = now
+    phase.payment_approved_by = str(user.id)  # Customer approved their own payment
+    phase.payment_proof = {
         'submitted_by': str(user.id),
-        'submitted_at': now,
+        'submitted_at': now.isoformat(),
         'approved_by': str(user.id),
-        'approved_at': now,
+        'approved_at': now.isoformat(),
         'approved_by_name': user.full_name,
-        'amount': str(phase.get('amount', 0)),
-        'phase_name': phase.get('name'),
+        'amount': str(phase.to_dict()['amount']),
+        'phase_name': phase.name,
         'status': 'approved',
         'auto_approved': True  # Flag to indicate auto-approval
     }
+    phase.save(update_fields=[
+        'payment_submitted', 'payment_submitted_at',
+        'payment_approved', 'payment_approved_at', 'payment_approved_by',
+        'payment_proof', 'updated_at',
+    ])
 
-    proposal.phases = phases
-    proposal.save()
-
-    phase_payment_proof = phase.get('payment_proof') or {}
-    phase_amount = Decimal(str(phase.get('amount') or 0))
+    phase_payment_proof = phase.payment_proof or {}
     record_payment_transaction(
         project=proposal.project,
         proposal=proposal,
         transaction_type=TransactionType.PHASE,
-        amount=phase_amount,
+        amount=phase.amount,
         phase_index=phase_index,
-        phase_name=phase.get('name'),
+        phase_name=phase.name,
         description=f"Phase {phase_index + 1} payment auto-approved by customer",
         payment_method=phase_payment_proof.get('method', 'bank_transfer'),
         transaction_reference=phase_payment_proof.get('reference'),
@@ -859,11 +915,11 @@ def submit_phase_payment(request, proposal_id: str, phase_index: int):
     )
 
     # Check if this was the last phase - if so, mark project as COMPLETED
-    all_phases_paid = all(p.get('payment_approved', False) for p in phases)
+    all_phases_paid = not proposal.phase_items.filter(payment_approved=False).exists()
     if all_phases_paid:
         proposal.project.status = ProjectStatus.COMPLETED
         proposal.project.end_date = timezone.now().date()
-        proposal.project.save()
+        proposal.project.save(update_fields=['status', 'end_date', 'updated_at'])
 
     return serialize_proposal(proposal)
 
@@ -3,8 +3,12 @@ Transaction Management API
 Admin manages payments, deposits, and financial transactions
 """
 from typing import List
-from ninja import Router
+from ninja import File, Router
+from ninja.files import UploadedFile
 from ninja.errors import HttpError
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, Q, Sum
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from api.dependencies.current_user import auth_bearer
@@ -12,7 +16,19 @@ from apps.projects.models import (
     Project, Proposal, Transaction,
     TransactionType, TransactionStatus
 )
+from apps.projects.permissions import project_policy
+from apps.projects.services.bank_reconciliation_service import (
+    BankReconciliationService,
+    StatementError,
+    iter_statement_lines,
+)
+from apps.projects.services.idempotency_service import idempotent
+from apps.projects.services.ledger_service import LedgerService
+from core.utils.export import EXPORT_FORMATS, streaming_export
+from core.utils.pagination import KeysetPaginator
+from core.utils.periods import local_day_bounds
 from pydantic import BaseModel, Field
+from datetime import date
 from decimal import Decimal
 
 router = Router(tags=['Transaction Management'])
@@ -74,44 +90,106 @@ def serialize_transaction(transaction):
     }
 
 
+# Opt-in: without cursor/page_size the full list is returned, as before pagination
+transaction_paginator = KeysetPaginator(ordering=('-created_at', '-id'), opt_in=True)
+
+
 @router.get("/transactions", auth=auth_bearer)
-def list_transactions(request, status: str = None, project_id: str = None):
+def list_transactions(request, response: HttpResponse, status: str = None, project_id: str = None,
+                      transaction_type: str = None, start_date: date = None, end_date: date = None,
+                      min_amount: Decimal = None, max_amount: Decimal = None,
+                      cursor: str = None, page_size: int = None):
     """
-    List all transactions with optional filters
-    Admin/Sales only
+    List transactions with optional filters, newest first
+    Admin/Sales only. Every row unless page_size or cursor is given; then
+    keyset-paginated: pass the X-Next-Cursor response header back as
+    ?cursor= to get the next page (X-Has-More says if any)
     """
     user = request.auth
     if user.role not in ['admin', 'sales']:
         raise HttpError(403, "Admin/Sales only")
 
-    transactions = Transaction.objects.select_related(
-        'project', 'customer', 'processed_by'
-    ).all()
+    transactions = filter_transactions(
+        Transaction.objects.select_related('project', 'customer', 'processed_by'),
+        status=status, transaction_type=transaction_type, project_id=project_id,
+        start_date=start_date, end_date=end_date, min_amount=min_amount, max_amount=max_amount
+    )
 
-    # Apply filters
-    if status:
-        transactions = transactions.filter(status=status)
-    if project_id:
-        transactions = transactions.filter(project_id=project_id)
+    page = transaction_paginator.paginate(transactions, cursor=cursor, page_size=page_size)
+    transaction_paginator.set_headers(response, page)
 
-    return [serialize_transaction(t) for t in transactions]
+    return [serialize_transaction(t) for t in page['items']]
 
 
-@router.get("/transactions/{transaction_id}", auth=auth_bearer)
-def get_transaction(request, transaction_id: str):
-    """Get single transaction details"""
+def filter_transactions(queryset, status: str = None, transaction_type: str = None, project_id: str = None,
+                        start_date: date = None, end_date: date = None,
+                        min_amount: Decimal = None, max_amount: Decimal = None):
+    """Apply the common transaction filters; dates are inclusive local days on created_at"""
+    if status:
+        queryset = queryset.filter(status=status)
+    if transaction_type:
+        queryset = queryset.filter(transaction_type=transaction_type)
+    if project_id:
+        queryset = queryset.filter(project_id=project_id)
+    if start_date:
+        queryset = queryset.filter(created_at__gte=local_day_bounds(start_date, start_date)[0])
+    if end_date:
+        queryset = queryset.filter(created_at__lt=local_day_bounds(end_date, end_date)[1])
+    if min_amount is not None:
+        queryset = queryset.filter(amount__gte=min_amount)
+    if max_amount is not None:
+        queryset = queryset.filter(amount__lte=max_amount)
+    return queryset
+
+
+EXPORT_COLUMNS = [
+    'transaction_id', 'created_at', 'completed_at', 'project_id', 'project_name',
+    'customer_company', 'customer_name', 'customer_email', 'transaction_type', 'status',
+    'amount', 'phase_index', 'phase_name', 'payment_method', 'transaction_reference',
+    'description', 'processed_by',
+]
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def iter_transaction_rows(transactions):
+    """Export rows; every column comes from the select_related join"""
+    for t in transactions.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            str(t.id), t.created_at, t.completed_at, str(t.project_id), t.project.name,
+            t.project.customer.company_name, t.customer.full_name, t.customer.email,
+            t.transaction_type, t.status, t.amount, t.phase_index, t.phase_name,
+            t.payment_method, t.transaction_reference, t.description,
+            t.processed_by.full_name if t.processed_by else None,
+        ]
+
+
+@router.get("/transactions/export", auth=auth_bearer)
+def export_transactions(request, format: str = 'csv', status: str = None, transaction_type: str = None,
+                        project_id: str = None, start_date: date = None, end_date: date = None):
+    """
+    Export transactions as a streamed CSV or XLSX file
+    Admin/Sales only. Same filters as the list plus a created_at date range
+    """
     user = request.auth
-    transaction = get_object_or_404(Transaction, id=transaction_id)
+    if user.role not in ['admin', 'sales']:
+        raise HttpError(403, "Admin/Sales only")
 
-    # Check permissions
-    if user.role == 'customer':
-        if transaction.customer != user:
-            raise HttpError(403, "Not authorized")
+    if format not in EXPORT_FORMATS:
+        raise HttpError(400, f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}")
 
-    return serialize_transaction(transaction)
+    transactions = filter_transactions(
+        Transaction.objects.select_related('project__customer', 'customer', 'processed_by'),
+        status=status, transaction_type=transaction_type, project_id=project_id,
+        start_date=start_date, end_date=end_date
+    ).order_by('created_at', 'id')
+
+    filename = f"transactions-{timezone.localdate().isoformat()}"
+    return streaming_export(format, filename, EXPORT_COLUMNS, iter_transaction_rows(transactions), request=request)
 
 
 @router.post("/transactions/manual", auth=auth_bearer)
+@idempotent
 def create_manual_transaction(request, payload: TransactionCreate):
     """
     Create manual transaction (admin only)
@@ -127,20 +205,57 @@ def create_manual_transaction(request, payload: TransactionCreate):
     proposal = Proposal.objects.filter(project=project, status='accepted').first()
 
     # Create transaction
-    transaction = Transaction.objects.create(
-        project=project,
-        proposal=proposal,
-        customer=project.customer.user,
-        transaction_type=payload.transaction_type,
-        status=TransactionStatus.COMPLETED,  # Manual transactions are immediately completed
-        amount=Decimal(str(payload.amount)),
-        phase_index=payload.phase_index,
-        payment_method=payload.payment_method,
-        transaction_reference=payload.transaction_reference,
-        description=payload.description,
-        completed_at=timezone.now(),
-        processed_by=user
-    )
+    try:
+        with db_transaction.atomic():
+            transaction = Transaction.objects.create(
+                project=project,
+                proposal=proposal,
+                customer=project.customer.user,
+                transaction_type=payload.transaction_type,
+                status=TransactionStatus.COMPLETED,  # Manual transactions are immediately completed
+                amount=Decimal(str(payload.amount)),
+                phase_index=payload.phase_index,
+                payment_method=payload.payment_method,
+                transaction_reference=payload.transaction_reference,
+                description=payload.description,
+                completed_at=timezone.now(),
+                processed_by=user
+            )
+    except IntegrityError:
+        raise HttpError(409, "A completed payment is already recorded for this deposit/phase")
+
+    return serialize_transaction(transaction)
+
+
+@router.post("/transactions/import", auth=auth_bearer)
+def import_bank_statement(request, file: UploadedFile = File(...), dry_run: bool = False):
+    """
+    Reconcile a bank statement CSV (admin only)
+    Lines are matched to pending transactions by reference, then to pending
+    transactions and unpaid phases by customer and exact amount. Matches are
+    settled in one database transaction; unmatched lines come back in the
+    report. dry_run=true only reports.
+    """
+    user = request.auth
+    if user.role != 'admin':
+        raise HttpError(403, "Admin only")
+
+    try:
+        return BankReconciliationService.reconcile(iter_statement_lines(file), processed_by=user, dry_run=dry_run)
+    except (StatementError, UnicodeDecodeError) as exc:
+        raise HttpError(400, f"Invalid bank statement: {exc}")
+
+
+@router.get("/transactions/{transaction_id}", auth=auth_bearer)
+def get_transaction(request, transaction_id: str):
+    """Get single transaction details"""
+    user = request.auth
+    transaction = get_object_or_404(Transaction, id=transaction_id)
+
+    # Check permissions
+    if user.role == 'customer':
+        if transaction.customer != user:
+            raise HttpError(403, "Not authorized")
 
     return serialize_transaction(transaction)
 
@@ -160,7 +275,11 @@ def approve_transaction(request, transaction_id: str):
     if transaction.status != TransactionStatus.PENDING:
         raise HttpError(400, f"Transaction is already {transaction.status}")
 
-    transaction.mark_completed(processed_by=user)
+    try:
+        with db_transaction.atomic():
+            transaction.mark_completed(processed_by=user)
+    except IntegrityError:
+        raise HttpError(409, "A completed payment is already recorded for this deposit/phase")
 
     return serialize_transaction(transaction)
 
@@ -190,24 +309,33 @@ def reject_transaction(request, transaction_id: str, reason: str = None):
 
 
 @router.get("/projects/{project_id}/transactions", auth=auth_bearer)
-def get_project_transactions(request, project_id: str):
+def get_project_transactions(request, project_id: str, response: HttpResponse,
+                             status: str = None, transaction_type: str = None,
+                             start_date: date = None, end_date: date = None,
+                             min_amount: Decimal = None, max_amount: Decimal = None,
+                             cursor: str = None, page_size: int = None):
     """
-    Get all transactions for a specific project
-    Shows payment history timeline
+    Get transactions for a specific project, newest first
+    Shows payment history timeline; keyset-paginated like /transactions
     """
     user = request.auth
-    project = get_object_or_404(Project, id=project_id)
+    project = project_policy.get_or_403(
+        Project.objects.select_related('customer__user'), user, "Not authorized", id=project_id
+    )
 
-    # Check permissions
-    if user.role == 'customer':
-        if project.customer.user != user:
-            raise HttpError(403, "Not authorized")
+    transactions = filter_transactions(
+        Transaction.objects.filter(project=project).select_related('customer', 'processed_by'),
+        status=status, transaction_type=transaction_type,
+        start_date=start_date, end_date=end_date, min_amount=min_amount, max_amount=max_amount
+    )
 
-    transactions = Transaction.objects.filter(
-        project=project
-    ).select_related('customer', 'processed_by').order_by('-created_at')
+    page = transaction_paginator.paginate(transactions, cursor=cursor, page_size=page_size)
+    transaction_paginator.set_headers(response, page)
 
-    return [serialize_transaction(t) for t in transactions]
+    # Every row belongs to the project fetched above
+    for t in page['items']:
+        t.project = project
+    return [serialize_transaction(t) for t in page['items']]
 
 
 @router.get("/projects/{project_id}/financial-summary", auth=auth_bearer)
@@ -217,46 +345,42 @@ def get_project_financial_summary(request, project_id: str):
     Includes all transactions, phases, deposits
     """
     user = request.auth
-    project = get_object_or_404(Project, id=project_id)
-
-    # Check permissions
-    if user.role == 'customer':
-        if project.customer.user != user:
-            raise HttpError(403, "Not authorized")
+    project = project_policy.get_or_403(
+        Project.objects.select_related('customer__user'), user, "Not authorized", id=project_id
+    )
 
     # Get proposal
     proposal = Proposal.objects.filter(project=project, status='accepted').first()
 
-    # Get all transactions
     transactions = Transaction.objects.filter(project=project)
-    completed_transactions = transactions.filter(status=TransactionStatus.COMPLETED)
 
-    # Calculate totals
-    total_received = sum(t.amount for t in completed_transactions if t.transaction_type in ['deposit', 'phase'])
-    total_refunded = sum(t.amount for t in completed_transactions if t.transaction_type == 'refund')
-    net_received = total_received - total_refunded
+    # Totals are the project's running ledger balance (one row)
+    balance = LedgerService.project_balance(project.id)
+    total_received = balance.received
+    total_refunded = balance.refunded
+    net_received = balance.net_received
 
-    # Phase breakdown
+    # Phase breakdown: paid amount and transaction count per phase in one query
     phase_details = []
-    if proposal and proposal.phases:
-        for i, phase in enumerate(proposal.phases):
-            phase_transactions = transactions.filter(
-                transaction_type='phase',
-                phase_index=i
-            )
-            phase_paid = sum(
-                t.amount for t in phase_transactions
-                if t.status == TransactionStatus.COMPLETED
+    if proposal:
+        phase_transactions = {
+            row['phase_index']: row
+            for row in transactions.filter(transaction_type='phase').order_by().values('phase_index').annotate(
+                paid=Sum('amount', filter=Q(status=TransactionStatus.COMPLETED), default=Decimal('0')),
+                count=Count('id')
             )
+        }
+        for phase in proposal.phase_items.all():
+            phase_totals = phase_transactions.get(phase.index, {})
 
             phase_details.append({
-                'phase_index': i,
-                'phase_name': phase.get('name'),
-                'phase_amount': float(phase.get('amount', 0)),
-                'paid_amount': float(phase_paid),
-                'completed': phase.get('completed', False),
-                'payment_approved': phase.get('payment_approved', False),
-                'transaction_count': phase_transactions.count()
+                'phase_index': phase.index,
+                'phase_name': phase.name,
+                'phase_amount': float(phase.amount),
+                'paid_amount': float(phase_totals.get('paid', 0)),
+                'completed': phase.completed,
+                'payment_approved': phase.payment_approved,
+                'transaction_count': phase_totals.get('count', 0)
             })
 
     return {
@@ -273,7 +397,8 @@ def get_project_financial_summary(request, project_id: str):
             'total_received': float(total_received),
             'total_refunded': float(total_refunded),
             'net_received': float(net_received),
-            'pending_amount': float(proposal.total_price - net_received) if proposal else 0
+            'pending_amount': float(proposal.total_price - net_received) if proposal else 0,
+            'awaiting_confirmation': float(balance.pending)
         },
         'deposit': {
             'amount': float(proposal.deposit_amount) if proposal else 0,
@@ -281,10 +406,10 @@ def get_project_financial_summary(request, project_id: str):
             'paid_at': proposal.deposit_paid_at.isoformat() if proposal and proposal.deposit_paid_at else None
         },
         'phases': phase_details,
-        'transaction_summary': {
-            'total_transactions': transactions.count(),
-            'completed': completed_transactions.count(),
-            'pending': transactions.filter(status=TransactionStatus.PENDING).count(),
-            'failed': transactions.filter(status=TransactionStatus.FAILED).count()
-        }
+        'transaction_summary': transactions.order_by().aggregate(
+            total_transactions=Count('id'),
+            completed=Count('id', filter=Q(status=TransactionStatus.COMPLETED)),
+            pending=Count('id', filter=Q(status=TransactionStatus.PENDING)),
+            failed=Count('id', filter=Q(status=TransactionStatus.FAILED))
+        )
     }
@@ -1,10 +1,10 @@
 """
 Project schemas for API
 """
-from typing import Optional, List
+from typing import Literal, Optional, List
 from uuid import UUID
 from datetime import datetime, date
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, AliasPath, BaseModel, Field
 
 
 # User info schema (simplified)
@@ -22,11 +22,13 @@ class UserInfo(BaseModel):
 class CustomerInfo(BaseModel):
     id: UUID
     company_name: Optional[str] = None
-    user_email: str  # From user.email
-    user_name: str   # From user.full_name
+    # Read from customer.user when validating a Customer, or given directly
+    user_email: str = Field(validation_alias=AliasChoices('user_email', AliasPath('user', 'email')))
+    user_name: str = Field(validation_alias=AliasChoices('user_name', AliasPath('user', 'full_name')))
 
     class Config:
-        from_attributes = False  # We'll serialize manually
+        from_attributes = True
+        populate_by_name = True
 
 
 # Project schemas
@@ -68,7 +70,34 @@ class ProjectOut(BaseModel):
         from_attributes = True
 
 
+class ProjectInboxOut(BaseModel):
+    """Schema for one project in the chat inbox"""
+    id: UUID
+    name: str
+    status: str
+    last_message_at: datetime
+    last_message_preview: str
+    message_count: int
+    unread: int
+
+    class Config:
+        from_attributes = True
+
+
 # Chat schemas
+class ChatAttachmentOut(BaseModel):
+    """Schema for an uploaded chat file"""
+    id: UUID
+    filename: str
+    content_type: str
+    size: int
+    url: str
+    thumbnail_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
 class ChatMessageOut(BaseModel):
     """Schema for chat message output"""
     id: UUID
@@ -77,6 +106,7 @@ class ChatMessageOut(BaseModel):
     message: str
     message_type: str
     attachments: List[str] = []
+    files: List[ChatAttachmentOut] = []
     is_read: bool
     read_at: Optional[datetime] = None
     created_at: datetime
@@ -85,8 +115,75 @@ class ChatMessageOut(BaseModel):
         from_attributes = True
 
 
+class ChatSearchResultOut(BaseModel):
+    """Schema for a chat search hit; snippet is HTML with <mark> around matches"""
+    id: UUID
+    project_id: UUID
+    project_name: str
+    sender: UserInfo
+    message: str
+    snippet: str
+    rank: float
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class ChatMessageCreate(BaseModel):
     """Schema for creating chat message"""
     message: str = Field(..., min_length=1)
     message_type: Optional[str] = 'text'
     attachments: Optional[List[str]] = []
+    attachment_ids: List[UUID] = Field(default=[], max_length=20, description="Completed uploads to attach")
+
+
+class ChatUploadStart(BaseModel):
+    """Schema for starting a resumable upload"""
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., ge=0)
+    content_type: Optional[str] = Field(None, max_length=100)
+    sha256: Optional[str] = Field(None, pattern=r'^[0-9a-fA-F]{64}$', description="Lets an already stored file complete without sending it")
+
+
+class ChatUploadOut(BaseModel):
+    """Schema for an upload session; send the next chunk at offset=received"""
+    id: UUID
+    filename: str
+    size: int
+    received: int
+    status: str
+    expires_at: datetime
+    attachment: Optional[ChatAttachmentOut] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ChatReadUpTo(BaseModel):
+    """Schema for marking a chat read up to a message"""
+    up_to: UUID
+
+
+class ChatTyping(BaseModel):
+    """Schema for a typing indicator update"""
+    typing: bool = True
+
+
+class ChatPresenceOut(BaseModel):
+    """Schema for one chat member's presence"""
+    user_id: UUID
+    online: bool
+    last_seen: Optional[datetime] = None
+    typing: bool
+
+
+class LinkTicketIn(BaseModel):
+    """Schema for requesting a ?ticket= credential"""
+    purpose: Literal['events', 'files']
+
+
+class LinkTicketOut(BaseModel):
+    """Schema for an issued link ticket"""
+    ticket: str
+    expires_in: int
@@ -0,0 +1,388 @@
+"""
+Bank reconciliation service
+Matches bank statement CSV lines to pending transactions and unpaid
+proposal phases, and settles the matches in bulk
+"""
+import codecs
+import csv
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.projects.models import (
+    Project,
+    ProjectStatus,
+    Proposal,
+    ProposalPhase,
+    ProposalStatus,
+    Transaction,
+    TransactionStatus,
+    TransactionType,
+)
+from apps.projects.models.transaction import UNIQUE_PAYMENT_TYPES
+from apps.projects.services.finance_aggregate_service import FinanceAggregateService
+from apps.projects.services.customer_leaderboard import customer_leaderboard
+from apps.projects.services.ledger_service import LedgerService
+
+# Accepted header names per statement column (lower-cased, English/Vietnamese)
+COLUMN_ALIASES = {
+    'reference': ['reference', 'transaction_reference', 'ref', 'ma_gd', 'ma giao dich', 'mã giao dịch'],
+    'amount': ['amount', 'credit', 'so_tien', 'so tien', 'số tiền', 'ghi có'],
+    'date': ['date', 'transaction_date', 'value_date', 'ngay', 'ngày', 'ngày giao dịch'],
+    'customer': ['customer', 'payer', 'account_name', 'nguoi_chuyen', 'người chuyển'],
+    'description': ['description', 'content', 'details', 'noi_dung', 'nội dung'],
+}
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M']
+
+BULK_BATCH_SIZE = 500
+
+_TOKEN_SPLIT = re.compile(r'[^0-9A-Za-z_-]+')
+_DECIMAL_TAIL = re.compile(r'[.,]\d{1,2}$')
+
+
+class StatementError(ValueError):
+    """The uploaded file is not a usable bank statement"""
+
+
+def _normalize(value) -> str:
+    return ' '.join(str(value or '').split()).lower()
+
+
+def parse_amount(value) -> Optional[Decimal]:
+    """Statement amount in whole VND; accepts 1,000,000 / 1.000.000 / 1000000.00"""
+    text = re.sub(r'[^0-9,.\-]', '', str(value or ''))
+    text = _DECIMAL_TAIL.sub('', text)
+    text = text.replace(',', '').replace('.', '')
+    if not text or text == '-':
+        return None
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        return None
+
+
+def parse_date(value) -> Optional[datetime]:
+    text = str(value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return timezone.make_aware(datetime.strptime(text, fmt))
+        except ValueError:
+            continue
+    return None
+
+
+def iter_statement_lines(uploaded) -> Iterator[dict]:
+    """
+    Statement lines from an uploaded CSV, read one line at a time
+    Each line is a dict of line number, reference, amount, date, customer,
+    description (None where the column is missing or unparsable).
+    """
+    reader = csv.reader(codecs.iterdecode(uploaded, 'utf-8-sig'))
+    header = next(reader, None)
+    if not header:
+        raise StatementError("Statement file is empty")
+
+    names = [_normalize(name) for name in header]
+    columns = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                columns[column] = names.index(alias)
+                break
+    if 'amount' not in columns:
+        raise StatementError(f"Statement has no amount column (expected one of: {', '.join(COLUMN_ALIASES['amount'])})")
+
+    def cell(row, column):
+        position = columns.get(column)
+        if position is None or position >= len(row):
+            return None
+        return row[position].strip() or None
+
+    for line_number, row in enumerate(reader, start=2):
+        if not any(value.strip() for value in row):
+            continue
+        yield {
+            'line': line_number,
+            'reference': cell(row, 'reference'),
+            'amount': parse_amount(cell(row, 'amount')),
+            'date': parse_date(cell(row, 'date')),
+            'customer': cell(row, 'customer'),
+            'description': cell(row, 'description'),
+        }
+
+
+def _customer_keys(user, customer) -> List[str]:
+    keys = []
+    if user is not None:
+        keys += [user.email, user.full_name]
+    if customer is not None:
+        keys += [customer.company_name, customer.tax_id]
+    return [key for key in (_normalize(k) for k in keys) if key]
+
+
+class ReconciliationBatch:
+    """
+    In-memory hash indexes over everything a statement line can settle
+
+    Built with two queries before the file is read: pending transactions
+    keyed by reference and by (customer, amount), and unpaid completed
+    phases keyed by (customer, amount). Each candidate is claimed at most
+    once per batch.
+    """
+
+    def __init__(self):
+        self.by_reference: Dict[str, List[Transaction]] = {}
+        self.by_customer_amount: Dict[Tuple[str, Decimal], List[Tuple[str, object]]] = {}
+        self.phase_by_position: Dict[Tuple[object, int], ProposalPhase] = {}
+        self.claimed = set()
+        self._load()
+
+    def _load(self):
+        completed_payment = Transaction.objects.annotate(
+            position=Coalesce('phase_index', Value(-1))
+        ).filter(
+            project=OuterRef('project'),
+            proposal=OuterRef('proposal'),
+            transaction_type=OuterRef('transaction_type'),
+            position=Coalesce(OuterRef('phase_index'), Value(-1)),
+            status=TransactionStatus.COMPLETED,
+        )
+        pending = Transaction.objects.filter(
+            status=TransactionStatus.PENDING
+        ).exclude(
+            # Completing these would break uniq_completed_payment
+            Exists(completed_payment), transaction_type__in=UNIQUE_PAYMENT_TYPES
+        ).select_related('customer', 'project__customer').order_by('created_at', 'id')
+
+        pending_phase_positions = set()
+        for txn in pending.iterator():
+            if txn.transaction_reference:
+                self.by_reference.setdefault(_normalize(txn.transaction_reference), []).append(txn)
+            for key in _customer_keys(txn.customer, txn.project.customer):
+                self.by_customer_amount.setdefault((key, txn.amount), []).append(('transaction', txn))
+            if txn.transaction_type == TransactionType.PHASE and txn.phase_index is not None:
+                pending_phase_positions.add((txn.proposal_id, txn.phase_index))
+
+        paid_phase = Transaction.objects.filter(
+            proposal=OuterRef('proposal'),
+            phase_index=OuterRef('index'),
+            transaction_type=TransactionType.PHASE,
+            status=TransactionStatus.COMPLETED,
+        )
+        phases = ProposalPhase.objects.filter(
+            payment_approved=False,
+            completed=True,
+            proposal__status=ProposalStatus.ACCEPTED,
+        ).exclude(
+            Exists(paid_phase)
+        ).select_related('proposal__project__customer__user').order_by('proposal__created_at', 'index')
+
+        for phase in phases.iterator():
+            position = (phase.proposal_id, phase.index)
+            self.phase_by_position[position] = phase
+            if position in pending_phase_positions:
+                continue  # Settled through its pending transaction
+            customer = phase.proposal.project.customer
+            amount = phase.amount.quantize(Decimal('1'))
+            for key in _customer_keys(customer.user if customer else None, customer):
+                self.by_customer_amount.setdefault((key, amount), []).append(('phase', phase))
+
+    def _take(self, candidates) -> Optional[Tuple[str, object]]:
+        for kind, candidate in candidates:
+            if (kind, candidate.pk) not in self.claimed:
+                self.claimed.add((kind, candidate.pk))
+                return kind, candidate
+        return None
+
+    def match(self, line) -> Tuple[Optional[Tuple[str, object]], Optional[str]]:
+        """(kind, candidate) for the line, or (None, reason)"""
+        amount = line['amount']
+        if amount is None:
+            return None, 'Invalid amount'
+        if amount <= 0:
+            return None, 'Not a credit'
+
+        # 1. Reference, either in its own column or typed into the transfer content
+        references = [line['reference']] if line['reference'] else []
+        references += [token for token in _TOKEN_SPLIT.split(line['description'] or '') if len(token) >= 4]
+        reference_mismatch = None
+        for reference in references:
+            candidates = self.by_reference.get(_normalize(reference), [])
+            same_amount = [('transaction', txn) for txn in candidates if txn.amount == amount]
+            found = self._take(same_amount)
+            if found:
+                return found, None
+            if candidates:
+                reference_mismatch = reference
+
+        # 2. Customer and exact amount
+        customer = _normalize(line['customer'])
+        if customer:
+            found = self._take(self.by_customer_amount.get((customer, amount), []))
+            if found:
+                return found, None
+
+        if reference_mismatch:
+            return None, f'Amount does not match pending transaction {reference_mismatch}'
+        return None, 'No pending transaction or unpaid phase matches'
+
+
+class BankReconciliationService:
+    """Bulk bank statement import"""
+
+    @staticmethod
+    def reconcile(lines: Iterable[dict], processed_by, dry_run: bool = False) -> dict:
+        """
+        Match statement lines and (unless dry_run) settle the matches
+        All writes happen in one transaction with bulk_update/bulk_create;
+        re-importing a statement is harmless because settled items are no
+        longer candidates.
+        """
+        batch = ReconciliationBatch()
+        matched, unmatched = [], []
+        total = 0
+
+        for line in lines:
+            total += 1
+            found, reason = batch.match(line)
+            if found is None:
+                unmatched.append({
+                    'line': line['line'],
+                    'reference': line['reference'],
+                    'amount': float(line['amount']) if line['amount'] is not None else None,
+                    'customer': line['customer'],
+                    'description': line['description'],
+                    'reason': reason,
+                })
+            else:
+                matched.append((line, *found))
+
+        if matched and not dry_run:
+            BankReconciliationService._apply(batch, matched, processed_by)
+
+        return {
+            'dry_run': dry_run,
+            'total_lines': total,
+            'matched_count': len(matched),
+            'unmatched_count': len(unmatched),
+            'matched': [
+                {
+                    'line': line['line'],
+                    'reference': line['reference'],
+                    'amount': float(line['amount']),
+                    'match_type': kind,
+                    'transaction_id': str(item.id) if kind == 'transaction' else None,
+                    'project_id': str(item.project_id if kind == 'transaction' else item.proposal.project_id),
+                    'phase_index': item.phase_index if kind == 'transaction' else item.index,
+                }
+                for line, kind, item in matched
+            ],
+            'unmatched': unmatched,
+        }
+
+    @staticmethod
+    def _apply(batch: ReconciliationBatch, matched, processed_by) -> None:
+        now = timezone.now()
+        settled_transactions, approved_phases, new_transactions = [], [], []
+
+        def approve_phase(phase, line):
+            paid_at = line['date'] or now
+            phase.payment_submitted = True
+            phase.payment_submitted_at = phase.payment_submitted_at or paid_at
+            phase.payment_approved = True
+            phase.payment_approved_at = paid_at
+            phase.payment_approved_by = str(processed_by.id)
+            phase.payment_proof = {
+                **(phase.payment_proof or {}),
+                'approved_by': str(processed_by.id),
+                'approved_at': now.isoformat(),
+                'approved_by_name': processed_by.full_name,
+                'amount': str(line['amount']),
+                'reference': line['reference'],
+                'method': 'bank_transfer',
+                'status': 'approved',
+                'source': 'bank_import',
+            }
+            phase.updated_at = now
+            approved_phases.append(phase)
+
+        for line, kind, item in matched:
+            bank_line = {
+                'line': line['line'],
+                'reference': line['reference'],
+                'description': line['description'],
+                'imported_at': now.isoformat(),
+            }
+            if kind == 'transaction':
+                item.status = TransactionStatus.COMPLETED
+                item.completed_at = line['date'] or now
+                item.processed_by = processed_by
+                item.transaction_reference = item.transaction_reference or line['reference']
+                item.metadata = {**(item.metadata or {}), 'bank_import': bank_line}
+                item.updated_at = now
+                settled_transactions.append(item)
+
+                phase = batch.phase_by_position.get((item.proposal_id, item.phase_index))
+                if item.transaction_type == TransactionType.PHASE and phase is not None:
+                    approve_phase(phase, line)
+            else:
+                approve_phase(item, line)
+                project = item.proposal.project
+                new_transactions.append(Transaction(
+                    project=project,
+                    proposal=item.proposal,
+                    customer=project.customer.user,
+                    transaction_type=TransactionType.PHASE,
+                    status=TransactionStatus.COMPLETED,
+                    amount=line['amount'],
+                    phase_index=item.index,
+                    phase_name=item.name,
+                    payment_method='bank_transfer',
+                    transaction_reference=line['reference'],
+                    description=f"Phase {item.index + 1} payment reconciled from bank statement",
+                    completed_at=line['date'] or now,
+                    processed_by=processed_by,
+                    metadata={'source': 'bank_import', 'bank_import': bank_line},
+                ))
+
+        with transaction.atomic():
+            Transaction.objects.bulk_update(
+                settled_transactions,
+                ['status', 'completed_at', 'processed_by', 'transaction_reference', 'metadata', 'updated_at'],
+                batch_size=BULK_BATCH_SIZE,
+            )
+            ProposalPhase.objects.bulk_update(
+                approved_phases,
+                ['payment_submitted', 'payment_submitted_at', 'payment_approved', 'payment_approved_at',
+                 'payment_approved_by', 'payment_proof', 'updated_at'],
+                batch_size=BULK_BATCH_SIZE,
+            )
+            Transaction.objects.bulk_create(new_transactions, batch_size=BULK_BATCH_SIZE)
+
+            # Projects whose last phase was just paid are complete (as in submit_phase_payment)
+            proposal_ids = {phase.proposal_id for phase in approved_phases}
+            unpaid = ProposalPhase.objects.filter(proposal=OuterRef('pk'), payment_approved=False)
+            finished_projects = Proposal.objects.filter(
+                id__in=proposal_ids
+            ).exclude(Exists(unpaid)).values('project_id')
+            Project.objects.filter(id__in=finished_projects).exclude(status=ProjectStatus.COMPLETED).update(
+                status=ProjectStatus.COMPLETED, end_date=now.date(), updated_at=now
+            )
+
+            # Bulk writes send no post_save: post to the ledger and refresh the aggregates the signals maintain
+            LedgerService.sync_transactions([*settled_transactions, *new_transactions])
+            project_ids = {txn.project_id for txn in settled_transactions}
+            project_ids |= {txn.project_id for txn in new_transactions}
+            for project_id in project_ids:
+                FinanceAggregateService.refresh_project(project_id)
+            customer_ids = set(Project.objects.filter(id__in=project_ids).values_list('customer_id', flat=True))
+
+            def refresh_leaderboard():
+                for customer_id in customer_ids:
+                    customer_leaderboard.refresh_customer(customer_id)
+            transaction.on_commit(refresh_leaderboard)
@@ -0,0 +1,121 @@
+"""
+Chat presence
+Online status, last-seen and typing indicators kept only in the shared
+cache (Redis) with TTLs; the database is never written for presence
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.core.cache import caches
+from apps.projects.models import ChatParticipant, Project
+
+
+class ChatPresence:
+    """
+    Keys in the 'default' cache:
+      chat:seen:<user>               last activity (epoch seconds)
+      chat:typing:<project>:<user>   typing expires at (epoch seconds, 0 = stopped)
+      chat:members:<project>         user ids allowed in the chat (participants + PM)
+
+    A user is online while last activity is within CHAT_PRESENCE_ONLINE_WINDOW
+    and typing until the stored expiry; every key expires on its own.
+
+    Writes are coalesced per process through the 'local' cache: repeating
+    the same state within CHAT_PRESENCE_WRITE_INTERVAL is dropped, so a
+    keystroke burst costs one shared write per interval. A change of state
+    (typing stopped) is always written.
+    """
+
+    def __init__(self, alias: str = 'default', local_alias: str = 'local'):
+        self.alias = alias
+        self.local_alias = local_alias
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @property
+    def local(self):
+        return caches[self.local_alias]
+
+    @staticmethod
+    def seen_key(user_id) -> str:
+        return f"chat:seen:{user_id}"
+
+    @staticmethod
+    def typing_key(project_id, user_id) -> str:
+        return f"chat:typing:{project_id}:{user_id}"
+
+    @staticmethod
+    def members_key(project_id) -> str:
+        return f"chat:members:{project_id}"
+
+    def _coalesced(self, key: str, state) -> bool:
+        """Whether this process wrote the same state for key within the interval"""
+        marker = f"presence-written:{key}"
+        if self.local.get(marker) == state:
+            return True
+        self.local.set(marker, state, settings.CHAT_PRESENCE_WRITE_INTERVAL)
+        return False
+
+    def members(self, project_id) -> List[str]:
+        """User ids that may use the project chat; loaded once per CHAT_MEMBERS_TTL"""
+        key = self.members_key(project_id)
+        members = self.shared.get(key)
+        if members is None:
+            participants = ChatParticipant.objects.filter(project_id=project_id).values_list('user_id', flat=True)
+            manager = Project.objects.filter(id=project_id).values_list('project_manager_id', flat=True)
+            members = sorted({str(user_id) for user_id in participants.union(manager) if user_id})
+            self.shared.set(key, members, settings.CHAT_MEMBERS_TTL)
+        return members
+
+    def forget_members(self, project_id) -> None:
+        self.shared.delete(self.members_key(project_id))
+
+    def can_access(self, project_id, principal) -> bool:
+        return principal.role == 'admin' or str(principal.id) in self.members(project_id)
+
+    def touch(self, user_id) -> bool:
+        """Record activity; returns whether it was written"""
+        key = self.seen_key(user_id)
+        if self._coalesced(key, True):
+            return False
+        self.shared.set(key, time.time(), settings.CHAT_LAST_SEEN_TTL)
+        return True
+
+    def set_typing(self, project_id, user_id, typing: bool) -> bool:
+        """Start or stop typing (also counts as activity); returns whether it was written"""
+        key = self.typing_key(project_id, user_id)
+        if self._coalesced(key, typing):
+            return False
+        now = time.time()
+        self.shared.set_many({
+            self.seen_key(user_id): now,
+            key: now + settings.CHAT_TYPING_TTL if typing else 0,
+        }, settings.CHAT_LAST_SEEN_TTL)
+        self._coalesced(self.seen_key(user_id), True)
+        return True
+
+    def project_presence(self, project_id, user_ids: Optional[List[str]] = None) -> List[Dict]:
+        """Presence of every member in one batched read"""
+        user_ids = user_ids if user_ids is not None else self.members(project_id)
+        keys = {}
+        for user_id in user_ids:
+            keys[user_id] = (self.seen_key(user_id), self.typing_key(project_id, user_id))
+        values = self.shared.get_many([key for pair in keys.values() for key in pair])
+
+        now = time.time()
+        presence = []
+        for user_id, (seen_key, typing_key) in keys.items():
+            seen = values.get(seen_key)
+            presence.append({
+                'user_id': user_id,
+                'online': seen is not None and now - seen <= settings.CHAT_PRESENCE_ONLINE_WINDOW,
+                'last_seen': datetime.fromtimestamp(seen, tz=dt_timezone.utc) if seen else None,
+                'typing': (values.get(typing_key) or 0) > now,
+            })
+        return presence
+
+
+chat_presence = ChatPresence()
@@ -0,0 +1,131 @@
+"""
+Chat search service
+Full-text search over project chat history: PostgreSQL tsvector with a GIN
+index, SQLite FTS5 for tests and local development
+"""
+import html
+import re
+from typing import List, Optional
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+from apps.projects.models import ChatMessage, ChatParticipant
+
+# Must match the trigger in migration 0024 ('simple': no stemming, suits Vietnamese)
+SEARCH_CONFIG = 'simple'
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Highlight markers: placed by the database, turned into <mark> after escaping
+START_SEL, STOP_SEL = '\x02', '\x03'
+
+
+def highlight(snippet: str) -> str:
+    """HTML-escape a snippet (messages are user text), then mark the hits"""
+    return html.escape(snippet).replace(START_SEL, '<mark>').replace(STOP_SEL, '</mark>')
+
+
+def fts5_query(text: str) -> str:
+    """Words of text as an FTS5 AND query; the last word also matches as a prefix"""
+    words = re.findall(r'\w+', text)
+    terms = [f'"{word}"' for word in words]
+    if terms:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def tsquery(text: str) -> str:
+    """The same query for to_tsquery: words ANDed, the last one with :* for prefix matching"""
+    words = re.findall(r'\w+', text)
+    terms = [f"'{word}'" for word in words]
+    if terms:
+        terms[-1] += ':*'
+    return ' & '.join(terms)
+
+
+class ChatSearchService:
+    """
+    Results are limited to projects where the user is a ChatParticipant,
+    best match first. Matching and ranking run against the index first and
+    only the returned page is loaded and highlighted, so the cost depends
+    on the number of matches in the user's projects, not on history size.
+    """
+
+    @staticmethod
+    def search(user_id, text: str, project_id=None, limit: Optional[int] = None) -> List[ChatMessage]:
+        """Matching messages with .rank and .snippet (HTML with <mark>) set"""
+        text = (text or '').strip()
+        limit = min(limit, MAX_LIMIT) if limit and limit > 0 else DEFAULT_LIMIT
+        if not text:
+            return []
+
+        projects = ChatParticipant.objects.filter(user_id=user_id)
+        if project_id is not None:
+            projects = projects.filter(project_id=project_id)
+        project_ids = list(projects.values_list('project_id', flat=True))
+        if not project_ids:
+            return []
+
+        if connection.vendor == 'postgresql':
+            hits = ChatSearchService._search_postgres(text, project_ids, limit)
+        elif connection.vendor == 'sqlite':
+            hits = ChatSearchService._search_sqlite(text, project_ids, limit)
+        else:
+            raise NotImplementedError(f"Chat search is not available on {connection.vendor}")
+
+        messages = ChatMessage.objects.select_related('sender', 'project').in_bulk([hit[0] for hit in hits])
+        results = []
+        for message_id, rank, snippet in hits:
+            message = messages.get(message_id)
+            if message is None:
+                continue
+            message.rank = rank
+            message.snippet = highlight(snippet)
+            message.project_name = message.project.name
+            results.append(message)
+        return results
+
+    @staticmethod
+    def _search_postgres(text: str, project_ids, limit: int) -> list:
+        raw = tsquery(text)
+        if not raw:
+            return []
+        query = SearchQuery(raw, config=SEARCH_CONFIG, search_type='raw')
+        ranked = list(
+            ChatMessage.objects.filter(project_id__in=project_ids, search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', '-created_at', '-id')
+            .values_list('id', 'rank')[:limit]
+        )
+        # Headlines re-parse the text, so only for the page returned
+        snippets = dict(
+            ChatMessage.objects.filter(id__in=[message_id for message_id, _ in ranked]).annotate(
+                snippet=SearchHeadline(
+                    'message', query, config=SEARCH_CONFIG, start_sel=START_SEL, stop_sel=STOP_SEL,
+                    max_words=24, min_words=8, max_fragments=2, fragment_delimiter=' … ',
+                )
+            ).values_list('id', 'snippet')
+        )
+        return [(message_id, rank, snippets.get(message_id, '')) for message_id, rank in ranked]
+
+    @staticmethod
+    def _search_sqlite(text: str, project_ids, limit: int) -> list:
+        match = fts5_query(text)
+        if not match:
+            return []
+        project_field = ChatMessage._meta.get_field('project').target_field
+        params = [project_field.get_db_prep_value(project_id, connection) for project_id in project_ids]
+        placeholders = ', '.join(['%s'] * len(params))
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT m.id, -bm25(chat_messages_fts), snippet(chat_messages_fts, 0, %s, %s, ' … ', 16)
+                FROM chat_messages_fts JOIN chat_messages m ON m.rowid = chat_messages_fts.rowid
+                WHERE chat_messages_fts MATCH %s AND m.project_id IN ({placeholders})
+                ORDER BY bm25(chat_messages_fts), m.created_at DESC
+                LIMIT %s
+            """, [START_SEL, STOP_SEL, match, *params, limit])
+            id_field = ChatMessage._meta.pk
+            return [
+                (id_field.to_python(message_id), rank, snippet)
+                for message_id, rank, snippet in cursor.fetchall()
+            ]
@@ -0,0 +1,165 @@
+"""
+Chat service
+Keyset reads of project chat history on (created_at, id) and read state
+derived from each participant's last_read_at
+"""
+from typing import Iterable, Optional
+from uuid import UUID
+from django.db import transaction
+from django.db import models
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from apps.projects.models import ChatMessage, ChatParticipant, Project
+from apps.projects.services.chat_unread_service import ChatUnreadCounters
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+PREVIEW_LENGTH = 200
+
+
+def preview(text: str) -> str:
+    """First line-collapsed PREVIEW_LENGTH characters of a message"""
+    text = ' '.join(text.split())
+    return text if len(text) <= PREVIEW_LENGTH else text[:PREVIEW_LENGTH - 1] + '…'
+
+
+class ChatService:
+    """
+    Messages are addressed by id: the client passes the id of the oldest
+    message it holds as before (scroll back) or of the newest as after
+    (fetch what is new). Both directions are range scans of the
+    (project_id, created_at, id) index, whatever the history length.
+    """
+
+    @staticmethod
+    def post(project, sender, message: str, message_type: str = ChatMessage.MessageType.TEXT,
+             attachments: Optional[list] = None) -> ChatMessage:
+        """
+        Create a message and bump the project's activity fields with it
+        Both happen in one transaction; the counter is incremented in the
+        UPDATE itself (F expression), so concurrent posts never lose a count
+        and an older message never overwrites a newer preview.
+        """
+        with transaction.atomic():
+            chat_message = ChatMessage.objects.create(
+                project=project,
+                sender=sender,
+                message=message,
+                message_type=message_type,
+                attachments=attachments or []
+            )
+            is_latest = Q(last_message_at__isnull=True) | Q(last_message_at__lte=chat_message.created_at)
+            Project.objects.filter(id=chat_message.project_id).update(
+                message_count=F('message_count') + 1,
+                last_message_at=Case(When(is_latest, then=Value(chat_message.created_at)), default=F('last_message_at')),
+                last_message_preview=Case(
+                    When(is_latest, then=Value(preview(message))), default=F('last_message_preview')
+                ),
+            )
+        return chat_message
+
+    @staticmethod
+    def forget(message: ChatMessage) -> None:
+        """
+        Take a deleted message out of its project's activity fields
+        The count is decremented in the UPDATE; the preview moves to the
+        newest remaining message only if the deleted one was the latest.
+        """
+        latest = ChatMessage.objects.filter(project_id=message.project_id).only(
+            'created_at', 'message'
+        ).order_by('-created_at', '-id').first()
+        was_latest = Q(last_message_at__lte=message.created_at)
+        Project.objects.filter(id=message.project_id).update(
+            message_count=F('message_count') - 1,
+            last_message_at=Case(
+                When(was_latest, then=Value(latest.created_at if latest else None, output_field=models.DateTimeField())),
+                default=F('last_message_at'),
+            ),
+            last_message_preview=Case(
+                When(was_latest, then=Value(preview(latest.message) if latest else '')),
+                default=F('last_message_preview'),
+            ),
+        )
+
+    @staticmethod
+    def anchor(project_id, message_id) -> Optional[ChatMessage]:
+        """(created_at, id) of a message in this project, or None"""
+        try:
+            return ChatMessage.objects.only('id', 'created_at').get(project_id=project_id, id=UUID(str(message_id)))
+        except (ChatMessage.DoesNotExist, ValueError):
+            return None
+
+    @staticmethod
+    def page(project_id, before: Optional[ChatMessage] = None, after: Optional[ChatMessage] = None,
+             limit: Optional[int] = None) -> dict:
+        """
+        Up to limit messages between the anchors, oldest first
+        With after, the page starts right after it (delta fetch); otherwise
+        it is the newest page before `before` (or overall). has_more says
+        whether messages remain further in the direction read.
+        """
+        limit = min(limit, MAX_PAGE_SIZE) if limit and limit > 0 else DEFAULT_PAGE_SIZE
+        queryset = ChatMessage.objects.filter(project_id=project_id).select_related('sender').prefetch_related(
+            'attachment_files__file'
+        )
+        if before is not None:
+            queryset = queryset.filter(
+                Q(created_at__lt=before.created_at) | Q(created_at=before.created_at, id__lt=before.id)
+            )
+        if after is not None:
+            queryset = queryset.filter(
+                Q(created_at__gt=after.created_at) | Q(created_at=after.created_at, id__gt=after.id)
+            )
+            messages = list(queryset.order_by('created_at', 'id')[:limit + 1])
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+        else:
+            messages = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+            has_more = len(messages) > limit
+            messages = messages[:limit][::-1]
+        return {'items': messages, 'has_more': has_more}
+
+    @staticmethod
+    def inbox(user_id):
+        """
+        The user's chats with at least one message, most recent first
+        Everything comes from the project row (denormalized activity) plus
+        a correlated unread count, so a page is one query however many
+        projects the user is in. Order by ('-last_message_at', '-id').
+        """
+        return Project.objects.filter(
+            chat_participants__user_id=user_id, last_message_at__isnull=False
+        ).only(
+            'id', 'name', 'status', 'last_message_at', 'last_message_preview', 'message_count'
+        ).annotate(
+            unread=ChatUnreadCounters.unread_expression(user_id, 'id', 'chat_participants__last_read_at')
+        )
+
+    @staticmethod
+    def read_up_to(project_id, user_id, message: ChatMessage) -> bool:
+        """
+        Mark everything up to message as read for one participant
+        A single UPDATE moving last_read_at forward to the message's
+        timestamp (never back). Returns whether it moved.
+        """
+        return ChatParticipant.objects.filter(project_id=project_id, user_id=user_id).filter(
+            Q(last_read_at__isnull=True) | Q(last_read_at__lt=message.created_at)
+        ).update(last_read_at=message.created_at, updated_at=timezone.now()) > 0
+
+    @staticmethod
+    def apply_read_state(project_id, viewer_id, messages: Iterable[ChatMessage]) -> None:
+        """
+        Set is_read/read_at on messages as seen by viewer, from last_read_at
+        Others' messages are read once the viewer's pointer passed them;
+        the viewer's own once any other participant's did. read_at is that
+        pointer, i.e. when the reader last caught up. One query.
+        """
+        pointers = dict(
+            ChatParticipant.objects.filter(project_id=project_id).values_list('user_id', 'last_read_at')
+        )
+        own = pointers.get(viewer_id)
+        others = max((read for user_id, read in pointers.items() if user_id != viewer_id and read), default=None)
+        for message in messages:
+            pointer = others if message.sender_id == viewer_id else own
+            message.is_read = pointer is not None and message.created_at <= pointer
+            message.read_at = pointer if message.is_read else None
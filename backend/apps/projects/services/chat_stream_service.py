@@ -0,0 +1,121 @@
+"""
+Chat stream service
+Pushes project chat messages to connected clients as Server-Sent Events
+"""
+import json
+from datetime import timedelta
+from typing import List, Optional, Tuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apps.projects.models import ChatMessage, ChatParticipant, Project
+from apps.projects.schemas.project_schema import ChatMessageOut
+from apps.projects.services.chat_service import ChatService
+from apps.projects.services.chat_presence_service import chat_presence
+from core.utils import pubsub
+
+
+def format_event(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    """One text/event-stream frame"""
+    lines = [f'id: {event_id}'] if event_id else []
+    lines += [f'event: {event}', f'data: {json.dumps(data)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+class ChatStreamService:
+    """
+    send_message publishes each new message to the project's channel after
+    commit; every node holding a stream for that project forwards it. The
+    event id is the message id, so a reconnecting EventSource sends it back
+    as Last-Event-ID and the missed messages are replayed from the database.
+    """
+
+    @staticmethod
+    def channel(project_id) -> str:
+        return f'chat:project:{project_id}'
+
+    @staticmethod
+    def can_access(project: Project, user) -> bool:
+        if user.role == 'admin' or project.project_manager_id == user.id:
+            return True
+        return ChatParticipant.objects.filter(project=project, user_id=user.id).exists()
+
+    @staticmethod
+    def serialize(message: ChatMessage) -> dict:
+        return ChatMessageOut.model_validate(message).model_dump(mode='json')
+
+    @staticmethod
+    def publish_message(message: ChatMessage) -> None:
+        """Publish once the message is committed, so a resume query always finds it"""
+        event = {'event': 'message', 'id': str(message.id), 'data': ChatStreamService.serialize(message)}
+        channel = ChatStreamService.channel(message.project_id)
+        transaction.on_commit(lambda: pubsub.publish(channel, event))
+
+    @staticmethod
+    def publish_read(project_id, user_id, message: ChatMessage) -> None:
+        """Read receipt; carries no event id, so it never becomes a resume point"""
+        event = {
+            'event': 'read',
+            'id': None,
+            'data': {'user_id': str(user_id), 'up_to': str(message.id), 'read_at': message.created_at.isoformat()},
+        }
+        channel = ChatStreamService.channel(project_id)
+        transaction.on_commit(lambda: pubsub.publish(channel, event))
+
+    @staticmethod
+    def publish_typing(project_id, user_id, typing: bool) -> None:
+        event = {'event': 'typing', 'id': None, 'data': {'user_id': str(user_id), 'typing': typing}}
+        pubsub.publish(ChatStreamService.channel(project_id), event)
+
+    @staticmethod
+    def messages_after(project_id, last_event_id, limit: int) -> Tuple[List[dict], bool]:
+        """
+        Messages posted after last_event_id, oldest first
+        Returns (messages, complete); when the id is unknown or more than
+        limit messages were missed nothing is returned and complete is False.
+        """
+        anchor = ChatService.anchor(project_id, last_event_id)
+        if anchor is None:
+            return [], False
+        page = ChatService.page(project_id, after=anchor, limit=limit)
+        if page['has_more']:
+            return [], False
+        return [ChatStreamService.serialize(message) for message in page['items']], True
+
+    @staticmethod
+    async def stream(project_id, last_event_id: Optional[str] = None, user_id=None):
+        """
+        text/event-stream body: replay after last_event_id, then live
+        message and read events
+        Subscribing before the replay query means nothing posted in between
+        is lost; anything seen twice is skipped. A 'reset' event tells the
+        client to reload the history over REST. The stream ends after
+        CHAT_STREAM_MAX_AGE so clients reconnect and re-authenticate.
+        While open it keeps user_id's presence online.
+        """
+        heartbeat = settings.CHAT_STREAM_HEARTBEAT
+        closes_at = timezone.now() + timedelta(seconds=settings.CHAT_STREAM_MAX_AGE)
+
+        async with pubsub.get_broker().subscribe(ChatStreamService.channel(project_id)) as subscription:
+            yield f'retry: {settings.CHAT_STREAM_RETRY_MS}\n\n'
+
+            sent = set()
+            if last_event_id:
+                messages, complete = await sync_to_async(ChatStreamService.messages_after)(
+                    project_id, last_event_id, settings.CHAT_STREAM_REPLAY_LIMIT
+                )
+                if not complete:
+                    yield format_event('reset', {})
+                for data in messages:
+                    sent.add(data['id'])
+                    yield format_event('message', data, data['id'])
+
+            while timezone.now() < closes_at:
+                if user_id is not None:
+                    await sync_to_async(chat_presence.touch)(user_id)
+                event = await subscription.get(timeout=heartbeat)
+                if event is None:
+                    yield ': keep-alive\n\n'
+                elif event['id'] not in sent:
+                    yield format_event(event['event'], event['data'], event['id'])
@@ -0,0 +1,152 @@
+"""
+Chat unread counters
+Unread message counts for every project a user takes part in, kept per
+user in a Redis hash so the sidebar costs one round trip
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from apps.projects.models import ChatMessage, ChatParticipant
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Counters change only in hashes that have been built (and, on reset, that hold the project)
+INCREMENT_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('HEXISTS', key, '_built') == 1 then
+        redis.call('HINCRBY', key, ARGV[1], 1)
+    end
+end
+"""
+SET_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+"""
+
+
+class ChatUnreadCounters:
+    """
+    Hash chat:unread:<user id> (field: project id, value: unread count)
+    plus a _built marker field.
+
+    A message increments the hash of every other participant; the sender's
+    own counter is reset, as is anyone's whose last_read_at moves. A hash
+    that does not exist yet is built from one query on first read and
+    expires after CHAT_UNREAD_TTL, which bounds any drift (e.g. deleted
+    messages). Without Redis (tests, local dev) every read runs the query.
+    """
+
+    key_prefix = 'chat:unread'
+
+    def _redis(self):
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection('default')
+        except (ImportError, NotImplementedError):
+            return None
+
+    def key(self, user_id) -> str:
+        return f"{self.key_prefix}:{user_id}"
+
+    @staticmethod
+    def unread_expression(user_id, project_ref: str = 'project_id', last_read_ref: str = 'last_read_at'):
+        """Correlated count of messages from others after the outer row's last_read_at"""
+        unread = ChatMessage.objects.filter(
+            project_id=OuterRef(project_ref),
+            created_at__gt=Coalesce(OuterRef(last_read_ref), Value(EPOCH)),
+        ).exclude(sender_id=user_id).order_by().values('project_id').annotate(count=Count('id')).values('count')
+        return Coalesce(Subquery(unread), 0)
+
+    @staticmethod
+    def unread_by_project(user_id, project_id=None) -> Dict[str, int]:
+        """
+        Unread count per project the user participates in, in one query
+        Each count is a correlated subquery over the (project_id,
+        created_at, id) index starting at the participant's last_read_at,
+        so already-read history is never scanned.
+        """
+        participants = ChatParticipant.objects.filter(user_id=user_id)
+        if project_id is not None:
+            participants = participants.filter(project_id=project_id)
+        rows = participants.annotate(
+            unread=ChatUnreadCounters.unread_expression(user_id)
+        ).values_list('project_id', 'unread')
+        return {str(project): count for project, count in rows}
+
+    def _build(self, redis, user_id) -> Dict[str, int]:
+        counts = self.unread_by_project(user_id)
+        key = self.key(user_id)
+        pipe = redis.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping={**counts, '_built': 1})
+        pipe.expire(key, settings.CHAT_UNREAD_TTL)
+        pipe.execute()
+        return counts
+
+    def counts(self, user_id) -> Dict[str, int]:
+        """Unread count per project id for one user"""
+        redis = self._redis()
+        if redis is not None:
+            try:
+                stored = redis.hgetall(self.key(user_id))
+                counts = {
+                    (field.decode() if isinstance(field, bytes) else field): int(value)
+                    for field, value in stored.items()
+                }
+                if counts.pop('_built', None) is None:
+                    counts = self._build(redis, user_id)
+                return counts
+            except Exception:
+                logger.exception("Unread counters read failed for %s, using database", user_id)
+        return self.unread_by_project(user_id)
+
+    def message_sent(self, message: ChatMessage) -> None:
+        """After commit: +1 for every other participant, reset for the sender"""
+        redis = self._redis()
+        if redis is None:
+            return
+        project_id, sender_id = message.project_id, message.sender_id
+
+        def apply():
+            recipients = ChatParticipant.objects.filter(project_id=project_id).exclude(
+                user_id=sender_id
+            ).values_list('user_id', flat=True)
+            try:
+                keys = [self.key(user_id) for user_id in recipients]
+                if keys:
+                    redis.register_script(INCREMENT_SCRIPT)(keys=keys, args=[str(project_id)])
+            except Exception:
+                logger.exception("Unread counters update failed for project %s", project_id)
+            self.mark_read(sender_id, project_id)
+
+        transaction.on_commit(apply)
+
+    def mark_read(self, user_id, project_id, unread: int = 0) -> None:
+        """The user's last_read_at for the project moved; unread messages remain after it"""
+        redis = self._redis()
+        if redis is None:
+            return
+        try:
+            redis.register_script(SET_SCRIPT)(keys=[self.key(user_id)], args=[str(project_id), unread])
+        except Exception:
+            logger.exception("Unread counter update failed for %s", user_id)
+
+    def invalidate(self, user_id) -> None:
+        """Rebuild on next read (participation added or removed)"""
+        redis = self._redis()
+        if redis is None:
+            return
+        try:
+            redis.delete(self.key(user_id))
+        except Exception:
+            logger.exception("Unread counters invalidation failed for %s", user_id)
+
+
+chat_unread_counters = ChatUnreadCounters()
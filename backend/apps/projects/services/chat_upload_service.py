@@ -0,0 +1,340 @@
+"""
+Chat upload service
+Resumable chunked uploads streamed to disk, stored once per SHA-256, with
+image thumbnails generated in the background
+"""
+import hashlib
+import io
+import logging
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from typing import BinaryIO, Optional
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from apps.projects.models import (
+    ChatAttachment,
+    ChatUpload,
+    StoredFile,
+    ThumbnailStatus,
+    UploadStatus,
+)
+from api.exceptions.base_exception import ConflictException, NotFoundException, ValidationException
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER = 64 * 1024
+
+
+def storage():
+    return storages['chat_attachments']
+
+
+def blob_name(digest: str) -> str:
+    return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(COPY_BUFFER), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChatUploadService:
+    """
+    Upload protocol:
+    1. start() opens a session for a declared size (and optional SHA-256;
+       a file already stored under it that the caller can read - in this
+       project's chat or uploaded by them - completes at once)
+    2. write_chunk() appends request bodies at offset == received; a
+       mismatched offset is a 409 and get() tells where to resume. The
+       offset is claimed and advanced in short statements; the row is not
+       locked while the body streams in
+    3. the chunk reaching size finalizes: the partial file is hashed from
+       disk and moved into storage unless the digest is already stored
+
+    Bodies are copied in 64 KiB blocks and hashing re-reads the file, so
+    memory stays flat whatever the file size.
+    """
+
+    @staticmethod
+    def temp_path(upload: ChatUpload) -> Path:
+        return Path(settings.CHAT_UPLOAD_TEMP_DIR) / f"{upload.id}.part"
+
+    @staticmethod
+    def start(project_id, user_id, filename: str, size: int, content_type: Optional[str] = None,
+              sha256: Optional[str] = None) -> ChatUpload:
+        if size < 0 or size > settings.CHAT_UPLOAD_MAX_SIZE:
+            raise ValidationException(f"File size must be between 0 and {settings.CHAT_UPLOAD_MAX_SIZE} bytes")
+        sha256 = (sha256 or '').lower()
+        upload = ChatUpload.objects.create(
+            project_id=project_id,
+            user_id=user_id,
+            filename=filename,
+            content_type=content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+            size=size,
+            sha256=sha256,
+            expires_at=timezone.now() + timedelta(seconds=settings.CHAT_UPLOAD_TTL),
+        )
+
+        stored = None
+        if sha256:
+            # Only content the caller can already read, so a digest seen
+            # elsewhere cannot be used to pull in another project's file
+            stored = StoredFile.objects.filter(
+                Q(attachments__project_id=project_id) | Q(attachments__uploaded_by_id=user_id),
+                sha256=sha256, size=size,
+            ).first()
+        if stored is not None:
+            ChatUploadService._complete(upload, stored)
+            return upload
+
+        path = ChatUploadService.temp_path(upload)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+        if size == 0:
+            ChatUploadService._finalize(upload)
+        return upload
+
+    @staticmethod
+    def get(project_id, upload_id, user_id) -> ChatUpload:
+        upload = ChatUpload.objects.select_related('attachment__file').filter(
+            id=upload_id, project_id=project_id, user_id=user_id
+        ).first()
+        if upload is None:
+            raise NotFoundException("Upload not found")
+        return upload
+
+    @staticmethod
+    def write_chunk(project_id, upload_id, user_id, offset: int, stream: BinaryIO, length: int) -> ChatUpload:
+        """Append length bytes read from stream at offset; finalizes on the last chunk"""
+        if length > settings.CHAT_UPLOAD_CHUNK_SIZE:
+            raise ValidationException(f"Chunks are limited to {settings.CHAT_UPLOAD_CHUNK_SIZE} bytes")
+
+        upload, claim = ChatUploadService._claim(project_id, upload_id, user_id, offset, length)
+        written = 0
+        try:
+            # No row lock is held while the body arrives; the claim keeps other writers out
+            with open(ChatUploadService.temp_path(upload), 'r+b') as fh:
+                fh.seek(offset)
+                while written < length:
+                    block = stream.read(min(COPY_BUFFER, length - written))
+                    if not block:
+                        break  # client went away; resume from what arrived
+                    fh.write(block)
+                    written += len(block)
+        finally:
+            upload = ChatUploadService._advance(upload, claim, offset, written)
+
+        if upload.received == upload.size:
+            ChatUploadService._finalize(upload)
+        return upload
+
+    @staticmethod
+    def _claim(project_id, upload_id, user_id, offset: int, length: int):
+        """(upload, claim) for writing length bytes at offset, in one conditional UPDATE"""
+        now = timezone.now()
+        claim = now + timedelta(seconds=settings.CHAT_UPLOAD_WRITE_TIMEOUT)
+        claimed = ChatUpload.objects.filter(
+            Q(writing_until__isnull=True) | Q(writing_until__lte=now),
+            id=upload_id, project_id=project_id, user_id=user_id,
+            status=UploadStatus.OPEN, expires_at__gt=now, received=offset, size__gte=offset + length,
+        ).update(writing_until=claim)
+
+        upload = ChatUpload.objects.filter(id=upload_id, project_id=project_id, user_id=user_id).first()
+        if upload is None:
+            raise NotFoundException("Upload not found")
+        if claimed:
+            return upload, claim
+        if upload.status != UploadStatus.OPEN:
+            raise ConflictException(f"Upload is {upload.status}")
+        if upload.expires_at <= now:
+            raise ConflictException("Upload expired")
+        if offset != upload.received:
+            raise ConflictException(f"Expected offset {upload.received}")
+        if offset + length > upload.size:
+            raise ValidationException("Chunk goes past the declared size")
+        raise ConflictException("Another chunk of this upload is being written")
+
+    @staticmethod
+    def _advance(upload: ChatUpload, claim, offset: int, written: int) -> ChatUpload:
+        """Move received past the written bytes and release the claim"""
+        with transaction.atomic():
+            upload = ChatUpload.objects.select_for_update().get(id=upload.id)
+            if upload.writing_until != claim or upload.received != offset:
+                # The claim lapsed and another writer took over; this chunk is dropped
+                raise ConflictException(f"Expected offset {upload.received}")
+            upload.received = offset + written
+            if upload.received < upload.size:
+                upload.writing_until = None  # kept through finalizing otherwise
+            with open(ChatUploadService.temp_path(upload), 'r+b') as fh:
+                fh.truncate(upload.received)
+            upload.save(update_fields=['received', 'writing_until', 'updated_at'])
+        return upload
+
+    @staticmethod
+    def _finalize(upload: ChatUpload) -> None:
+        path = ChatUploadService.temp_path(upload)
+        digest = file_digest(path)
+        if upload.sha256 and upload.sha256 != digest:
+            path.unlink(missing_ok=True)
+            upload.status = UploadStatus.FAILED
+            upload.writing_until = None
+            upload.save(update_fields=['status', 'writing_until', 'updated_at'])
+            return
+
+        stored = StoredFile.objects.filter(sha256=digest).first()
+        if stored is None:
+            name = blob_name(digest)
+            if not storage().exists(name):
+                with open(path, 'rb') as fh:
+                    name = storage().save(name, File(fh, name=name))
+            try:
+                with transaction.atomic():
+                    stored = StoredFile.objects.create(
+                        sha256=digest, size=upload.size, content_type=upload.content_type, name=name
+                    )
+            except IntegrityError:
+                # Same content finalized concurrently by another upload
+                stored = StoredFile.objects.get(sha256=digest)
+            else:
+                transaction.on_commit(lambda: thumbnails.schedule(stored.id))
+        path.unlink(missing_ok=True)
+        ChatUploadService._complete(upload, stored)
+
+    @staticmethod
+    def _complete(upload: ChatUpload, stored: StoredFile) -> None:
+        with transaction.atomic():
+            upload.attachment = ChatAttachment.objects.create(
+                project_id=upload.project_id, uploaded_by_id=upload.user_id, file=stored, filename=upload.filename
+            )
+            upload.sha256 = stored.sha256
+            upload.received = upload.size
+            upload.status = UploadStatus.COMPLETE
+            upload.writing_until = None
+            upload.save(update_fields=['attachment', 'sha256', 'received', 'status', 'writing_until', 'updated_at'])
+
+    @staticmethod
+    def attach(message, attachment_ids) -> None:
+        """Link the sender's unattached uploads in the message's project to it; all or none"""
+        attachment_ids = set(attachment_ids)
+        if not attachment_ids:
+            return
+        linked = ChatAttachment.objects.filter(
+            id__in=attachment_ids,
+            project_id=message.project_id,
+            uploaded_by_id=message.sender_id,
+            message__isnull=True,
+        ).update(message=message, updated_at=timezone.now())
+        if linked != len(attachment_ids):
+            raise ValidationException("Attachments must be your own completed uploads to this project, not yet sent")
+
+    @staticmethod
+    def purge_expired() -> int:
+        """Delete unfinished uploads past their TTL and their partial files"""
+        expired = ChatUpload.objects.filter(status=UploadStatus.OPEN, expires_at__lt=timezone.now())
+        count = 0
+        for upload in expired.iterator():
+            ChatUploadService.temp_path(upload).unlink(missing_ok=True)
+            count += 1
+        expired.delete()
+        return count
+
+
+class ThumbnailGenerator:
+    """
+    Thumbnails for image blobs, generated off the request thread
+
+    New blobs are queued on a small per-process thread pool after commit;
+    the process_chat_uploads command picks up anything still pending (e.g.
+    after a restart). Pillow is optional: without it images are skipped.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Created lazily so threads are started after gunicorn forks
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=settings.CHAT_THUMBNAIL_WORKERS,
+                        thread_name_prefix='chat-thumbnail'
+                    )
+        return self._executor
+
+    def schedule(self, stored_file_id) -> None:
+        if settings.CHAT_THUMBNAIL_WORKERS > 0:
+            self.executor.submit(self._run, stored_file_id)
+        else:
+            self.generate(stored_file_id)
+
+    def _run(self, stored_file_id) -> None:
+        try:
+            self.generate(stored_file_id)
+        except Exception:
+            logger.exception("Thumbnail generation failed for %s", stored_file_id)
+        finally:
+            close_old_connections()
+
+    def generate(self, stored_file_id) -> str:
+        """Generate one pending thumbnail; returns the resulting status"""
+        stored = StoredFile.objects.filter(id=stored_file_id, thumbnail_status=ThumbnailStatus.PENDING).first()
+        if stored is None:
+            return ''
+        status, name = ThumbnailStatus.SKIPPED, ''
+        if stored.content_type.startswith('image/'):
+            try:
+                name = self._render(stored)
+                status = ThumbnailStatus.DONE if name else ThumbnailStatus.SKIPPED
+            except Exception:
+                logger.warning("Cannot thumbnail %s", stored.sha256, exc_info=True)
+                status = ThumbnailStatus.FAILED
+        StoredFile.objects.filter(id=stored.id, thumbnail_status=ThumbnailStatus.PENDING).update(
+            thumbnail_status=status, thumbnail_name=name, updated_at=timezone.now()
+        )
+        return status
+
+    @staticmethod
+    def _render(stored: StoredFile) -> str:
+        try:
+            from PIL import Image
+        except ImportError:
+            return ''
+
+        name = f"thumbs/{stored.sha256[:2]}/{stored.sha256}.jpg"
+        if storage().exists(name):
+            return name
+        with storage().open(stored.name, 'rb') as fh:
+            image = Image.open(fh)
+            # Decode JPEGs at reduced scale instead of full resolution
+            image.draft('RGB', settings.CHAT_THUMBNAIL_SIZE)
+            image.thumbnail(settings.CHAT_THUMBNAIL_SIZE)
+            buffer = io.BytesIO()
+            image.convert('RGB').save(buffer, 'JPEG', quality=85)
+        return storage().save(name, ContentFile(buffer.getvalue()))
+
+    def pending(self, limit: int = 500) -> int:
+        """Generate thumbnails still pending; returns how many were processed"""
+        ids = list(
+            StoredFile.objects.filter(thumbnail_status=ThumbnailStatus.PENDING)
+            .order_by('created_at').values_list('id', flat=True)[:limit]
+        )
+        for stored_file_id in ids:
+            self.generate(stored_file_id)
+        return len(ids)
+
+
+thumbnails = ThumbnailGenerator()
@@ -0,0 +1,154 @@
+"""
+Customer revenue leaderboard
+Ranks customers by completed deposit and phase payments minus completed
+refunds, over all their projects; kept in a Redis sorted set so
+top-N pages are O(log n + k) instead of aggregating every transaction
+"""
+import logging
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, When
+from apps.customers.models import Customer
+from apps.projects.models import Transaction, TransactionType, TransactionStatus
+
+logger = logging.getLogger(__name__)
+
+REVENUE_TYPES = [TransactionType.DEPOSIT, TransactionType.PHASE]
+
+
+class CustomerLeaderboard:
+    """
+    Sorted set finance:leaderboard:customers (member: customer id,
+    score: net revenue) plus a marker key set once it has been built.
+
+    Scores are recomputed per customer from the database whenever one of
+    their transactions changes, so updates are idempotent and cannot drift.
+    Without Redis (tests, local dev) every read falls back to one GROUP BY.
+    """
+
+    key = 'finance:leaderboard:customers'
+    built_key = 'finance:leaderboard:customers:built'
+
+    def _redis(self):
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection('default')
+        except (ImportError, NotImplementedError):
+            return None
+
+    @staticmethod
+    def revenue_by_customer():
+        """Net completed revenue and project count per customer, highest first"""
+        signed_amount = Case(
+            When(transaction_type=TransactionType.REFUND, then=-F('amount')),
+            default=F('amount'),
+            output_field=DecimalField(max_digits=15, decimal_places=2),
+        )
+        return Transaction.objects.filter(
+            status=TransactionStatus.COMPLETED,
+            transaction_type__in=[*REVENUE_TYPES, TransactionType.REFUND],
+        ).values(
+            'project__customer_id'
+        ).annotate(
+            total_revenue=Sum(signed_amount, default=Decimal('0')),
+            project_count=Count('project', distinct=True, filter=Q(transaction_type__in=REVENUE_TYPES)),
+        ).order_by('-total_revenue', 'project__customer_id')
+
+    def rebuild(self) -> None:
+        """Replace the sorted set with a fresh GROUP BY over all transactions"""
+        redis = self._redis()
+        if redis is None:
+            return
+
+        scores = {str(row['project__customer_id']): float(row['total_revenue']) for row in self.revenue_by_customer()}
+        staging = f"{self.key}:rebuild"
+        try:
+            pipe = redis.pipeline()
+            pipe.delete(staging)
+            if scores:
+                pipe.zadd(staging, scores)
+                pipe.rename(staging, self.key)
+            else:
+                pipe.delete(self.key)
+            pipe.set(self.built_key, 1)
+            pipe.execute()
+        except Exception:
+            logger.exception("Customer leaderboard rebuild failed")
+
+    def refresh_customer(self, customer_id) -> None:
+        """Recompute one customer's score after one of their transactions changed"""
+        redis = self._redis()
+        if redis is None or customer_id is None:
+            return
+
+        try:
+            if not redis.exists(self.built_key):
+                return  # Built in full on the next read
+            row = self.revenue_by_customer().filter(project__customer_id=customer_id).first()
+            if row:
+                redis.zadd(self.key, {str(customer_id): float(row['total_revenue'])})
+            else:
+                redis.zrem(self.key, str(customer_id))
+        except Exception:
+            logger.exception("Customer leaderboard update failed for %s", customer_id)
+
+    def _page_from_redis(self, redis, offset: int, limit: int) -> Tuple[List[Tuple[str, float]], int]:
+        if not redis.exists(self.built_key):
+            self.rebuild()
+        pipe = redis.pipeline()
+        pipe.zrevrange(self.key, offset, offset + limit - 1, withscores=True)
+        pipe.zcard(self.key)
+        entries, total = pipe.execute()
+        return [(member.decode() if isinstance(member, bytes) else member, score) for member, score in entries], total
+
+    def page(self, offset: int = 0, limit: int = 10) -> Tuple[List[Dict], int]:
+        """
+        One page of the ranking as (rows, total_customers)
+        rows carry customer_id, customer_name, customer_email,
+        total_revenue and project_count, in rank order.
+        """
+        ranked: Optional[List[Tuple[str, float]]] = None
+        total = 0
+
+        redis = self._redis()
+        if redis is not None:
+            try:
+                ranked, total = self._page_from_redis(redis, offset, limit)
+            except Exception:
+                logger.exception("Customer leaderboard read failed, using database")
+                ranked = None
+
+        project_counts = {}
+        if ranked is None:
+            ranking = self.revenue_by_customer()
+            total = ranking.count()
+            rows = list(ranking[offset:offset + limit])
+            ranked = [(str(row['project__customer_id']), float(row['total_revenue'])) for row in rows]
+            project_counts = {str(row['project__customer_id']): row['project_count'] for row in rows}
+        elif ranked:
+            project_counts = {
+                str(row['project__customer_id']): row['project_count']
+                for row in self.revenue_by_customer().filter(
+                    project__customer_id__in=[customer_id for customer_id, _ in ranked]
+                )
+            }
+
+        customers = Customer.objects.select_related('user').in_bulk([customer_id for customer_id, _ in ranked])
+        customers = {str(pk): customer for pk, customer in customers.items()}
+
+        results = []
+        for customer_id, score in ranked:
+            customer = customers.get(customer_id)
+            if customer is None:
+                continue
+            results.append({
+                'customer_id': customer_id,
+                'customer_name': customer.company_name,
+                'customer_email': customer.user.email,
+                'total_revenue': score,
+                'project_count': project_counts.get(customer_id, 0),
+            })
+        return results, total
+
+
+customer_leaderboard = CustomerLeaderboard()
@@ -0,0 +1,244 @@
+"""
+Finance aggregate service
+Keeps FinanceTotals in step with project/proposal writes so the finance
+dashboard reads one row instead of walking every proposal's phases
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from apps.projects.models import (
+    Project,
+    ProjectStatus,
+    Proposal,
+    ProposalPhase,
+    ProposalStatus,
+    ProjectFinanceStats,
+    FinanceTotals,
+)
+from apps.projects.models.finance import COUNTER_FIELDS
+
+DECIMAL_FIELDS = {
+    field for field in COUNTER_FIELDS
+    if ProjectFinanceStats._meta.get_field(field).get_internal_type() == 'DecimalField'
+}
+
+
+def _empty_counters() -> Dict[str, object]:
+    return {
+        field: Decimal('0') if field in DECIMAL_FIELDS else 0
+        for field in COUNTER_FIELDS
+    }
+
+
+PROPOSAL_AGGREGATES = {
+    'accepted_proposals': Count('id'),
+    'deposit_paid_count': Count('id', filter=Q(deposit_paid=True)),
+    'deposit_pending_count': Count('id', filter=Q(deposit_paid=False)),
+    'deposit_paid_amount': Sum('deposit_amount', filter=Q(deposit_paid=True), default=Decimal('0')),
+    'deposit_pending_amount': Sum('deposit_amount', filter=Q(deposit_paid=False), default=Decimal('0')),
+}
+
+PHASE_AGGREGATES = {
+    'phases_total': Count('id'),
+    'phases_completed': Count('id', filter=Q(completed=True)),
+    'phases_paid': Count('id', filter=Q(payment_approved=True)),
+    'phase_paid_amount': Sum('amount', filter=Q(payment_approved=True), default=Decimal('0')),
+    'phase_pending_amount': Sum('amount', filter=Q(payment_approved=False), default=Decimal('0')),
+    # Unpaid phases of proposals whose deposit is in: revenue still expected
+    'phase_pending_after_deposit': Sum(
+        'amount', filter=Q(payment_approved=False, proposal__deposit_paid=True), default=Decimal('0')
+    ),
+}
+
+
+def compute_counters(project_status: str, proposal_totals: Optional[dict], phase_totals: Optional[dict]) -> Dict[str, object]:
+    """
+    Counters for one project from its status and the SQL aggregates of its
+    accepted proposals and their phases (None when there are none).
+    Mirrors the rules the dashboard used to apply on every request.
+    """
+    counters = _empty_counters()
+    is_completed = project_status == ProjectStatus.COMPLETED
+
+    counters['total_projects'] = 1
+    counters['completed_projects'] = int(is_completed)
+    counters['in_progress_projects'] = int(project_status == ProjectStatus.IN_PROGRESS)
+
+    for source, aggregates in ((proposal_totals, PROPOSAL_AGGREGATES), (phase_totals, PHASE_AGGREGATES)):
+        if source:
+            for field in aggregates:
+                if field in counters:
+                    counters[field] = source[field]
+
+    if is_completed:
+        counters['completed_deposit_revenue'] = counters['deposit_paid_amount']
+        counters['completed_phase_revenue'] = counters['phase_paid_amount']
+    elif phase_totals:
+        counters['pending_revenue'] = phase_totals['phase_pending_after_deposit']
+
+    return counters
+
+
+def _aggregate_by_project(project_ids=None):
+    """Accepted-proposal and phase aggregates keyed by project id (two GROUP BY queries)"""
+    proposals = Proposal.objects.filter(status=ProposalStatus.ACCEPTED)
+    phases = ProposalPhase.objects.filter(proposal__status=ProposalStatus.ACCEPTED)
+    if project_ids is not None:
+        proposals = proposals.filter(project_id__in=project_ids)
+        phases = phases.filter(proposal__project_id__in=project_ids)
+
+    proposal_totals = {
+        row['project_id']: row
+        for row in proposals.order_by().values('project_id').annotate(**PROPOSAL_AGGREGATES)
+    }
+    phase_totals = {
+        row['proposal__project_id']: row
+        for row in phases.order_by().values('proposal__project_id').annotate(**PHASE_AGGREGATES)
+    }
+    return proposal_totals, phase_totals
+
+
+class FinanceAggregateService:
+    """Incremental maintenance and full rebuild of finance aggregates"""
+
+    @staticmethod
+    def refresh_project(project_id) -> None:
+        """
+        Recompute one project's contribution and apply the change to the totals
+        Runs in the caller's transaction, so the aggregate commits or rolls
+        back together with the payment write that triggered it.
+        """
+        with transaction.atomic():
+            status = Project.objects.filter(id=project_id).values_list('status', flat=True).first()
+            if status is None:
+                FinanceAggregateService.remove_project(project_id)
+                return
+
+            # Row lock serializes concurrent refreshes of the same project
+            stats, _ = ProjectFinanceStats.objects.select_for_update().get_or_create(project_id=project_id)
+            proposal_totals, phase_totals = _aggregate_by_project([project_id])
+            counters = compute_counters(status, proposal_totals.get(project_id), phase_totals.get(project_id))
+
+            FinanceAggregateService._store(stats, counters)
+
+    @staticmethod
+    def add_project(project_id, status: str) -> None:
+        """Count a new project; it has no proposals yet, so nothing is aggregated"""
+        counters = compute_counters(status, None, None)
+        with transaction.atomic():
+            stats, created = ProjectFinanceStats.objects.get_or_create(project_id=project_id, defaults=counters)
+            if created:
+                FinanceAggregateService._apply_delta({
+                    field: value for field, value in counters.items() if value
+                })
+            else:
+                FinanceAggregateService.refresh_project(project_id)
+
+    @staticmethod
+    def change_project_status(project_id, old_status: str, new_status: str) -> None:
+        """
+        Apply a status change to the stored counters without re-aggregating
+        Revenue still expected is not kept for completed projects, so
+        reopening one is recomputed instead.
+        """
+        if old_status == ProjectStatus.COMPLETED:
+            FinanceAggregateService.refresh_project(project_id)
+            return
+
+        with transaction.atomic():
+            stats = ProjectFinanceStats.objects.select_for_update().filter(project_id=project_id).first()
+            if stats is None:
+                FinanceAggregateService.refresh_project(project_id)
+                return
+
+            counters = {field: getattr(stats, field) for field in COUNTER_FIELDS}
+            counters['completed_projects'] = int(new_status == ProjectStatus.COMPLETED)
+            counters['in_progress_projects'] = int(new_status == ProjectStatus.IN_PROGRESS)
+            if new_status == ProjectStatus.COMPLETED:
+                counters['completed_deposit_revenue'] = stats.deposit_paid_amount
+                counters['completed_phase_revenue'] = stats.phase_paid_amount
+                counters['pending_revenue'] = Decimal('0')
+            FinanceAggregateService._store(stats, counters)
+
+    @staticmethod
+    def remove_project(project_id) -> None:
+        """Subtract a deleted project's contribution from the totals"""
+        with transaction.atomic():
+            stats = ProjectFinanceStats.objects.select_for_update().filter(project_id=project_id).first()
+            if stats is None:
+                return
+
+            FinanceAggregateService._apply_delta({
+                field: -getattr(stats, field) for field in COUNTER_FIELDS
+            })
+            stats.delete()
+
+    @staticmethod
+    def _store(stats: ProjectFinanceStats, counters: Dict[str, object]) -> None:
+        """Save a locked stats row with new counters and move the totals by the difference"""
+        delta = {
+            field: counters[field] - getattr(stats, field)
+            for field in COUNTER_FIELDS
+            if counters[field] != getattr(stats, field)
+        }
+        if not delta:
+            return
+
+        for field, value in counters.items():
+            setattr(stats, field, value)
+        stats.save()
+        FinanceAggregateService._apply_delta(delta)
+
+    @staticmethod
+    def _apply_delta(delta: Dict[str, object]) -> None:
+        # Updates nothing until a rebuild has created the totals row
+        FinanceTotals.objects.filter(pk=FinanceTotals.SINGLETON_ID).update(
+            **{field: F(field) + value for field, value in delta.items()}
+        )
+
+    @staticmethod
+    def compute_all() -> Dict[object, Dict[str, object]]:
+        """Counters for every project, computed from scratch in three queries"""
+        proposal_totals, phase_totals = _aggregate_by_project()
+        return {
+            project_id: compute_counters(status, proposal_totals.get(project_id), phase_totals.get(project_id))
+            for project_id, status in Project.objects.values_list('id', 'status').iterator()
+        }
+
+    @staticmethod
+    def sum_counters(per_project: Iterable[Dict[str, object]]) -> Dict[str, object]:
+        totals = _empty_counters()
+        for counters in per_project:
+            for field in COUNTER_FIELDS:
+                totals[field] += counters[field]
+        return totals
+
+    @staticmethod
+    def rebuild() -> FinanceTotals:
+        """Discard and recompute every project's stats and the totals row"""
+        with transaction.atomic():
+            # Hold the totals row so incremental deltas queue behind the rebuild
+            FinanceTotals.objects.select_for_update().filter(pk=FinanceTotals.SINGLETON_ID).first()
+
+            per_project = FinanceAggregateService.compute_all()
+
+            ProjectFinanceStats.objects.all().delete()
+            ProjectFinanceStats.objects.bulk_create(
+                [ProjectFinanceStats(project_id=project_id, **counters) for project_id, counters in per_project.items()],
+                batch_size=1000
+            )
+
+            totals, _ = FinanceTotals.objects.update_or_create(
+                pk=FinanceTotals.SINGLETON_ID,
+                defaults=FinanceAggregateService.sum_counters(per_project.values())
+            )
+            return totals
+
+    @staticmethod
+    def get_totals() -> FinanceTotals:
+        """Current totals row, built on first use"""
+        totals = FinanceTotals.objects.filter(pk=FinanceTotals.SINGLETON_ID).first()
+        if totals is None:
+            totals = FinanceAggregateService.rebuild()
+        return totals
@@ -0,0 +1,228 @@
+"""
+Idempotency service
+Replays the first response to a payment request when a client retries it
+with the same Idempotency-Key header, instead of running the workflow again
+"""
+import hashlib
+import json
+import logging
+import time
+from datetime import timedelta
+from functools import wraps
+from typing import Callable, Optional, Tuple
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from api.exceptions.base_exception import ConflictException, ValidationException
+from apps.projects.models import IdempotencyKey, IdempotencyState
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Seconds between checks while a duplicate waits for the first request
+POLL_INTERVAL = 0.05
+
+# A record is a dict with fingerprint, state and (once completed) body
+Record = dict
+
+
+class RedisIdempotencyStore:
+    """
+    Records as JSON strings under idempotency:<scope>:<key>
+    The in-progress claim is a SET NX with the lock timeout as its TTL, so
+    a crashed worker's claim simply expires.
+    """
+
+    prefix = 'idempotency'
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def _key(self, scope: str, key: str) -> str:
+        return f"{self.prefix}:{scope}:{key}"
+
+    def claim(self, scope: str, key: str, fingerprint: str) -> Tuple[bool, Optional[Record]]:
+        value = json.dumps({'fingerprint': fingerprint, 'state': IdempotencyState.IN_PROGRESS})
+        if self.redis.set(self._key(scope, key), value, nx=True, ex=settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            return True, None
+        raw = self.redis.get(self._key(scope, key))
+        return False, json.loads(raw) if raw else None
+
+    def complete(self, scope: str, key: str, fingerprint: str, body) -> None:
+        value = json.dumps({'fingerprint': fingerprint, 'state': IdempotencyState.COMPLETED, 'body': body})
+
+        def write():
+            try:
+                self.redis.set(self._key(scope, key), value, ex=settings.IDEMPOTENCY_TTL)
+            except Exception:
+                logger.exception("Idempotency record write failed for %s", key)
+
+        # Only publish the response once the work it describes is committed
+        transaction.on_commit(write)
+
+    def release(self, scope: str, key: str) -> None:
+        try:
+            self.redis.delete(self._key(scope, key))
+        except Exception:
+            logger.exception("Idempotency claim release failed for %s", key)
+
+
+class DatabaseIdempotencyStore:
+    """
+    Records as IdempotencyKey rows
+    The claim is committed on its own so concurrent duplicates see it; the
+    response is written in the same transaction as the request's work.
+    """
+
+    def claim(self, scope: str, key: str, fingerprint: str) -> Tuple[bool, Optional[Record]]:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    scope=scope,
+                    key=key,
+                    fingerprint=fingerprint,
+                    locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT),
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL),
+                )
+            return True, None
+        except IntegrityError:
+            pass
+
+        row = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+        if row is None:
+            return False, None
+
+        abandoned = row.state == IdempotencyState.IN_PROGRESS and row.locked_until <= now
+        if row.expires_at <= now or abandoned:
+            # Conditional delete: only one of several waiters takes over the key
+            IdempotencyKey.objects.filter(pk=row.pk, state=row.state, locked_until=row.locked_until).delete()
+            return False, None
+
+        return False, {'fingerprint': row.fingerprint, 'state': row.state, 'body': row.response_body}
+
+    def complete(self, scope: str, key: str, fingerprint: str, body) -> None:
+        IdempotencyKey.objects.filter(scope=scope, key=key, fingerprint=fingerprint).update(
+            state=IdempotencyState.COMPLETED,
+            response_body=body,
+        )
+
+    def release(self, scope: str, key: str) -> None:
+        IdempotencyKey.objects.filter(scope=scope, key=key, state=IdempotencyState.IN_PROGRESS).delete()
+
+
+class IdempotencyService:
+    """
+    Runs a request at most once per (scope, Idempotency-Key)
+
+    The first request claims the key, runs, and stores its response body
+    for IDEMPOTENCY_TTL seconds; later duplicates get that body back. A
+    duplicate arriving while the first is still running waits for it (up to
+    IDEMPOTENCY_WAIT_TIMEOUT) rather than racing it. If the first request
+    fails, its claim is released and a retry runs normally.
+
+    Redis holds the records when available; without it (tests, local dev,
+    or a Redis error) they are kept in the idempotency_keys table.
+    """
+
+    database_store = DatabaseIdempotencyStore()
+
+    def _redis(self):
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection('default')
+        except (ImportError, NotImplementedError):
+            return None
+
+    def _store(self):
+        redis = self._redis()
+        return RedisIdempotencyStore(redis) if redis is not None else self.database_store
+
+    @staticmethod
+    def fingerprint(request) -> str:
+        digest = hashlib.sha256()
+        for part in (request.method.encode(), request.path.encode(), request.body or b''):
+            digest.update(part)
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _claim(self, store, scope: str, key: str, fingerprint: str):
+        """Claim the key, or wait for the first request's stored record; returns (store, record)"""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        while True:
+            try:
+                claimed, record = store.claim(scope, key, fingerprint)
+            except Exception:
+                if store is self.database_store:
+                    raise
+                logger.exception("Idempotency store unavailable, using database")
+                store = self.database_store
+                continue
+
+            if claimed:
+                return store, None
+            if record is not None:
+                if record['fingerprint'] != fingerprint:
+                    raise ValidationException(f"{IDEMPOTENCY_HEADER} was already used for a different request")
+                if record['state'] == IdempotencyState.COMPLETED:
+                    return store, record
+
+            if time.monotonic() >= deadline:
+                raise ConflictException(f"A request with this {IDEMPOTENCY_HEADER} is still being processed")
+            time.sleep(POLL_INTERVAL)
+
+    def execute(self, request, scope: str, key: str, func: Callable):
+        """Run func once for this key and return its result, or replay the stored one"""
+        fingerprint = self.fingerprint(request)
+        store, record = self._claim(self._store(), scope, key, fingerprint)
+        if record is not None:
+            return record['body']
+
+        try:
+            with transaction.atomic():
+                result = func()
+                body = json.loads(json.dumps(result, cls=DjangoJSONEncoder))
+                store.complete(scope, key, fingerprint, body)
+        except BaseException:
+            store.release(scope, key)
+            raise
+        return result
+
+    @staticmethod
+    def purge_expired() -> int:
+        """Delete database records past their TTL; returns how many were removed"""
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+
+idempotency_service = IdempotencyService()
+
+
+def idempotent(func):
+    """
+    Decorator making a POST endpoint honour the Idempotency-Key header
+    Place it below require_roles and above transaction.atomic. Keys are
+    scoped to the authenticated user and the endpoint; requests without
+    the header run as before.
+
+    Usage:
+        @router.post("/proposals/{proposal_id}/submit-payment", auth=auth_bearer)
+        @require_roles('customer', 'no_admin')
+        @idempotent
+        @transaction.atomic
+        def submit_payment(request, proposal_id: str): ...
+    """
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return func(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValidationException(f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters")
+
+        scope = f"{getattr(request.auth, 'id', '')}:{func.__name__}"
+        return idempotency_service.execute(request, scope, key, lambda: func(request, *args, **kwargs))
+    return wrapper
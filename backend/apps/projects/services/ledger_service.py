@@ -0,0 +1,253 @@
+"""
+Ledger service
+Posts every Transaction state change to the append-only double-entry
+ledger and keeps running balances per project and per customer
+"""
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+from django.db import transaction
+from django.db.models import Sum
+from apps.projects.models import (
+    LedgerAccount,
+    LedgerBalance,
+    LedgerEntry,
+    LedgerScope,
+    Project,
+    Transaction,
+    TransactionStatus,
+    TransactionType,
+)
+from apps.projects.models.ledger import BALANCE_ACCOUNTS, DEBIT_NORMAL
+
+ZERO = Decimal('0')
+
+# (debit, credit) pair -> signed amount; pairs are stored sorted, negative means reversed
+Postings = Dict[Tuple[str, str], Decimal]
+
+
+def target_postings(status: str, transaction_type: str, amount) -> Postings:
+    """What a transaction in this state should have posted in total"""
+    amount = Decimal(amount or 0)
+    postings: Postings = {}
+    if status == TransactionStatus.COMPLETED:
+        if transaction_type == TransactionType.REFUND:
+            _add(postings, LedgerAccount.REFUNDS, LedgerAccount.CASH, amount)
+        elif transaction_type == TransactionType.ADJUSTMENT:
+            _add(postings, LedgerAccount.CASH, LedgerAccount.ADJUSTMENTS, amount)
+        else:
+            _add(postings, LedgerAccount.CASH, LedgerAccount.REVENUE, amount)
+    elif status == TransactionStatus.PENDING and transaction_type != TransactionType.REFUND:
+        _add(postings, LedgerAccount.PENDING, LedgerAccount.UNCONFIRMED, amount)
+    return postings
+
+
+def _add(postings: Postings, debit: str, credit: str, amount: Decimal) -> None:
+    debit, credit = str(debit), str(credit)
+    if debit <= credit:
+        postings[(debit, credit)] = postings.get((debit, credit), ZERO) + amount
+    else:
+        postings[(credit, debit)] = postings.get((credit, debit), ZERO) - amount
+
+
+def balance_deltas(debit: str, credit: str, amount: Decimal) -> Dict[str, Decimal]:
+    """Change of each balance column caused by one entry"""
+    deltas = {}
+    for account, side in ((debit, 1), (credit, -1)):
+        if account in BALANCE_ACCOUNTS:
+            sign = side if account in DEBIT_NORMAL else -side
+            deltas[account] = deltas.get(account, ZERO) + sign * amount
+    return deltas
+
+
+class LedgerService:
+    """
+    Ledger writes are idempotent: a transaction is compared with what it
+    has already posted and only the difference is appended. Syncing the
+    same state twice posts nothing; syncing every transaction builds the
+    ledger from scratch.
+    """
+
+    @staticmethod
+    def posted(transaction_id) -> Postings:
+        postings: Postings = {}
+        rows = LedgerEntry.objects.filter(transaction_id=transaction_id).order_by().values(
+            'debit_account', 'credit_account'
+        ).annotate(total=Sum('amount'))
+        for row in rows:
+            _add(postings, row['debit_account'], row['credit_account'], row['total'])
+        return postings
+
+    @staticmethod
+    def _lock_balance(scope: str, owner_id) -> LedgerBalance:
+        balance, _ = LedgerBalance.objects.select_for_update().get_or_create(scope=scope, owner_id=owner_id)
+        return balance
+
+    @staticmethod
+    def _post(transaction_id, project_id, customer_id, status: str, transaction_type: str,
+              target: Postings) -> List[LedgerEntry]:
+        with transaction.atomic():
+            # Balance rows are locked first, so posts for one project run one at a time
+            balances = [LedgerService._lock_balance(LedgerScope.PROJECT, project_id)]
+            if customer_id is not None:
+                balances.append(LedgerService._lock_balance(LedgerScope.CUSTOMER, customer_id))
+
+            posted = LedgerService.posted(transaction_id)
+            entries = []
+            for pair in sorted(set(target) | set(posted)):
+                delta = target.get(pair, ZERO) - posted.get(pair, ZERO)
+                if delta == ZERO:
+                    continue
+                debit, credit = pair if delta > ZERO else (pair[1], pair[0])
+                entry = LedgerEntry(
+                    transaction_id=transaction_id,
+                    project_id=project_id,
+                    customer_id=customer_id,
+                    debit_account=debit,
+                    credit_account=credit,
+                    amount=abs(delta),
+                    transaction_status=status,
+                    transaction_type=transaction_type,
+                )
+                entry.save()
+                entries.append(entry)
+
+            if entries:
+                for balance in balances:
+                    for entry in entries:
+                        for account, delta in balance_deltas(entry.debit_account, entry.credit_account, entry.amount).items():
+                            setattr(balance, account, getattr(balance, account) + delta)
+                    balance.entry_count += len(entries)
+                    balance.last_entry_id = entries[-1].id
+                    balance.save()
+            return entries
+
+    @staticmethod
+    def sync_transaction(txn: Transaction) -> List[LedgerEntry]:
+        """Post whatever this transaction's current state adds or removes"""
+        customer_id = Project.objects.filter(id=txn.project_id).values_list('customer_id', flat=True).first()
+        return LedgerService._post(
+            txn.id, txn.project_id, customer_id, txn.status, txn.transaction_type,
+            target_postings(txn.status, txn.transaction_type, txn.amount),
+        )
+
+    @staticmethod
+    def sync_transactions(transactions: Iterable[Transaction]) -> int:
+        """sync_transaction for rows written in bulk (bulk_create/bulk_update send no signals)"""
+        return sum(len(LedgerService.sync_transaction(txn)) for txn in transactions)
+
+    @staticmethod
+    def reverse_transaction(transaction_id) -> List[LedgerEntry]:
+        """Cancel everything a deleted transaction posted"""
+        last = LedgerEntry.objects.filter(transaction_id=transaction_id).order_by('-id').first()
+        if last is None:
+            return []
+        return LedgerService._post(
+            transaction_id, last.project_id, last.customer_id, 'deleted', last.transaction_type, {}
+        )
+
+    @staticmethod
+    def project_balance(project_id) -> LedgerBalance:
+        """
+        Running balance of a project; O(1)
+        Transactions from before the ledger were posted by migration 0030.
+        """
+        balance = LedgerBalance.objects.filter(scope=LedgerScope.PROJECT, owner_id=project_id).first()
+        return balance or LedgerBalance(scope=LedgerScope.PROJECT, owner_id=project_id)
+
+    @staticmethod
+    def customer_balance(customer_id) -> LedgerBalance:
+        balance = LedgerBalance.objects.filter(scope=LedgerScope.CUSTOMER, owner_id=customer_id).first()
+        return balance or LedgerBalance(scope=LedgerScope.CUSTOMER, owner_id=customer_id)
+
+    @staticmethod
+    def replay() -> dict:
+        """
+        Recompute everything from the entries alone, in id order
+        Returns balances per (scope, owner), net postings per transaction
+        and the number of entries read.
+        """
+        balances = defaultdict(lambda: {**{a: ZERO for a in BALANCE_ACCOUNTS}, 'entry_count': 0, 'last_entry_id': None})
+        postings: Dict[object, Postings] = defaultdict(dict)
+        count = 0
+
+        for entry in LedgerEntry.objects.order_by('id').iterator(chunk_size=5000):
+            count += 1
+            _add(postings[entry.transaction_id], entry.debit_account, entry.credit_account, entry.amount)
+            scopes = [(LedgerScope.PROJECT.value, entry.project_id)]
+            if entry.customer_id is not None:
+                scopes.append((LedgerScope.CUSTOMER.value, entry.customer_id))
+            for scope in scopes:
+                balance = balances[scope]
+                for account, delta in balance_deltas(entry.debit_account, entry.credit_account, entry.amount).items():
+                    balance[account] += delta
+                balance['entry_count'] += 1
+                balance['last_entry_id'] = entry.id
+
+        return {'entries': count, 'balances': balances, 'postings': postings}
+
+    @staticmethod
+    def verify(repair: bool = False) -> dict:
+        """
+        Replay the ledger and check it three ways:
+        - stored running balances equal the replayed ones
+        - each scope balances (cash + refunds = revenue + adjustments)
+        - every transaction's posted total matches its current state
+        With repair, drifted transactions are re-synced and balance rows
+        are rewritten from a fresh replay.
+        """
+        replayed = LedgerService.replay()
+        balances = replayed['balances']
+
+        stored = {(row.scope, row.owner_id): row for row in LedgerBalance.objects.all()}
+        balance_mismatches = []
+        for key in set(stored) | set(balances):
+            row, expected = stored.get(key), balances.get(key)
+            # A row locked before anything was posted holds zeros
+            actual = {account: getattr(row, account) if row else ZERO for account in BALANCE_ACCOUNTS}
+            expected = {account: expected[account] if expected else ZERO for account in BALANCE_ACCOUNTS}
+            if actual != expected:
+                balance_mismatches.append({'scope': key[0], 'owner_id': str(key[1]), 'stored': actual, 'replayed': expected})
+
+        unbalanced = [
+            {'scope': key[0], 'owner_id': str(key[1])}
+            for key, b in balances.items()
+            if b['cash'] + b['refunds'] != b['revenue'] + b['adjustments']
+        ]
+
+        drifted = []
+        seen = set()
+        for txn in Transaction.objects.only('id', 'project_id', 'status', 'transaction_type', 'amount').iterator(chunk_size=5000):
+            seen.add(txn.id)
+            target = {pair: value for pair, value in target_postings(txn.status, txn.transaction_type, txn.amount).items() if value}
+            posted = {pair: value for pair, value in replayed['postings'].get(txn.id, {}).items() if value}
+            if target != posted:
+                drifted.append(txn)
+        orphaned = [
+            transaction_id for transaction_id, posted in replayed['postings'].items()
+            if transaction_id not in seen and any(posted.values())
+        ]
+
+        report = {
+            'entries': replayed['entries'],
+            'balance_mismatches': balance_mismatches,
+            'unbalanced': unbalanced,
+            'drifted_transactions': [str(txn.id) for txn in drifted],
+            'orphaned_transactions': [str(transaction_id) for transaction_id in orphaned],
+        }
+
+        if repair:
+            with transaction.atomic():
+                LedgerService.sync_transactions(drifted)
+                for transaction_id in orphaned:
+                    LedgerService.reverse_transaction(transaction_id)
+                LedgerService._rewrite_balances(LedgerService.replay()['balances'])
+        return report
+
+    @staticmethod
+    def _rewrite_balances(balances) -> None:
+        LedgerBalance.objects.select_for_update().all().delete()
+        LedgerBalance.objects.bulk_create([
+            LedgerBalance(scope=scope, owner_id=owner_id, **values)
+            for (scope, owner_id), values in balances.items()
+        ], batch_size=1000)
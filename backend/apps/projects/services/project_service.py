@@ -4,6 +4,7 @@ Project service for business logic
 from django.db.models import Count, Q
 from apps.users.models import User
 from apps.projects.models import Project, ProjectStatus, ChatParticipant
+from apps.projects.models.project import ACTIVITY_FIELDS
 from apps.services.models import ServiceRequest
 from apps.customers.models import Customer
 
@@ -118,10 +119,11 @@ class ProjectService:
 
         # Send initial system message
         from apps.projects.models import ChatMessage
-        ChatMessage.objects.create(
-            project=project,
-            sender=assigned_sales if assigned_sales else service_request.customer,
-            message=f"Dự án được tạo từ yêu cầu dịch vụ. Sale phụ trách: {assigned_sales.full_name if assigned_sales else 'Chưa phân công'}",
+        from apps.projects.services.chat_service import ChatService
+        ChatService.post(
+            project,
+            assigned_sales if assigned_sales else service_request.customer,
+            f"Dự án được tạo từ yêu cầu dịch vụ. Sale phụ trách: {assigned_sales.full_name if assigned_sales else 'Chưa phân công'}",
             message_type=ChatMessage.MessageType.SYSTEM
         )
 
@@ -185,17 +187,20 @@ class ProjectService:
                 user=dev
             )
 
-        project.save()
+        project.save(update_fields=['updated_at'])
 
         # Send system message
         from apps.projects.models import ChatMessage
+        from apps.projects.services.chat_service import ChatService
         dev_names = ', '.join([dev.full_name for dev in selected_devs])
-        ChatMessage.objects.create(
-            project=project,
-            sender=project.project_manager if project.project_manager else selected_devs[0],
-            message=f"🎯 Dự án đã được tự động phân công cho: {dev_names}",
+        ChatService.post(
+            project,
+            project.project_manager if project.project_manager else selected_devs[0],
+            f"🎯 Dự án đã được tự động phân công cho: {dev_names}",
             message_type=ChatMessage.MessageType.SYSTEM
         )
+        # The post updated the activity columns in the database only
+        project.refresh_from_db(fields=ACTIVITY_FIELDS)
 
         return selected_devs
 
@@ -226,6 +231,6 @@ class ProjectService:
 
         # Update project status to IN_PROGRESS
         project.status = ProjectStatus.IN_PROGRESS
-        project.save()
+        project.save(update_fields=['status', 'updated_at'])
 
         return assigned_devs
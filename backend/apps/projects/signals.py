@@ -0,0 +1,120 @@
+"""
+Project model signal handlers
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from apps.projects.models import ChatMessage, ChatParticipant, Project, Proposal, ProposalPhase, Transaction
+from apps.projects.models.proposal_phase import phases_replaced
+from apps.projects.services.finance_aggregate_service import FinanceAggregateService
+from apps.projects.services.customer_leaderboard import customer_leaderboard
+from apps.projects.services.ledger_service import LedgerService
+from apps.projects.services.chat_unread_service import chat_unread_counters
+from apps.projects.services.chat_presence_service import chat_presence
+from apps.projects.services.chat_service import ChatService
+
+
+@receiver(pre_save, sender=Project)
+def remember_status_for_finance(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Status is the only project field the finance counters depend on"""
+    instance._finance_previous_status = None
+    if raw or instance._state.adding or (update_fields is not None and 'status' not in update_fields):
+        return
+    instance._finance_previous_status = (
+        Project.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Project)
+def refresh_finance_on_project_save(sender, instance, created=False, raw=False, **kwargs):
+    """Project status decides completed vs pending revenue; only a changed status is applied"""
+    if raw:
+        return
+    if created:
+        FinanceAggregateService.add_project(instance.id, instance.status)
+        return
+    previous = getattr(instance, '_finance_previous_status', None)
+    if previous is not None and previous != instance.status:
+        FinanceAggregateService.change_project_status(instance.id, previous, instance.status)
+
+
+@receiver(post_save, sender=Proposal)
+@receiver(post_delete, sender=Proposal)
+def refresh_finance_on_proposal_change(sender, instance, raw=False, **kwargs):
+    """Deposit confirmation and phase approval are saved on the proposal"""
+    if raw:
+        return
+    FinanceAggregateService.refresh_project(instance.project_id)
+
+
+@receiver(post_save, sender=ProposalPhase)
+def refresh_finance_on_phase_save(sender, instance, raw=False, **kwargs):
+    """Phase completion and payment approval update a single phase row"""
+    if raw:
+        return
+    project_id = Proposal.objects.filter(id=instance.proposal_id).values_list('project_id', flat=True).first()
+    if project_id is not None:
+        FinanceAggregateService.refresh_project(project_id)
+
+
+@receiver(phases_replaced, sender=ProposalPhase)
+def refresh_finance_on_phases_replaced(sender, proposal, **kwargs):
+    FinanceAggregateService.refresh_project(proposal.project_id)
+
+
+@receiver(post_delete, sender=Project)
+def remove_finance_on_project_delete(sender, instance, **kwargs):
+    FinanceAggregateService.remove_project(instance.id)
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def refresh_leaderboard_on_transaction_change(sender, instance, raw=False, **kwargs):
+    """Re-score the customer once the payment write is committed"""
+    if raw:
+        return
+    customer_id = Project.objects.filter(id=instance.project_id).values_list('customer_id', flat=True).first()
+    if customer_id is not None:
+        transaction.on_commit(lambda: customer_leaderboard.refresh_customer(customer_id))
+
+
+@receiver(post_save, sender=Transaction)
+def post_transaction_to_ledger(sender, instance, raw=False, **kwargs):
+    """Append the ledger entries for the transaction's new state, in the same DB transaction"""
+    if raw:
+        return
+    LedgerService.sync_transaction(instance)
+
+
+@receiver(post_delete, sender=Transaction)
+def reverse_transaction_in_ledger(sender, instance, **kwargs):
+    LedgerService.reverse_transaction(instance.id)
+
+
+@receiver(post_save, sender=ChatParticipant)
+@receiver(post_delete, sender=ChatParticipant)
+def invalidate_unread_counters(sender, instance, raw=False, **kwargs):
+    """Joining, leaving or saving last_read_at changes the user's counters and the chat members"""
+    if raw:
+        return
+    user_id, project_id = instance.user_id, instance.project_id
+    transaction.on_commit(lambda: chat_unread_counters.invalidate(user_id))
+    transaction.on_commit(lambda: chat_presence.forget_members(project_id))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def forget_chat_members_on_project_change(sender, instance, raw=False, **kwargs):
+    """The project manager may use the chat without a participant row"""
+    if raw:
+        return
+    project_id = instance.id
+    transaction.on_commit(lambda: chat_presence.forget_members(project_id))
+
+
+@receiver(post_delete, sender=ChatMessage)
+def forget_deleted_message_activity(sender, instance, origin=None, **kwargs):
+    """Keep the project's message count and preview in step; not when the project itself goes"""
+    if isinstance(origin, Project):
+        return
+    ChatService.forget(instance)
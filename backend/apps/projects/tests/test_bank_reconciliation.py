@@ -0,0 +1,105 @@
+"""
+Tests for bank statement import and reconciliation
+"""
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import (
+    FinanceTotals,
+    Project,
+    ProjectStatus,
+    Proposal,
+    ProposalPhase,
+    ProposalStatus,
+    Transaction,
+    TransactionStatus,
+    TransactionType,
+)
+from apps.projects.services.bank_reconciliation_service import parse_amount
+from apps.projects.services.finance_aggregate_service import FinanceAggregateService
+
+
+class BankReconciliationTestCase(TestCase):
+    """Statement lines settle pending transactions and unpaid phases in bulk"""
+
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_user(email='admin@test.com', password='x', full_name='Admin', role='admin')
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {AuthService().issue_tokens(self.admin)['access_token']}"}
+        sale = User.objects.create_user(email='sale@test.com', password='x', full_name='Sale', role='sales')
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        customer = Customer.objects.create(user=self.owner, company_name='Công ty A')
+        self.project = Project.objects.create(
+            name='Shop', customer=customer, project_manager=sale, status=ProjectStatus.IN_PROGRESS
+        )
+        self.proposal = Proposal.objects.create(
+            project=self.project, created_by=sale, status=ProposalStatus.ACCEPTED, deposit_paid=True,
+            phases=[
+                {'name': 'Design', 'amount': 2000000, 'completed': True},
+                {'name': 'Build', 'amount': 3000000, 'completed': True},
+            ]
+        )
+        self.pending = Transaction.objects.create(
+            project=self.project, customer=self.owner, transaction_type=TransactionType.ADJUSTMENT,
+            amount=Decimal(500000), transaction_reference='FT2401',
+        )
+        FinanceAggregateService.rebuild()
+
+    def upload(self, content, query=''):
+        statement = SimpleUploadedFile('statement.csv', content.encode('utf-8'), content_type='text/csv')
+        return self.client.post(f'/api/transactions/transactions/import{query}', {'file': statement}, **self.headers)
+
+    def test_reconcile_statement(self):
+        """Test: reference, customer+amount and unknown lines are handled in one import"""
+        response = self.upload(
+            'Ngày,Số tiền,Mã giao dịch,Người chuyển,Nội dung\n'
+            '05/01/2024,"500,000",FT2401,,thanh toan\n'
+            '06/01/2024,2.000.000,FT2402,Công ty A,phase 1\n'
+            '06/01/2024,3000000.00,FT2403,owner@test.com,phase 2\n'
+            '07/01/2024,999000,FT2404,Unknown,\n'
+        )
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual(report['total_lines'], 4)
+        self.assertEqual(report['matched_count'], 3)
+        self.assertEqual([m['match_type'] for m in report['matched']], ['transaction', 'phase', 'phase'])
+        self.assertEqual(report['unmatched'][0]['line'], 5)
+
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.status, TransactionStatus.COMPLETED)
+        self.assertEqual(self.pending.processed_by, self.admin)
+        self.assertTrue(all(ProposalPhase.objects.filter(proposal=self.proposal).values_list('payment_approved', flat=True)))
+        self.assertEqual(
+            Transaction.objects.filter(proposal=self.proposal, status=TransactionStatus.COMPLETED).count(), 2
+        )
+
+        # Last phase paid: project completed and aggregates refreshed without signals
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.status, ProjectStatus.COMPLETED)
+        self.assertEqual(FinanceTotals.objects.get().phases_paid, 2)
+
+        # Importing the same statement again settles nothing
+        report = self.upload(
+            'date,amount,reference,customer\n2024-01-06,2000000,FT2402,Công ty A\n'
+        ).json()
+        self.assertEqual(report['matched_count'], 0)
+
+    def test_dry_run_and_reference_in_content(self):
+        """Test: dry run reports matches without writing; references are found in transfer content"""
+        report = self.upload('amount,content\n500000,CK FT2401 Cong ty A\n', '?dry_run=true').json()
+        self.assertEqual(report['matched_count'], 1)
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.status, TransactionStatus.PENDING)
+
+    def test_invalid_statement(self):
+        """Test: a file without an amount column is a 400"""
+        self.assertEqual(self.upload('foo,bar\n1,2\n').status_code, 400)
+
+    def test_parse_amount(self):
+        self.assertEqual(parse_amount('1,000,000'), Decimal('1000000'))
+        self.assertEqual(parse_amount('1.000.000 VND'), Decimal('1000000'))
+        self.assertEqual(parse_amount('1000000.00'), Decimal('1000000'))
+        self.assertIsNone(parse_amount('abc'))
@@ -0,0 +1,63 @@
+"""
+Tests for chat history paging (before/after cursors)
+"""
+from datetime import timedelta
+from django.test import TestCase, Client
+from django.utils import timezone
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import ChatMessage, ChatParticipant, Project
+
+
+class ChatHistoryTestCase(TestCase):
+    """Clients scroll back with ?before= and fetch only new messages with ?after="""
+
+    def setUp(self):
+        self.client = Client()
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.project = Project.objects.create(name='Shop', customer=customer)
+        ChatParticipant.objects.create(project=self.project, user=self.owner)
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {AuthService().issue_tokens(self.owner)['access_token']}"}
+        self.url = f'/api/projects/{self.project.id}/messages'
+
+        # Two messages share a timestamp, so ordering falls back to id
+        base = timezone.now() - timedelta(hours=1)
+        self.messages = []
+        for index, minutes in enumerate([0, 1, 2, 2, 3]):
+            message = ChatMessage.objects.create(project=self.project, sender=self.owner, message=f'm{index}')
+            ChatMessage.objects.filter(id=message.id).update(created_at=base + timedelta(minutes=minutes))
+            self.messages.append(message)
+        self.ordered = [str(m.id) for m in ChatMessage.objects.order_by('created_at', 'id')]
+
+    def fetch(self, **params):
+        response = self.client.get(self.url, params, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return [m['id'] for m in response.json()], response['X-Has-More']
+
+    def test_scroll_back_with_before(self):
+        ids, has_more = self.fetch(limit=2)
+        self.assertEqual((ids, has_more), (self.ordered[3:], 'true'))
+
+        ids, has_more = self.fetch(limit=2, before=ids[0])
+        self.assertEqual((ids, has_more), (self.ordered[1:3], 'true'))
+
+        ids, has_more = self.fetch(limit=2, before=ids[0])
+        self.assertEqual((ids, has_more), (self.ordered[:1], 'false'))
+
+    def test_delta_fetch_with_after(self):
+        ids, has_more = self.fetch(after=self.ordered[1])
+        self.assertEqual((ids, has_more), (self.ordered[2:], 'false'))
+
+        ids, has_more = self.fetch(after=self.ordered[-1])
+        self.assertEqual((ids, has_more), ([], 'false'))
+
+        ids, has_more = self.fetch(after=self.ordered[0], before=self.ordered[3], limit=1)
+        self.assertEqual((ids, has_more), (self.ordered[1:2], 'true'))
+
+    def test_unknown_cursor(self):
+        other = Project.objects.create(name='Other', customer=self.project.customer)
+        foreign = ChatMessage.objects.create(project=other, sender=self.owner, message='elsewhere')
+        response = self.client.get(self.url, {'after': str(foreign.id)}, **self.headers)
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,112 @@
+"""
+Tests for denormalized chat activity and the project inbox
+"""
+from datetime import timedelta
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import ChatMessage, ChatParticipant, Project
+from apps.projects.services.chat_service import ChatService
+from apps.projects.services.project_service import ProjectService
+
+
+class ChatInboxTestCase(TestCase):
+    """Projects carry their latest message; the inbox pages over them by recency"""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.client = Client()
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        self.sale = User.objects.create_user(email='sale@test.com', password='x', full_name='Sale', role='sales')
+        customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.projects = []
+        for index in range(5):
+            project = Project.objects.create(name=f'P{index}', customer=customer, project_manager=self.sale)
+            ChatParticipant.objects.create(project=project, user=self.owner)
+            ChatParticipant.objects.create(project=project, user=self.sale)
+            self.projects.append(project)
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {AuthService().issue_tokens(self.owner)['access_token']}"}
+
+    def inbox(self, **params):
+        return self.client.get('/api/projects/inbox', params, **self.headers)
+
+    def test_post_maintains_activity(self):
+        project = self.projects[0]
+        ChatService.post(project, self.sale, 'first')
+        ChatService.post(project, self.sale, 'second\n  line ' + 'x' * 300)
+
+        project.refresh_from_db()
+        self.assertEqual(project.message_count, 2)
+        self.assertEqual(project.last_message_at, ChatMessage.objects.filter(project=project).latest('created_at').created_at)
+        self.assertTrue(project.last_message_preview.startswith('second line x'))
+        self.assertEqual(len(project.last_message_preview), 200)
+
+    def test_delete_updates_activity(self):
+        project = self.projects[0]
+        first = ChatService.post(project, self.sale, 'first')
+        second = ChatService.post(project, self.sale, 'second')
+        third = ChatService.post(project, self.sale, 'third')
+
+        second.delete()
+        project.refresh_from_db()
+        self.assertEqual((project.message_count, project.last_message_preview), (2, 'third'))
+
+        third.delete()
+        project.refresh_from_db()
+        self.assertEqual((project.message_count, project.last_message_preview), (1, 'first'))
+        self.assertEqual(project.last_message_at, first.created_at)
+
+        first.delete()
+        project.refresh_from_db()
+        self.assertEqual((project.message_count, project.last_message_at, project.last_message_preview), (0, None, ''))
+
+    def test_deposit_approval_keeps_activity(self):
+        User.objects.create_user(email='dev@test.com', password='x', full_name='Dev', role='dev')
+        project = Project.objects.get(id=self.projects[0].id)
+        ChatService.post(project, self.owner, 'deposit sent')
+
+        # Posts the assignment message, then saves the status on the same (stale) instance
+        ProjectService.auto_assign_on_deposit_approval(project)
+
+        stored = Project.objects.get(id=project.id)
+        self.assertEqual(stored.message_count, 2)
+        self.assertTrue(stored.last_message_preview.startswith('🎯'))
+        self.assertEqual((project.message_count, project.status), (2, stored.status))
+
+    def test_project_delete_skips_activity_updates(self):
+        for text in ('a', 'b', 'c'):
+            ChatService.post(self.projects[0], self.sale, text)
+        with CaptureQueriesContext(connection) as queries:
+            self.projects[0].delete()
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE "projects"')])
+
+    def test_inbox_orders_by_recency_with_unread(self):
+        for index, project in enumerate(self.projects):
+            ChatService.post(project, self.sale, f'hi {index}')
+        ChatService.post(self.projects[1], self.owner, 'mine')
+        # Spread the activity out: P1 (just answered) first, then the last project created
+        now = timezone.now()
+        for index, project in enumerate(self.projects):
+            Project.objects.filter(id=project.id).update(last_message_at=now + timedelta(minutes=index))
+        Project.objects.filter(id=self.projects[1].id).update(last_message_at=now + timedelta(hours=1))
+
+        self.inbox()  # warm the token cache
+        with CaptureQueriesContext(connection) as queries:
+            response = self.inbox(limit=3)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response['X-Has-More'], 'true')
+        page = response.json()
+        self.assertEqual([row['name'] for row in page], ['P1', 'P4', 'P3'])
+        self.assertEqual((page[0]['last_message_preview'], page[0]['message_count'], page[0]['unread']), ('mine', 2, 1))
+
+        rest = self.inbox(limit=3, cursor=response['X-Next-Cursor']).json()
+        self.assertEqual([row['name'] for row in rest], ['P2', 'P0'])
+
+    def test_inbox_skips_projects_without_messages(self):
+        ChatService.post(self.projects[2], self.sale, 'only one')
+        self.assertEqual([row['name'] for row in self.inbox().json()], ['P2'])
@@ -0,0 +1,78 @@
+"""
+Tests for chat presence and typing indicators
+"""
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import ChatParticipant, Project
+from apps.projects.services.chat_presence_service import chat_presence
+
+
+class ChatPresenceTestCase(TestCase):
+    """Typing and online state live in the cache; the database is not written"""
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['local'].clear()
+        self.client = Client()
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        self.sale = User.objects.create_user(email='sale@test.com', password='x', full_name='Sale', role='sales')
+        self.outsider = User.objects.create_user(email='x@test.com', password='x', full_name='X', role='customer')
+        customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.project = Project.objects.create(name='Shop', customer=customer, project_manager=self.sale)
+        ChatParticipant.objects.create(project=self.project, user=self.owner)
+        auth = AuthService()
+        self.owner_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.owner)['access_token']}"}
+        self.sale_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.sale)['access_token']}"}
+        self.outsider_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.outsider)['access_token']}"}
+
+    def typing(self, headers, typing=True):
+        return self.client.post(f'/api/projects/{self.project.id}/typing', {'typing': typing},
+                                content_type='application/json', **headers)
+
+    def presence(self, headers):
+        response = self.client.get(f'/api/projects/{self.project.id}/presence', **headers)
+        self.assertEqual(response.status_code, 200)
+        return {row['user_id']: row for row in response.json()}
+
+    def test_typing_and_presence(self):
+        self.assertEqual(self.typing(self.owner_headers).status_code, 200)
+
+        presence = self.presence(self.sale_headers)
+        self.assertEqual(set(presence), {str(self.owner.id), str(self.sale.id)})
+        self.assertTrue(presence[str(self.owner.id)]['typing'])
+        self.assertTrue(presence[str(self.owner.id)]['online'])
+        self.assertEqual(presence[str(self.sale.id)], {
+            'user_id': str(self.sale.id), 'online': False, 'last_seen': None, 'typing': False,
+        })
+
+        self.typing(self.owner_headers, typing=False)
+        presence = self.presence(self.sale_headers)
+        self.assertFalse(presence[str(self.owner.id)]['typing'])
+        self.assertIsNotNone(presence[str(self.owner.id)]['last_seen'])
+
+    def test_writes_are_coalesced_and_skip_database(self):
+        self.typing(self.owner_headers)
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(5):
+                self.typing(self.owner_headers)
+        self.assertEqual(len(queries), 0)
+
+        self.assertFalse(chat_presence.set_typing(self.project.id, self.owner.id, True))
+        self.assertTrue(chat_presence.set_typing(self.project.id, self.owner.id, False))
+        self.assertFalse(chat_presence.touch(self.owner.id))
+
+    @override_settings(CHAT_TYPING_TTL=0)
+    def test_typing_expires(self):
+        self.typing(self.owner_headers)
+        self.assertFalse(self.presence(self.sale_headers)[str(self.owner.id)]['typing'])
+
+    def test_members_only(self):
+        self.assertEqual(self.typing(self.outsider_headers).status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            ChatParticipant.objects.create(project=self.project, user=self.outsider)
+        self.assertEqual(self.typing(self.outsider_headers).status_code, 200)
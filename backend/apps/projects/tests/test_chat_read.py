@@ -0,0 +1,66 @@
+"""
+Tests for chat read receipts (read up to a message)
+"""
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import ChatMessage, ChatParticipant, Project
+
+
+class ChatReadTestCase(TestCase):
+    """Reading advances one last_read_at; per-message state is derived from it"""
+
+    def setUp(self):
+        self.client = Client()
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        self.sale = User.objects.create_user(email='sale@test.com', password='x', full_name='Sale', role='sales')
+        customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.project = Project.objects.create(name='Shop', customer=customer)
+        self.participant = ChatParticipant.objects.create(project=self.project, user=self.owner)
+        ChatParticipant.objects.create(project=self.project, user=self.sale)
+        auth = AuthService()
+        self.owner_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.owner)['access_token']}"}
+        self.sale_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.sale)['access_token']}"}
+
+        base = timezone.now() - timedelta(hours=1)
+        self.messages = []
+        for minutes in range(4):
+            message = ChatMessage.objects.create(project=self.project, sender=self.sale, message=f'm{minutes}')
+            ChatMessage.objects.filter(id=message.id).update(created_at=base + timedelta(minutes=minutes))
+            self.messages.append(message)
+        self.url = f'/api/projects/{self.project.id}/messages'
+
+    def read_state(self, headers):
+        return [m['is_read'] for m in self.client.get(self.url, **headers).json()]
+
+    def test_read_up_to(self):
+        self.client.post(f'{self.url}/read', {'up_to': str(self.messages[0].id)},
+                         content_type='application/json', **self.owner_headers)  # token version cached
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'{self.url}/read', {'up_to': str(self.messages[2].id)},
+                                        content_type='application/json', **self.owner_headers)
+        self.assertEqual(response.json(), {'success': True, 'unread': 1})
+        self.assertEqual([q['sql'].split()[0] for q in queries.captured_queries].count('UPDATE'), 1)
+        self.assertFalse(ChatMessage.objects.filter(is_read=True).exists())
+
+        self.assertEqual(self.read_state(self.owner_headers), [True, True, True, False])
+        # The sender sees the same messages as read by the owner
+        self.assertEqual(self.read_state(self.sale_headers), [True, True, True, False])
+
+        # Reading an older message never moves the pointer back
+        self.client.post(f'{self.url}/read', {'up_to': str(self.messages[1].id)},
+                         content_type='application/json', **self.owner_headers)
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.last_read_at, ChatMessage.objects.get(id=self.messages[2].id).created_at)
+
+    def test_legacy_endpoint_reads_up_to_message(self):
+        response = self.client.post(f'{self.url}/{self.messages[1].id}/read', **self.owner_headers)
+        self.assertEqual(response.json(), {'success': True})
+        self.assertEqual(self.read_state(self.owner_headers), [True, True, False, False])
+        counts = self.client.get('/api/projects/unread-counts', **self.owner_headers).json()
+        self.assertEqual(counts['total'], 2)
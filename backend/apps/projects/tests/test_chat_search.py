@@ -0,0 +1,69 @@
+"""
+Tests for chat full-text search (SQLite FTS5 under the test settings)
+"""
+from django.test import TestCase, Client
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import ChatMessage, ChatParticipant, Project
+from apps.projects.services.chat_search_service import fts5_query, tsquery
+
+
+class ChatSearchTestCase(TestCase):
+    """Search finds ranked, highlighted messages in the user's project chats only"""
+
+    def setUp(self):
+        self.client = Client()
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        self.other = User.objects.create_user(email='other@test.com', password='x', full_name='Other', role='customer')
+        customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.shop = Project.objects.create(name='Shop', customer=customer)
+        self.blog = Project.objects.create(name='Blog', customer=customer)
+        self.secret = Project.objects.create(name='Secret', customer=customer)
+        for project in (self.shop, self.blog):
+            ChatParticipant.objects.create(project=project, user=self.owner)
+        ChatParticipant.objects.create(project=self.secret, user=self.other)
+
+        self.say(self.shop, 'The invoice for the deposit is attached')
+        self.say(self.shop, 'Invoice invoice: please check the second invoice <b>now</b>')
+        self.say(self.blog, 'Blog invoice draft')
+        self.say(self.secret, 'Secret invoice')
+        self.edited = self.say(self.blog, 'Nothing to see')
+
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {AuthService().issue_tokens(self.owner)['access_token']}"}
+
+    def say(self, project, text):
+        return ChatMessage.objects.create(project=project, sender=self.owner, message=text)
+
+    def search(self, url, **params):
+        response = self.client.get(url, params, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_search_across_projects(self):
+        results = self.search('/api/projects/chat/search', q='invoice')
+        self.assertEqual(len(results), 3)
+        self.assertNotIn('Secret', {r['project_name'] for r in results})
+        # Most occurrences ranks first; the snippet is escaped, hits are marked
+        self.assertTrue(results[0]['message'].startswith('Invoice invoice'))
+        self.assertIn('<mark>Invoice</mark>', results[0]['snippet'])
+        self.assertIn('&lt;b&gt;', results[0]['snippet'])
+
+    def test_search_one_project(self):
+        results = self.search(f'/api/projects/{self.shop.id}/messages/search', q='depos')
+        self.assertEqual([r['message'] for r in results], ['The invoice for the deposit is attached'])
+        self.assertEqual(self.search(f'/api/projects/{self.secret.id}/messages/search', q='invoice'), [])
+        # Query syntax characters are treated as plain words
+        self.assertEqual(len(self.search(f'/api/projects/{self.shop.id}/messages/search', q='invoice" (*')), 2)
+
+    def test_edits_are_indexed(self):
+        self.edited.message = 'Updated invoice wording'
+        self.edited.save()
+        results = self.search(f'/api/projects/{self.blog.id}/messages/search', q='wording')
+        self.assertEqual([r['id'] for r in results], [str(self.edited.id)])
+        self.assertEqual(self.search(f'/api/projects/{self.blog.id}/messages/search', q='nothing'), [])
+
+    def test_backends_build_the_same_prefix_query(self):
+        self.assertEqual(fts5_query('invoice" (de*'), '"invoice" "de"*')
+        self.assertEqual(tsquery("invoice\" (de'*"), "'invoice' & 'de':*")
+        self.assertEqual(tsquery('!?'), '')
@@ -0,0 +1,150 @@
+"""
+Tests for the project chat event stream
+"""
+import asyncio
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, TestCase, Client, AsyncClient
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import ChatMessage, ChatParticipant, Project
+from core.utils.pubsub import RedisBroker, RedisSubscriberHub
+
+
+class ChatStreamTestCase(TestCase):
+    """New messages are pushed to open streams; reconnects resume from Last-Event-ID"""
+
+    def setUp(self):
+        self.client = Client()
+        self.async_client = AsyncClient()
+        self.sale = User.objects.create_user(email='sale@test.com', password='x', full_name='Sale', role='sales')
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        self.stranger = User.objects.create_user(email='other@test.com', password='x', full_name='Other', role='customer')
+        customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.project = Project.objects.create(name='Shop', customer=customer, project_manager=self.sale)
+        ChatParticipant.objects.create(project=self.project, user=self.owner)
+        auth = AuthService()
+        self.owner_token = auth.issue_tokens(self.owner)['access_token']
+        self.owner_ticket = self.ticket(self.owner_token, 'events')
+        self.sale_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.sale)['access_token']}"}
+        self.stranger_token = auth.issue_tokens(self.stranger)['access_token']
+        self.url = f'/api/projects/{self.project.id}/events'
+
+    def ticket(self, token, purpose):
+        response = self.client.post(
+            f'/api/projects/{self.project.id}/tickets', {'purpose': purpose},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['ticket']
+
+    async def open_stream(self, **kwargs):
+        response = await self.async_client.get(self.url, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response, aiter(response.streaming_content)
+
+    async def next_frame(self, stream) -> str:
+        chunk = await asyncio.wait_for(anext(stream), timeout=2)
+        return chunk.decode() if isinstance(chunk, bytes) else chunk
+
+    def send(self, text):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/projects/{self.project.id}/messages', {'message': text},
+                content_type='application/json', **self.sale_headers
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['id']
+
+    async def test_sent_message_is_pushed(self):
+        response, stream = await self.open_stream(headers={'Authorization': f'Bearer {self.owner_token}'})
+        self.assertTrue((await self.next_frame(stream)).startswith('retry:'))
+
+        message_id = await sync_to_async(self.send)('Hello')
+        frame = await self.next_frame(stream)
+        self.assertIn(f'id: {message_id}\nevent: message\n', frame)
+        self.assertIn('"message": "Hello"', frame)
+        await stream.aclose()
+
+    async def test_resume_replays_missed_messages(self):
+        """Test: Last-Event-ID replays what was posted after it, in order"""
+        first, second, third = [await sync_to_async(self.send)(text) for text in ('one', 'two', 'three')]
+
+        response, stream = await self.open_stream(data={'ticket': self.owner_ticket}, headers={'Last-Event-ID': first})
+        await self.next_frame(stream)
+        self.assertIn(f'id: {second}\n', await self.next_frame(stream))
+        self.assertIn(f'id: {third}\n', await self.next_frame(stream))
+        await stream.aclose()
+
+        # An id the server does not know asks the client to reload
+        response, stream = await self.open_stream(data={'ticket': self.owner_ticket, 'last_event_id': 'gone'})
+        await self.next_frame(stream)
+        self.assertTrue((await self.next_frame(stream)).startswith('event: reset'))
+        await stream.aclose()
+
+    async def test_requires_chat_access(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        response = await sync_to_async(self.client.post)(
+            f'/api/projects/{self.project.id}/tickets', {'purpose': 'events'},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {self.stranger_token}'
+        )
+        self.assertEqual(response.status_code, 403)
+        stranger = await sync_to_async(AuthService().get_current_principal)(self.stranger_token)
+        ticket = await sync_to_async(AuthService().issue_ticket)(stranger, 'events', self.project.id)
+        response = await self.async_client.get(self.url, {'ticket': ticket['ticket']})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(await ChatMessage.objects.acount(), 0)
+
+    async def test_query_string_takes_only_tickets(self):
+        """Test: ?ticket= rejects access tokens and tickets for another purpose or project"""
+        other = await Project.objects.acreate(name='Other', customer_id=self.project.customer_id)
+        files_ticket = await sync_to_async(self.ticket)(self.owner_token, 'files')
+        for params, url in (
+            ({'ticket': self.owner_token}, self.url),
+            ({'token': self.owner_token}, self.url),
+            ({'ticket': files_ticket}, self.url),
+            ({'ticket': self.owner_ticket}, f'/api/projects/{other.id}/events'),
+        ):
+            response = await self.async_client.get(url, params)
+            self.assertEqual(response.status_code, 401, params)
+
+
+class FakePubSub:
+    """Stands in for a redis.asyncio PubSub connection"""
+
+    def __init__(self):
+        self.channels = []
+        self.messages = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+
+    async def unsubscribe(self, channel):
+        self.channels.remove(channel)
+
+    async def get_message(self, ignore_subscribe_messages, timeout):
+        try:
+            return await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RedisSubscriberHubTestCase(SimpleTestCase):
+    """All subscribers of a process share one Redis connection"""
+
+    async def test_one_connection_fans_out(self):
+        broker = RedisBroker('redis://unused')
+        pubsub = FakePubSub()
+        broker.hubs[asyncio.get_running_loop()] = RedisSubscriberHub(pubsub)
+
+        async with broker.subscribe('chat:a') as first, broker.subscribe('chat:a') as second:
+            async with broker.subscribe('chat:b') as other:
+                self.assertEqual(pubsub.channels, ['chat:a', 'chat:b'])
+                await pubsub.messages.put({'type': 'message', 'channel': b'chat:a', 'data': b'{"id": 1}'})
+                self.assertEqual(await first.get(timeout=2), {'id': 1})
+                self.assertEqual(await second.get(timeout=2), {'id': 1})
+                self.assertIsNone(await other.get(timeout=0.05))
+            self.assertEqual(pubsub.channels, ['chat:a'])
+        self.assertEqual(pubsub.channels, [])
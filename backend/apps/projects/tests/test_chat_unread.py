@@ -0,0 +1,64 @@
+"""
+Tests for batched chat unread counts
+"""
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import ChatMessage, ChatParticipant, Project
+
+
+class ChatUnreadCountsTestCase(TestCase):
+    """All of a user's unread counts come back from one request and one query"""
+
+    def setUp(self):
+        self.client = Client()
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        self.sale = User.objects.create_user(email='sale@test.com', password='x', full_name='Sale', role='sales')
+        customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.projects = [Project.objects.create(name=f'P{i}', customer=customer, project_manager=self.sale) for i in range(3)]
+        for project in self.projects:
+            ChatParticipant.objects.create(project=project, user=self.owner)
+            ChatParticipant.objects.create(project=project, user=self.sale)
+        auth = AuthService()
+        self.owner_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.owner)['access_token']}"}
+        self.sale_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.sale)['access_token']}"}
+
+    def send(self, project, headers, text='hi'):
+        response = self.client.post(
+            f'/api/projects/{project.id}/messages', {'message': text},
+            content_type='application/json', **headers
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_counts_for_all_projects(self):
+        self.send(self.projects[0], self.sale_headers)
+        self.send(self.projects[0], self.sale_headers)
+        self.send(self.projects[1], self.sale_headers)
+        self.send(self.projects[2], self.owner_headers)
+
+        self.client.get('/api/projects/unread-counts', **self.owner_headers)  # token version cached
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/projects/unread-counts', **self.owner_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.json(), {
+            'counts': {str(self.projects[0].id): 2, str(self.projects[1].id): 1, str(self.projects[2].id): 0},
+            'total': 3,
+        })
+
+        # Replying moves the owner's last_read_at, so project 0 is read
+        self.send(self.projects[0], self.owner_headers)
+        counts = self.client.get('/api/projects/unread-counts', **self.owner_headers).json()['counts']
+        self.assertEqual(counts[str(self.projects[0].id)], 0)
+        response = self.client.get(f'/api/projects/{self.projects[1].id}/unread-count', **self.owner_headers)
+        self.assertEqual(response.json(), {'count': 1})
+        self.assertEqual(ChatMessage.objects.count(), 5)
+
+    def test_non_participant_has_no_counts(self):
+        outsider = User.objects.create_user(email='x@test.com', password='x', full_name='X', role='customer')
+        headers = {'HTTP_AUTHORIZATION': f"Bearer {AuthService().issue_tokens(outsider)['access_token']}"}
+        self.send(self.projects[0], self.sale_headers)
+        self.assertEqual(self.client.get('/api/projects/unread-counts', **headers).json(), {'counts': {}, 'total': 0})
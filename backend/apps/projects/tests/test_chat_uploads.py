@@ -0,0 +1,176 @@
+"""
+Tests for resumable chat uploads and attachments
+"""
+import hashlib
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
+from PIL import Image
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import ChatParticipant, ChatUpload, Project, StoredFile, ThumbnailStatus, UploadStatus
+from apps.projects.services.chat_upload_service import ChatUploadService
+
+
+class ChatUploadTestCase(TestCase):
+    """Chunks append at the reported offset; identical content is stored once"""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        storage_settings = {
+            **settings.STORAGES,
+            'chat_attachments': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': f'{self.tmp}/store'},
+            },
+        }
+        override = override_settings(
+            STORAGES=storage_settings, CHAT_UPLOAD_TEMP_DIR=f'{self.tmp}/partial', CHAT_UPLOAD_CHUNK_SIZE=1024
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.client = Client()
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        self.outsider = User.objects.create_user(email='x@test.com', password='x', full_name='X', role='customer')
+        customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.project = Project.objects.create(name='Shop', customer=customer)
+        ChatParticipant.objects.create(project=self.project, user=self.owner)
+        auth = AuthService()
+        self.token = auth.issue_tokens(self.owner)['access_token']
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {self.token}"}
+        self.outsider_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.outsider)['access_token']}"}
+        self.base = f'/api/projects/{self.project.id}'
+
+    def start(self, filename, size, **extra):
+        return self.client.post(f'{self.base}/uploads', {'filename': filename, 'size': size, **extra},
+                                content_type='application/json', **self.headers)
+
+    def put(self, upload_id, offset, chunk):
+        return self.client.generic('PUT', f'{self.base}/uploads/{upload_id}?offset={offset}', chunk,
+                                   content_type='application/octet-stream', **self.headers)
+
+    def upload(self, filename, content):
+        upload = self.start(filename, len(content)).json()
+        for offset in range(0, len(content), 1024):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.put(upload['id'], offset, content[offset:offset + 1024])
+            self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_chunked_upload_resumes_and_completes(self):
+        content = bytes(range(256)) * 10
+        upload = self.start('notes.bin', len(content)).json()
+        self.assertEqual(upload['received'], 0)
+
+        self.assertEqual(self.put(upload['id'], 0, content[:1024]).json()['received'], 1024)
+        # Repeating a chunk (lost response) is refused with the offset to resume from
+        response = self.put(upload['id'], 0, content[:1024])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.get(f"{self.base}/uploads/{upload['id']}", **self.headers).json()['received'], 1024)
+
+        self.put(upload['id'], 1024, content[1024:2048])
+        done = self.put(upload['id'], 2048, content[2048:]).json()
+        self.assertEqual(done['status'], UploadStatus.COMPLETE)
+        self.assertEqual(done['attachment']['size'], len(content))
+        self.assertFalse(any(Path(f'{self.tmp}/partial').iterdir()))
+
+        response = self.client.get(done['attachment']['url'], **self.headers)
+        self.assertEqual(b''.join(response.streaming_content), content)
+        self.assertEqual(response['ETag'], f'"{hashlib.sha256(content).hexdigest()}"')
+
+    def test_oversized_chunk_and_outsider_rejected(self):
+        upload = self.start('a.bin', 4096).json()
+        self.assertEqual(self.put(upload['id'], 0, b'x' * 2048).status_code, 422)
+        response = self.client.post(f'{self.base}/uploads', {'filename': 'a', 'size': 1},
+                                    content_type='application/json', **self.outsider_headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_identical_content_is_stored_once(self):
+        content = b'same bytes' * 50
+        first = self.upload('a.txt', content)
+        second = self.upload('b.txt', content)
+        self.assertNotEqual(first['attachment']['id'], second['attachment']['id'])
+        self.assertEqual(StoredFile.objects.count(), 1)
+
+        # Declaring the digest skips sending the bytes altogether
+        instant = self.start('c.txt', len(content), sha256=hashlib.sha256(content).hexdigest()).json()
+        self.assertEqual(instant['status'], UploadStatus.COMPLETE)
+        self.assertEqual(instant['attachment']['filename'], 'c.txt')
+
+    def test_digest_dedupe_limited_to_readable_files(self):
+        content = b'private bytes' * 40
+        self.upload('secret.txt', content)
+
+        other_owner = User.objects.create_user(email='b@test.com', password='x', full_name='B', role='customer')
+        other = Project.objects.create(name='Other', customer=Customer.objects.create(user=other_owner, company_name='B'))
+        ChatParticipant.objects.create(project=other, user=self.outsider)
+        response = self.client.post(f'/api/projects/{other.id}/uploads',
+                                    {'filename': 'x.txt', 'size': len(content),
+                                     'sha256': hashlib.sha256(content).hexdigest()},
+                                    content_type='application/json', **self.outsider_headers)
+        # Knowing the digest is not enough outside the project: the bytes must be sent
+        self.assertEqual(response.json()['status'], UploadStatus.OPEN)
+        self.assertEqual(response.json()['received'], 0)
+
+    def test_chunk_refused_while_another_is_written(self):
+        upload = self.start('a.bin', 2048).json()
+        ChatUpload.objects.filter(id=upload['id']).update(writing_until=timezone.now() + timedelta(minutes=1))
+        response = self.put(upload['id'], 0, b'x' * 1024)
+        self.assertEqual(response.status_code, 409)
+
+        # An abandoned claim is taken over
+        ChatUpload.objects.filter(id=upload['id']).update(writing_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.put(upload['id'], 0, b'x' * 1024).json()['received'], 1024)
+        self.assertIsNone(ChatUpload.objects.get(id=upload['id']).writing_until)
+
+    def test_digest_mismatch_fails_upload(self):
+        upload = self.start('a.bin', 3, sha256='0' * 64).json()
+        response = self.put(upload['id'], 0, b'abc')
+        self.assertEqual(response.json()['status'], UploadStatus.FAILED)
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_image_thumbnail_and_message_files(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(buffer, 'PNG')
+        upload = self.upload('photo.png', buffer.getvalue())
+        stored = StoredFile.objects.get()
+        self.assertEqual(stored.thumbnail_status, ThumbnailStatus.DONE)
+
+        attachment_id = upload['attachment']['id']
+        response = self.client.post(f'{self.base}/messages', {'message': 'see', 'attachment_ids': [attachment_id]},
+                                    content_type='application/json', **self.headers)
+        files = response.json()['files']
+        self.assertEqual(files[0]['content_type'], 'image/png')
+
+        # Thumbnails can be loaded as <img src> with a link ticket in the query string
+        ticket = self.client.post(f'{self.base}/tickets', {'purpose': 'files'},
+                                  content_type='application/json', **self.headers).json()['ticket']
+        self.assertEqual(self.client.get(f"{files[0]['thumbnail_url']}&ticket={self.token}").status_code, 401)
+        response = self.client.get(f"{files[0]['thumbnail_url']}&ticket={ticket}")
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        thumb = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertLessEqual(max(thumb.size), 320)
+
+        listed = self.client.get(f'{self.base}/messages', **self.headers).json()
+        self.assertEqual(listed[0]['files'][0]['id'], attachment_id)
+
+        # An attachment goes with one message only
+        response = self.client.post(f'{self.base}/messages', {'message': 'again', 'attachment_ids': [attachment_id]},
+                                    content_type='application/json', **self.headers)
+        self.assertEqual(response.status_code, 422)
+
+    def test_purge_expired(self):
+        upload = ChatUploadService.start(self.project.id, self.owner.id, 'a.bin', 10)
+        ChatUpload.objects.filter(id=upload.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(ChatUploadService.purge_expired(), 1)
+        self.assertFalse(ChatUploadService.temp_path(upload).exists())
@@ -0,0 +1,88 @@
+"""
+Tests for streamed transaction and finance exports
+"""
+import csv
+import io
+import zipfile
+from decimal import Decimal
+from xml.etree import ElementTree
+from django.test import TestCase, Client, AsyncClient
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import Project, Transaction, TransactionType, TransactionStatus
+
+SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+
+class TransactionExportTestCase(TestCase):
+    """Exports stream every row from one query and honour the filters"""
+
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_user(email='admin@test.com', password='x', full_name='Admin', role='admin')
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {AuthService().issue_tokens(self.admin)['access_token']}"}
+        owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Nguyễn Văn A', role='customer')
+        customer = Customer.objects.create(user=owner, company_name='Công ty A')
+        self.project = Project.objects.create(name='Shop', customer=customer)
+        for index in range(25):
+            Transaction.objects.create(
+                project=self.project, customer=owner, amount=Decimal(1000 + index),
+                transaction_type=TransactionType.PHASE if index % 2 else TransactionType.DEPOSIT,
+                status=TransactionStatus.COMPLETED, description='a, "quoted" <note>',
+            )
+
+    def export(self, query):
+        response = self.client.get(f'/api/transactions/transactions/export?{query}', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_csv_export_one_query(self):
+        """Test: all rows with joined columns, streamed from a single query"""
+        response = self.export('format=csv')
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content).decode('utf-8-sig')
+
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0][0], 'transaction_id')
+        self.assertEqual(len(rows), 26)
+        self.assertEqual(rows[1][5], 'Công ty A')
+        self.assertEqual(rows[1][15], 'a, "quoted" <note>')
+
+    async def test_asgi_export_streams_asynchronously(self):
+        """Test: under ASGI the body is an async iterator, so it is not buffered whole"""
+        response = await AsyncClient().get('/api/transactions/transactions/export?format=csv',
+                                           headers={'Authorization': self.headers['HTTP_AUTHORIZATION']})
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode('utf-8-sig')
+        self.assertEqual(len(list(csv.reader(io.StringIO(content)))), 26)
+
+    def test_csv_export_filters(self):
+        """Test: type filter narrows the rows"""
+        response = self.export('format=csv&transaction_type=phase')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 13)
+        self.assertTrue(all(row[8] == 'phase' for row in rows[1:]))
+
+    def test_xlsx_export_is_valid_workbook(self):
+        """Test: XLSX stream is a readable workbook with one row per transaction"""
+        response = self.export('format=xlsx')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+
+        sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        rows = sheet.findall(f'{SHEET_NS}sheetData/{SHEET_NS}row')
+        self.assertEqual(len(rows), 26)
+
+    def test_invalid_format_rejected(self):
+        """Test: unknown format is a 400"""
+        response = self.client.get('/api/transactions/transactions/export?format=pdf', **self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_project_finance_export(self):
+        """Test: per-project finance report streams from the stats table"""
+        response = self.client.get('/api/finance/finance/projects/export?format=csv', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'Shop')
@@ -0,0 +1,102 @@
+"""
+Tests for the incrementally maintained finance aggregates
+"""
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from apps.users.models import User
+from apps.customers.models import Customer
+from apps.projects.models import Project, ProjectStatus, Proposal, ProposalStatus, FinanceTotals
+from apps.projects.services.finance_aggregate_service import FinanceAggregateService
+
+
+class FinanceAggregateTestCase(TestCase):
+    """Payment writes move the totals row; rebuild agrees with it"""
+
+    def setUp(self):
+        self.sale = User.objects.create_user(email='sale@test.com', password='x', full_name='Sale', role='sale')
+        owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        customer = Customer.objects.create(user=owner, company_name='Owner Co')
+        self.project = Project.objects.create(name='Shop', customer=customer, project_manager=self.sale)
+        self.proposal = Proposal.objects.create(
+            project=self.project,
+            created_by=self.sale,
+            status=ProposalStatus.ACCEPTED,
+            deposit_amount=Decimal('500000'),
+            phases=[
+                {'name': 'Design', 'amount': 1000000},
+                {'name': 'Build', 'amount': 2000000},
+            ]
+        )
+        FinanceAggregateService.rebuild()
+
+    def totals(self):
+        return FinanceTotals.objects.get(pk=FinanceTotals.SINGLETON_ID)
+
+    def test_deposit_and_phase_payments_update_totals(self):
+        """Test: deposit and phase approval are reflected without a rebuild"""
+        self.assertEqual(self.totals().deposit_pending_amount, Decimal('500000'))
+
+        self.proposal.deposit_paid = True
+        self.proposal.save()
+        self.project.status = ProjectStatus.IN_PROGRESS
+        self.project.save()
+
+        totals = self.totals()
+        self.assertEqual(totals.deposit_paid_count, 1)
+        self.assertEqual(totals.deposit_paid_amount, Decimal('500000'))
+        self.assertEqual(totals.pending_revenue, Decimal('3000000'))
+        self.assertEqual(totals.in_progress_projects, 1)
+
+        for phase in self.proposal.phase_items.all():
+            phase.completed = True
+            phase.payment_approved = True
+            phase.save()
+        self.project.status = ProjectStatus.COMPLETED
+        self.project.save()
+
+        totals = self.totals()
+        self.assertEqual(totals.phases_paid, 2)
+        self.assertEqual(totals.pending_revenue, Decimal('0'))
+        self.assertEqual(totals.completed_deposit_revenue + totals.completed_phase_revenue, Decimal('3500000'))
+        self.assertEqual(totals.in_progress_projects, 0)
+
+        call_command('rebuild_finance_aggregates', '--check', stdout=StringIO())
+
+    def test_project_save_without_status_change_skips_finance(self):
+        """Test: edits that leave the status alone do not touch the aggregates"""
+        with self.assertNumQueries(1):
+            self.project.save(update_fields=['name'])
+        self.project.description = 'New brief'
+        self.project.save()
+        self.assertEqual(self.totals().total_projects, 1)
+
+    def test_status_changes_match_rebuild(self):
+        """Test: completing and reopening a project apply the same totals a rebuild computes"""
+        self.proposal.deposit_paid = True
+        self.proposal.save()
+        for status in (ProjectStatus.IN_PROGRESS, ProjectStatus.COMPLETED, ProjectStatus.IN_PROGRESS):
+            self.project.status = status
+            self.project.save()
+            call_command('rebuild_finance_aggregates', '--check', stdout=StringIO())
+        self.assertEqual(self.totals().pending_revenue, Decimal('3000000'))
+
+        Project.objects.create(name='New', customer=self.project.customer, status=ProjectStatus.IN_PROGRESS)
+        self.assertEqual((self.totals().total_projects, self.totals().in_progress_projects), (2, 2))
+        call_command('rebuild_finance_aggregates', '--check', stdout=StringIO())
+
+    def test_project_delete_removes_contribution(self):
+        """Test: deleting a project subtracts it from the totals"""
+        self.project.delete()
+
+        totals = self.totals()
+        self.assertEqual(totals.total_projects, 0)
+        self.assertEqual(totals.accepted_proposals, 0)
+        self.assertEqual(totals.deposit_pending_amount, Decimal('0'))
+
+    def test_dashboard_reads_single_row(self):
+        """Test: totals lookup is one query once built"""
+        with self.assertNumQueries(1):
+            totals = FinanceAggregateService.get_totals()
+        self.assertEqual(totals.total_projects, 1)
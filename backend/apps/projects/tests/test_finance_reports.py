@@ -0,0 +1,195 @@
+"""
+Tests for the admin finance report endpoints
+"""
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+from django.test import TestCase, Client
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import Project, Transaction, TransactionType, TransactionStatus
+from apps.projects.services.customer_leaderboard import CustomerLeaderboard
+
+LOCAL_TZ = ZoneInfo('Asia/Ho_Chi_Minh')
+
+
+class RevenueByPeriodTestCase(TestCase):
+    """Revenue is bucketed by local completion time with zero-filled gaps"""
+
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_user(email='admin@test.com', password='x', full_name='Admin', role='admin')
+        owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        customer = Customer.objects.create(user=owner, company_name='Owner Co')
+        self.project = Project.objects.create(name='Shop', customer=customer)
+        self.owner = owner
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {AuthService().issue_tokens(self.admin)['access_token']}"}
+
+    def add_transaction(self, amount, completed_at, transaction_type=TransactionType.DEPOSIT,
+                        status=TransactionStatus.COMPLETED):
+        return Transaction.objects.create(
+            project=self.project,
+            customer=self.owner,
+            transaction_type=transaction_type,
+            status=status,
+            amount=Decimal(amount),
+            completed_at=completed_at,
+        )
+
+    def test_monthly_buckets_use_local_time(self):
+        """Test: 23:30 and 00:30 local on a month boundary land in different months"""
+        self.add_transaction(100, datetime(2025, 1, 31, 23, 30, tzinfo=LOCAL_TZ))
+        self.add_transaction(200, datetime(2025, 2, 1, 0, 30, tzinfo=LOCAL_TZ), TransactionType.PHASE)
+        self.add_transaction(50, datetime(2025, 2, 10, tzinfo=LOCAL_TZ), TransactionType.REFUND)
+        self.add_transaction(999, datetime(2025, 2, 11, tzinfo=LOCAL_TZ), status=TransactionStatus.PENDING)
+
+        response = self.client.get(
+            '/api/finance/finance/revenue-by-period?period=month&start_date=2024-12-15&end_date=2025-03-31',
+            **self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+
+        self.assertEqual(
+            [(b['period_start'], b['revenue'], b['refunded']) for b in body['data']],
+            [('2024-12-01', 0, 0), ('2025-01-01', 100, 0), ('2025-02-01', 200, 50), ('2025-03-01', 0, 0)]
+        )
+        self.assertEqual(body['total_revenue'], 300)
+        self.assertEqual(body['net_revenue'], 250)
+        self.assertEqual(body['transaction_count'], 3)
+
+    def test_daily_series_is_dense(self):
+        """Test: every day in the range is present"""
+        self.add_transaction(100, datetime(2025, 1, 3, 12, tzinfo=LOCAL_TZ))
+
+        response = self.client.get(
+            '/api/finance/finance/revenue-by-period?period=day&start_date=2025-01-01&end_date=2025-01-05',
+            **self.headers
+        )
+        data = response.json()['data']
+        self.assertEqual([b['period_start'] for b in data], [f'2025-01-0{d}' for d in range(1, 6)])
+        self.assertEqual([b['revenue'] for b in data], [0, 0, 100, 0, 0])
+
+    def test_invalid_period_rejected(self):
+        """Test: unknown period is a 400"""
+        response = self.client.get('/api/finance/finance/revenue-by-period?period=hour', **self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+class FakeSortedSetRedis:
+    """Just enough of a Redis client for the leaderboard"""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def rename(self, src, dst):
+        self.data[dst] = self.data.pop(src)
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, member):
+        self.data.get(key, {}).pop(member, None)
+
+    def zcard(self, key):
+        return len(self.data.get(key, {}))
+
+    def zrevrange(self, key, start, end, withscores=False):
+        ranked = sorted(self.data.get(key, {}).items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return ranked[start:end + 1]
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return queue
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class TopCustomersTestCase(TestCase):
+    """Ranking is one GROUP BY, served from a sorted set when Redis is available"""
+
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_user(email='admin@test.com', password='x', full_name='Admin', role='admin')
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {AuthService().issue_tokens(self.admin)['access_token']}"}
+        self.customers = []
+        for index, amounts in enumerate([(100, 50), (400,), (300,)]):
+            user = User.objects.create_user(
+                email=f'c{index}@test.com', password='x', full_name=f'C{index}', role='customer'
+            )
+            customer = Customer.objects.create(user=user, company_name=f'Company {index}')
+            self.customers.append(customer)
+            for amount in amounts:
+                project = Project.objects.create(name=f'P{index}-{amount}', customer=customer)
+                Transaction.objects.create(
+                    project=project, customer=user, amount=Decimal(amount),
+                    status=TransactionStatus.COMPLETED, transaction_type=TransactionType.DEPOSIT,
+                )
+
+    def get_page(self, **params):
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        response = self.client.get(f'/api/finance/finance/top-customers?{query}', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranking_and_pagination(self):
+        """Test: customers ordered by revenue, second page continues the ranking"""
+        body = self.get_page(limit=2)
+        self.assertEqual(body['total_customers'], 3)
+        self.assertEqual([c['customer_name'] for c in body['top_customers']], ['Company 1', 'Company 2'])
+
+        body = self.get_page(limit=2, offset=2)
+        self.assertEqual(body['top_customers'][0]['customer_name'], 'Company 0')
+        self.assertEqual(body['top_customers'][0]['total_revenue'], 150)
+        self.assertEqual(body['top_customers'][0]['project_count'], 2)
+
+    def test_refund_lowers_rank(self):
+        """Test: completed refunds are subtracted from revenue"""
+        customer = self.customers[1]
+        Transaction.objects.create(
+            project=customer.projects.first(), customer=customer.user, amount=Decimal(350),
+            status=TransactionStatus.COMPLETED, transaction_type=TransactionType.REFUND,
+        )
+        body = self.get_page(limit=3)
+        self.assertEqual([c['customer_name'] for c in body['top_customers']], ['Company 2', 'Company 0', 'Company 1'])
+
+    def test_sorted_set_updated_on_transaction(self):
+        """Test: with Redis the ranking comes from the set and is re-scored on commit"""
+        redis = FakeSortedSetRedis()
+        with patch.object(CustomerLeaderboard, '_redis', return_value=redis):
+            body = self.get_page(limit=1)
+            self.assertEqual(body['top_customers'][0]['customer_name'], 'Company 1')
+            self.assertEqual(redis.zcard(CustomerLeaderboard.key), 3)
+
+            customer = self.customers[0]
+            with self.captureOnCommitCallbacks(execute=True):
+                Transaction.objects.create(
+                    project=customer.projects.first(), customer=customer.user, amount=Decimal(1000),
+                    status=TransactionStatus.COMPLETED, transaction_type=TransactionType.PHASE,
+                )
+
+            body = self.get_page(limit=1)
+            self.assertEqual(body['top_customers'][0]['customer_name'], 'Company 0')
+            self.assertEqual(body['top_customers'][0]['total_revenue'], 1150)
@@ -0,0 +1,101 @@
+"""
+Tests for Idempotency-Key handling on payment endpoints
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import (
+    IdempotencyKey,
+    IdempotencyState,
+    Project,
+    Proposal,
+    ProposalStatus,
+    Transaction,
+)
+
+
+class IdempotencyTestCase(TestCase):
+    """Retries with the same key replay the first response instead of paying twice"""
+
+    def setUp(self):
+        self.client = Client()
+        self.sale = User.objects.create_user(email='sale@test.com', password='x', full_name='Sale', role='sales')
+        self.admin = User.objects.create_user(email='admin@test.com', password='x', full_name='Admin', role='admin')
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.project = Project.objects.create(name='Shop', customer=customer, project_manager=self.sale)
+        self.proposal = Proposal.objects.create(
+            project=self.project,
+            created_by=self.sale,
+            status=ProposalStatus.ACCEPTED,
+            deposit_amount=Decimal('5000000'),
+            phases=[{'name': 'Build', 'days': 10, 'amount': 5000000}],
+        )
+        auth = AuthService()
+        self.owner_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.owner)['access_token']}"}
+        self.admin_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.admin)['access_token']}"}
+
+    def submit_deposit(self, key=None):
+        headers = dict(self.owner_headers)
+        if key:
+            headers['HTTP_IDEMPOTENCY_KEY'] = key
+        return self.client.post(f'/api/proposals/{self.proposal.id}/submit-payment', **headers)
+
+    def manual_transaction(self, amount, key):
+        return self.client.post(
+            '/api/transactions/transactions/manual',
+            data={'project_id': str(self.project.id), 'transaction_type': 'adjustment', 'amount': amount},
+            content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key,
+            **self.admin_headers
+        )
+
+    def test_retry_replays_first_response(self):
+        """Test: same key twice runs the deposit workflow once and returns the same body"""
+        first = self.submit_deposit('deposit-1')
+        second = self.submit_deposit('deposit-1')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(Transaction.objects.filter(proposal=self.proposal).count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().state, IdempotencyState.COMPLETED)
+
+        # Without a key the retry runs again and is rejected by the workflow itself
+        self.assertEqual(self.submit_deposit().status_code, 400)
+
+    def test_key_reused_for_different_request(self):
+        """Test: same key with a different body is rejected"""
+        self.assertEqual(self.manual_transaction(1000, 'manual-1').status_code, 200)
+        self.assertEqual(self.manual_transaction(2000, 'manual-1').status_code, 422)
+        self.assertEqual(Transaction.objects.filter(project=self.project).count(), 1)
+
+    def test_failed_request_releases_key(self):
+        """Test: an error response is not stored, so the retry runs normally"""
+        Proposal.objects.filter(id=self.proposal.id).update(status=ProposalStatus.SENT)
+        self.assertEqual(self.submit_deposit('deposit-2').status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        Proposal.objects.filter(id=self.proposal.id).update(status=ProposalStatus.ACCEPTED)
+        self.assertEqual(self.submit_deposit('deposit-2').status_code, 200)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0.1)
+    def test_in_flight_duplicate_waits_then_conflicts(self):
+        """Test: a duplicate of a request still running gets 409 once the wait times out"""
+        first = self.submit_deposit('deposit-3')
+        IdempotencyKey.objects.update(
+            state=IdempotencyState.IN_PROGRESS,
+            locked_until=timezone.now() + timedelta(minutes=1),
+        )
+        self.assertEqual(self.submit_deposit('deposit-3').status_code, 409)
+
+        # An abandoned claim (lock expired) is taken over by the retry
+        IdempotencyKey.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        Proposal.objects.filter(id=self.proposal.id).update(deposit_paid=False)
+        retry = self.submit_deposit('deposit-3')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json()['id'], first.json()['id'])
@@ -0,0 +1,136 @@
+"""
+Tests for the double-entry transaction ledger
+"""
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import (
+    LedgerBalance,
+    LedgerEntry,
+    LedgerScope,
+    Project,
+    Transaction,
+    TransactionStatus,
+    TransactionType,
+)
+from apps.projects.models.ledger import AppendOnlyError
+from apps.projects.services.ledger_service import LedgerService
+
+
+class LedgerTestCase(TestCase):
+    """Every transaction change appends balanced entries; balances are one row"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        self.customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.project = Project.objects.create(name='Shop', customer=self.customer)
+
+    def create(self, transaction_type, amount, status=TransactionStatus.COMPLETED):
+        return Transaction.objects.create(
+            project=self.project, customer=self.owner, transaction_type=transaction_type,
+            amount=Decimal(amount), status=status,
+        )
+
+    def balance(self, scope=LedgerScope.PROJECT):
+        owner = self.project.id if scope == LedgerScope.PROJECT else self.customer.id
+        return LedgerBalance.objects.get(scope=scope, owner_id=owner)
+
+    def test_state_changes_post_differences(self):
+        """Test: pending -> completed -> amount change -> refund -> delete"""
+        payment = self.create(TransactionType.PHASE, 1000, TransactionStatus.PENDING)
+        self.assertEqual(self.balance().pending, Decimal('1000'))
+
+        payment.mark_completed()
+        balance = self.balance()
+        self.assertEqual((balance.pending, balance.received, balance.cash), (0, Decimal('1000'), Decimal('1000')))
+
+        payment.amount = Decimal(1500)
+        payment.save()
+        self.assertEqual(LedgerEntry.objects.filter(transaction=payment).last().amount, Decimal('500'))
+
+        refund = self.create(TransactionType.REFUND, 300)
+        balance = self.balance()
+        self.assertEqual((balance.refunded, balance.net_received, balance.cash), (Decimal('300'), Decimal('1200'), Decimal('1200')))
+        self.assertEqual(self.balance(LedgerScope.CUSTOMER).cash, Decimal('1200'))
+
+        # Saving without a change posts nothing
+        count = LedgerEntry.objects.count()
+        payment.save()
+        self.assertEqual(LedgerEntry.objects.count(), count)
+
+        refund.delete()
+        self.assertEqual(self.balance().cash, Decimal('1500'))
+        self.assertEqual(LedgerService.verify()['drifted_transactions'], [])
+
+    def test_backfill_posts_pre_ledger_history(self):
+        """Test: transactions from before the ledger count towards balances once new ones are posted"""
+        history = [
+            Transaction(project=self.project, customer=self.owner, transaction_type=transaction_type,
+                        amount=Decimal(amount), status=TransactionStatus.COMPLETED)
+            for transaction_type, amount in ((TransactionType.DEPOSIT, 600), (TransactionType.PHASE, 400))
+        ]
+        Transaction.objects.bulk_create(history)  # no signals: as if written before the ledger existed
+        self.assertFalse(LedgerEntry.objects.exists())
+
+        import_module('apps.projects.migrations.0030_backfill_ledger').backfill_ledger(apps, None)
+        self.create(TransactionType.PHASE, 500)
+
+        self.assertEqual(LedgerService.project_balance(self.project.id).received, Decimal('1500'))
+        self.assertEqual(LedgerService.customer_balance(self.customer.id).received, Decimal('1500'))
+        report = LedgerService.verify()
+        self.assertEqual((report['drifted_transactions'], report['balance_mismatches']), ([], []))
+
+        # Running it again posts nothing
+        import_module('apps.projects.migrations.0030_backfill_ledger').backfill_ledger(apps, None)
+        self.assertEqual(LedgerEntry.objects.count(), 3)
+
+    def test_entries_are_append_only(self):
+        self.create(TransactionType.DEPOSIT, 1000)
+        entry = LedgerEntry.objects.get()
+        entry.amount = Decimal(1)
+        with self.assertRaises(AppendOnlyError):
+            entry.save()
+        with self.assertRaises(AppendOnlyError):
+            entry.delete()
+
+    def test_verify_detects_and_repairs(self):
+        """Test: a tampered balance and a missed bulk write are found and repaired"""
+        self.create(TransactionType.DEPOSIT, 1000)
+        call_command('verify_ledger', stdout=StringIO())
+
+        LedgerBalance.objects.filter(scope=LedgerScope.PROJECT).update(cash=Decimal(1))
+        Transaction.objects.bulk_create([Transaction(
+            project=self.project, customer=self.owner, transaction_type=TransactionType.PHASE,
+            amount=Decimal(2000), status=TransactionStatus.COMPLETED,
+        )])
+        with self.assertRaises(CommandError):
+            call_command('verify_ledger', stdout=StringIO())
+
+        call_command('verify_ledger', '--repair', stdout=StringIO())
+        call_command('verify_ledger', stdout=StringIO())
+        self.assertEqual(self.balance().cash, Decimal('3000'))
+
+    def test_financial_summary_reads_balance(self):
+        """Test: project financial summary totals come from the ledger balance"""
+        admin = User.objects.create_user(email='admin@test.com', password='x', full_name='Admin', role='admin')
+        headers = {'HTTP_AUTHORIZATION': f"Bearer {AuthService().issue_tokens(admin)['access_token']}"}
+        self.create(TransactionType.DEPOSIT, 1000)
+        self.create(TransactionType.PHASE, 2000)
+        self.create(TransactionType.REFUND, 500)
+        self.create(TransactionType.PHASE, 700, TransactionStatus.PENDING)
+
+        response = self.client.get(f'/api/transactions/projects/{self.project.id}/financial-summary', **headers)
+        self.assertEqual(response.status_code, 200)
+        summary = response.json()['financial_summary']
+        self.assertEqual(summary['total_received'], 3000)
+        self.assertEqual(summary['total_refunded'], 500)
+        self.assertEqual(summary['net_received'], 2500)
+        self.assertEqual(summary['awaiting_confirmation'], 700)
+        self.assertEqual(response.json()['transaction_summary'], {'total_transactions': 4, 'completed': 3, 'pending': 1, 'failed': 0})
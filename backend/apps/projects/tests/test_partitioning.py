@@ -0,0 +1,49 @@
+"""
+Tests for the monthly partitioning helpers behind partition_transactions
+The DDL itself needs PostgreSQL; these cover the pieces that do not.
+"""
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from core.database.partitioning import MonthlyPartitioner, add_months, month_bound, range_clause
+
+
+class MonthlyPartitionerTestCase(SimpleTestCase):
+
+    def test_month_arithmetic(self):
+        self.assertEqual(add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+
+    def test_bounds_follow_local_months(self):
+        """Test: partition bounds are local midnight (Asia/Ho_Chi_Minh), like the revenue buckets"""
+        self.assertEqual(month_bound(date(2024, 3, 1)), '2024-03-01T00:00:00+07:00')
+        self.assertEqual(
+            range_clause(date(2024, 12, 1)),
+            "FOR VALUES FROM ('2024-12-01T00:00:00+07:00') TO ('2025-01-01T00:00:00+07:00')"
+        )
+
+    def test_unique_index_retargeted_to_partition(self):
+        """Test: a unique index definition is rewritten for one partition"""
+        partitioner = MonthlyPartitioner('transactions')
+        definition = (
+            "CREATE UNIQUE INDEX uniq_completed_payment ON public.transactions USING btree "
+            "(project_id, proposal_id) WHERE ((status)::text = 'completed'::text)"
+        )
+        self.assertEqual(
+            partitioner._retarget(definition, 'transactions_p2024_03_uniq_completed_payment', 'transactions_p2024_03', True),
+            "CREATE UNIQUE INDEX IF NOT EXISTS transactions_p2024_03_uniq_completed_payment ON transactions_p2024_03 "
+            "USING btree (project_id, proposal_id) WHERE ((status)::text = 'completed'::text)"
+        )
+        self.assertEqual(partitioner.partition_name(date(2024, 3, 1)), 'transactions_p2024_03')
+
+
+class PartitionCommandTestCase(TestCase):
+
+    def test_requires_postgresql(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest('Runs against a non-PostgreSQL test database')
+        with self.assertRaisesMessage(CommandError, 'requires PostgreSQL'):
+            call_command('partition_transactions', '--dry-run', stdout=StringIO())
@@ -0,0 +1,117 @@
+"""
+Tests for the completed-payment upsert behind deposit/phase approvals
+"""
+import threading
+from decimal import Decimal
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from apps.users.models import User
+from apps.customers.models import Customer
+from apps.projects.models import (
+    LedgerEntry,
+    Project,
+    Proposal,
+    ProposalStatus,
+    Transaction,
+    TransactionStatus,
+    TransactionType,
+)
+from apps.projects.routers.proposal_router import record_payment_transaction
+
+
+def create_proposal():
+    sale = User.objects.create_user(email='sale@test.com', password='x', full_name='Sale', role='sales')
+    owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+    customer = Customer.objects.create(user=owner, company_name='Owner Co')
+    project = Project.objects.create(name='Shop', customer=customer, project_manager=sale)
+    return Proposal.objects.create(project=project, created_by=sale, status=ProposalStatus.ACCEPTED)
+
+
+def record_phase(proposal, amount, **kwargs):
+    return record_payment_transaction(
+        project=proposal.project,
+        proposal=proposal,
+        transaction_type=TransactionType.PHASE,
+        amount=Decimal(amount),
+        phase_index=0,
+        phase_name='Design',
+        **kwargs
+    )
+
+
+class RecordPaymentTransactionTestCase(TestCase):
+    """One completed row per deposit/phase, updated in place on repeat approvals"""
+
+    def setUp(self):
+        self.proposal = create_proposal()
+
+    def test_repeat_updates_single_row(self):
+        """Test: second call updates the row and merges metadata"""
+        first = record_phase(self.proposal, 1000, metadata={'source': 'submit'})
+        second = record_phase(self.proposal, 1500, metadata={'approved': True})
+
+        self.assertEqual(first.id, second.id)
+        row = Transaction.objects.get()
+        self.assertEqual(row.amount, Decimal('1500'))
+        self.assertEqual(row.metadata, {'source': 'submit', 'approved': True})
+
+    def test_inserted_row_is_posted_to_ledger(self):
+        """Test: the upsert's INSERT sends no post_save, yet the ledger gets the payment"""
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = record_phase(self.proposal, 1000)
+        self.assertTrue(LedgerEntry.objects.filter(transaction_id=payment.id).exists())
+
+    def test_pending_row_is_completed(self):
+        """Test: an existing pending row is upgraded instead of duplicated"""
+        pending = Transaction.objects.create(
+            project=self.proposal.project, proposal=self.proposal, customer=self.proposal.project.customer.user,
+            transaction_type=TransactionType.PHASE, phase_index=0, amount=Decimal(1000),
+        )
+        self.assertEqual(record_phase(self.proposal, 1000).id, pending.id)
+        self.assertEqual(Transaction.objects.get().status, TransactionStatus.COMPLETED)
+
+    def test_constraint_rejects_second_completed_payment(self):
+        """Test: the database refuses a duplicate completed deposit, but not refunds"""
+        fields = {
+            'project': self.proposal.project, 'proposal': self.proposal,
+            'customer': self.proposal.project.customer.user, 'amount': Decimal(1000),
+            'status': TransactionStatus.COMPLETED,
+        }
+        Transaction.objects.create(transaction_type=TransactionType.DEPOSIT, **fields)
+        Transaction.objects.create(transaction_type=TransactionType.REFUND, **fields)
+        Transaction.objects.create(transaction_type=TransactionType.REFUND, **fields)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Transaction.objects.create(transaction_type=TransactionType.DEPOSIT, **fields)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class RecordPaymentTransactionConcurrencyTestCase(TransactionTestCase):
+    """Concurrent approvals of the same phase end with exactly one completed row"""
+
+    THREADS = 16
+
+    def test_concurrent_calls_create_one_row(self):
+        proposal = create_proposal()
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def approve(amount):
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    record_phase(proposal, amount, metadata={f'call_{amount}': True})
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=approve, args=(1000 + i,)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        row = Transaction.objects.get(proposal=proposal)
+        self.assertEqual(row.status, TransactionStatus.COMPLETED)
+        self.assertEqual(len(row.metadata), self.THREADS)
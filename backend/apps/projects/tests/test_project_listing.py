@@ -0,0 +1,82 @@
+"""
+Tests for the paginated, projection-limited project lists
+"""
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import Project
+
+
+class ProjectListingTestCase(TestCase):
+    """Pages follow (created_at, id); ?fields= limits the output and the columns read"""
+
+    def setUp(self):
+        self.client = Client()
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        self.admin = User.objects.create_user(email='admin@test.com', password='x', full_name='Admin', role='admin')
+        self.dev = User.objects.create_user(email='dev@test.com', password='x', full_name='Dev', role='developer')
+        self.customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.projects = [
+            Project.objects.create(name=f'P{index}', customer=self.customer, project_manager=self.admin,
+                                   description='long text' * 100)
+            for index in range(5)
+        ]
+        for project in self.projects[:3]:
+            project.team_members.add(self.dev)
+        auth = AuthService()
+        self.owner_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.owner)['access_token']}"}
+        self.admin_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.admin)['access_token']}"}
+        self.dev_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.dev)['access_token']}"}
+
+    def test_full_rows_and_keyset_pages(self):
+        response = self.client.get('/api/projects', {'page_size': 2}, **self.owner_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Has-More'], 'true')
+        first = response.json()
+        self.assertEqual([row['name'] for row in first], ['P4', 'P3'])
+        self.assertEqual(first[0]['customer'], {
+            'id': str(self.customer.id),
+            'company_name': 'Owner Co', 'user_email': 'owner@test.com', 'user_name': 'Owner',
+        })
+        self.assertEqual(first[0]['project_manager']['email'], 'admin@test.com')
+
+        names = [row['name'] for row in first]
+        cursor = response['X-Next-Cursor']
+        while cursor:
+            response = self.client.get('/api/projects', {'page_size': 2, 'cursor': cursor}, **self.owner_headers)
+            names += [row['name'] for row in response.json()]
+            cursor = response.get('X-Next-Cursor')
+        self.assertEqual(names, ['P4', 'P3', 'P2', 'P1', 'P0'])
+
+    def test_sparse_fields_load_only_their_columns(self):
+        self.client.get('/api/projects/all', **self.admin_headers)  # warm the token cache
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/projects/all', {'fields': 'name,id'}, **self.admin_headers)
+        self.assertEqual(response.json()[0], {'id': str(self.projects[-1].id), 'name': 'P4'})
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertNotIn('description', sql)
+        self.assertNotIn('customers', sql)
+
+        response = self.client.get('/api/projects/all', {'fields': 'name,budget'}, **self.admin_headers)
+        self.assertEqual(response.status_code, 422)
+
+    def test_full_list_skips_heavy_columns(self):
+        self.client.get('/api/projects/all', **self.admin_headers)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/projects/all', **self.admin_headers)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0]['sql'])
+        self.assertNotIn('repository_url', queries[0]['sql'])
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get('/api/projects', **self.owner_headers)
+        self.assertEqual(len(response.json()), 5)
+        self.assertEqual(response['X-Has-More'], 'false')
+
+    def test_developer_sees_assigned_projects_once(self):
+        rows = self.client.get('/api/projects', {'fields': 'name'}, **self.dev_headers).json()
+        self.assertEqual([row['name'] for row in rows], ['P2', 'P1', 'P0'])
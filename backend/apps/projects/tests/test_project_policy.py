@@ -0,0 +1,65 @@
+"""
+Tests for the project ownership policy and compiled role sets
+"""
+from django.test import TestCase
+from ninja.errors import HttpError
+from django.http import Http404
+from apps.users.models import User
+from apps.users.permissions import RoleSet
+from apps.customers.models import Customer
+from apps.projects.models import Project, Proposal
+from apps.projects.permissions import proposal_policy, project_finance_policy
+
+
+class ProjectPolicyTestCase(TestCase):
+    """Ownership is decided inside the lookup query"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        self.other = User.objects.create_user(email='other@test.com', password='x', full_name='Other', role='customer')
+        self.sale = User.objects.create_user(email='sale@test.com', password='x', full_name='Sale', role='sale')
+        self.admin = User.objects.create_user(email='admin@test.com', password='x', full_name='Admin', role='admin')
+        customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.project = Project.objects.create(name='Shop', customer=customer, project_manager=self.sale)
+        self.proposal = Proposal.objects.create(project=self.project, created_by=self.sale)
+
+    def test_owner_allowed_in_one_query(self):
+        """Test: owner fetch + ownership check is a single query"""
+        with self.assertNumQueries(1):
+            proposal = proposal_policy.get_or_403(
+                Proposal.objects.select_related('project'), self.owner, id=self.proposal.id
+            )
+            self.assertEqual(proposal.project.name, 'Shop')
+
+    def test_other_customer_forbidden(self):
+        """Test: another customer gets 403, unknown id gets 404"""
+        with self.assertRaises(HttpError) as ctx:
+            proposal_policy.get_or_403(Proposal.objects.all(), self.other, id=self.proposal.id)
+        self.assertEqual(ctx.exception.status_code, 403)
+
+        with self.assertRaises(Http404):
+            proposal_policy.get_or_403(Proposal.objects.all(), self.owner, id=self.sale.id)
+
+    def test_sales_must_manage_for_finance(self):
+        """Test: finance policy restricts sales to managed projects"""
+        other_sale = User.objects.create_user(email='sale2@test.com', password='x', full_name='Sale 2', role='sales')
+        project = project_finance_policy.get_or_403(Project.objects.all(), self.sale, id=self.project.id)
+        self.assertEqual(project.id, self.project.id)
+
+        with self.assertRaises(HttpError):
+            project_finance_policy.get_or_403(Project.objects.all(), other_sale, id=self.project.id)
+
+    def test_scope_filters_queryset(self):
+        """Test: scope() returns only the user's rows; admin is unrestricted"""
+        self.assertEqual(proposal_policy.scope(Proposal.objects.all(), self.other).count(), 0)
+        self.assertEqual(proposal_policy.scope(Proposal.objects.all(), self.owner).count(), 1)
+        self.assertEqual(proposal_policy.scope(Proposal.objects.all(), self.admin).count(), 1)
+
+    def test_role_set_normalizes_once(self):
+        """Test: aliases and no_admin are resolved at declaration"""
+        role_set = RoleSet(('sales', 'developer'))
+        self.assertTrue(role_set.allows('sale'))
+        self.assertTrue(role_set.allows('dev'))
+        self.assertTrue(role_set.allows('admin'))
+        self.assertFalse(role_set.allows('customer'))
+        self.assertFalse(RoleSet(('customer', 'no_admin')).allows('admin'))
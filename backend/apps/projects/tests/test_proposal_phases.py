@@ -0,0 +1,86 @@
+"""
+Tests for ProposalPhase rows behind Proposal.phases
+"""
+from decimal import Decimal
+from django.test import TestCase, Client
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import Project, ProjectStatus, Proposal, ProposalPhase, ProposalStatus
+
+
+class ProposalPhaseTestCase(TestCase):
+    """Phase payment endpoints update phase rows; the API shape is unchanged"""
+
+    def setUp(self):
+        self.client = Client()
+        self.sale = User.objects.create_user(email='sale@test.com', password='x', full_name='Sale', role='sales')
+        self.owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        customer = Customer.objects.create(user=self.owner, company_name='Owner Co')
+        self.project = Project.objects.create(
+            name='Shop', customer=customer, project_manager=self.sale, status=ProjectStatus.IN_PROGRESS
+        )
+        self.proposal = Proposal.objects.create(
+            project=self.project,
+            created_by=self.sale,
+            status=ProposalStatus.ACCEPTED,
+            deposit_paid=True,
+            phases=[
+                {'name': 'Design', 'days': 10, 'amount': 1000000, 'tasks': 'Mockups'},
+                {'name': 'Build', 'days': 20, 'amount': 2000000, 'tasks': 'Code', 'notes': 'legacy key'},
+            ]
+        )
+        auth = AuthService()
+        self.sale_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.sale)['access_token']}"}
+        self.owner_headers = {'HTTP_AUTHORIZATION': f"Bearer {auth.issue_tokens(self.owner)['access_token']}"}
+
+    def test_phases_round_trip_in_legacy_shape(self):
+        """Test: phases list is stored as rows and read back as dicts"""
+        self.assertEqual(ProposalPhase.objects.filter(proposal=self.proposal).count(), 2)
+
+        phases = Proposal.objects.get(id=self.proposal.id).phases
+        self.assertEqual([p['name'] for p in phases], ['Design', 'Build'])
+        self.assertEqual(phases[0]['amount'], 1000000)
+        self.assertIsInstance(phases[0]['amount'], int)
+        self.assertFalse(phases[0]['payment_approved'])
+        self.assertIsNone(phases[0]['payment_approved_at'])
+        self.assertEqual(phases[1]['notes'], 'legacy key')
+
+    def test_fractional_amount_kept_exact(self):
+        """Test: amounts with a fractional part come back as exact strings, not floats"""
+        ProposalPhase.objects.filter(proposal=self.proposal, index=1).update(amount=Decimal('1234567.89'))
+        self.assertEqual(Proposal.objects.get(id=self.proposal.id).phases[1]['amount'], '1234567.89')
+
+    def test_phase_flow_updates_rows_only(self):
+        """Test: complete + pay each phase, project completes when all are paid"""
+        for index in range(2):
+            response = self.client.post(
+                f'/api/proposals/{self.proposal.id}/phases/{index}/complete', **self.sale_headers
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()['phases'][index]['completed'])
+
+            response = self.client.post(
+                f'/api/proposals/{self.proposal.id}/phases/{index}/submit-payment', **self.owner_headers
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()['phases'][index]['payment_approved'])
+
+        paid = ProposalPhase.objects.filter(proposal=self.proposal, payment_approved=True)
+        self.assertEqual(paid.count(), 2)
+        self.assertEqual(sum(p.amount for p in paid), Decimal('3000000'))
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.status, ProjectStatus.COMPLETED)
+
+    def test_out_of_order_phase_rejected(self):
+        """Test: a phase cannot start before the previous one is paid"""
+        response = self.client.post(
+            f'/api/proposals/{self.proposal.id}/phases/1/complete', **self.sale_headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            f'/api/proposals/{self.proposal.id}/phases/5/complete', **self.sale_headers
+        )
+        self.assertEqual(response.status_code, 400)
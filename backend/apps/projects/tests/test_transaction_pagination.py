@@ -0,0 +1,92 @@
+"""
+Tests for keyset-paginated transaction lists
+"""
+from decimal import Decimal
+from django.test import TestCase, Client
+from django.utils import timezone
+from apps.users.models import User
+from apps.users.services.auth_service import AuthService
+from apps.customers.models import Customer
+from apps.projects.models import Project, Transaction, TransactionType, TransactionStatus
+
+
+class TransactionPaginationTestCase(TestCase):
+    """Cursor pages walk every row once, in (created_at, id) order"""
+
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_user(email='admin@test.com', password='x', full_name='Admin', role='admin')
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {AuthService().issue_tokens(self.admin)['access_token']}"}
+        self.owner = owner = User.objects.create_user(email='owner@test.com', password='x', full_name='Owner', role='customer')
+        customer = Customer.objects.create(user=owner, company_name='Công ty A')
+        self.project = Project.objects.create(name='Shop', customer=customer)
+        other = Project.objects.create(name='Other', customer=customer)
+        for index in range(23):
+            Transaction.objects.create(
+                project=self.project if index % 3 else other, customer=owner, amount=Decimal(1000 * (index + 1)),
+                transaction_type=TransactionType.PHASE if index % 2 else TransactionType.DEPOSIT,
+                status=TransactionStatus.COMPLETED,
+            )
+        # Ties on created_at must be broken by id, not skipped or repeated
+        Transaction.objects.filter(amount__lte=8000).update(created_at=timezone.now())
+
+    def walk(self, url, page_size):
+        ids, cursor, pages = [], None, 0
+        while True:
+            query = f'page_size={page_size}' + (f'&cursor={cursor}' if cursor else '')
+            separator = '&' if '?' in url else '?'
+            response = self.client.get(f'{url}{separator}{query}', **self.headers)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.json())
+            pages += 1
+            cursor = response.headers.get('X-Next-Cursor')
+            if response.headers['X-Has-More'] != 'true':
+                self.assertIsNone(cursor)
+                return ids, pages
+
+    def test_pages_cover_all_rows_once(self):
+        """Test: walking the cursor returns every transaction exactly once"""
+        ids, pages = self.walk('/api/transactions/transactions', 5)
+        self.assertEqual(pages, 5)
+        expected = [str(pk) for pk in Transaction.objects.order_by('-created_at', '-id').values_list('id', flat=True)]
+        self.assertEqual(ids, expected)
+
+    def test_project_transactions_paginated(self):
+        """Test: project history pages only contain that project's rows"""
+        ids, _ = self.walk(f'/api/transactions/projects/{self.project.id}/transactions', 4)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), {str(pk) for pk in self.project.transactions.values_list('id', flat=True)})
+
+    def test_filters_apply_across_pages(self):
+        """Test: amount and type filters narrow every page"""
+        ids, _ = self.walk('/api/transactions/transactions?transaction_type=phase&min_amount=10000', 3)
+        expected = Transaction.objects.filter(transaction_type=TransactionType.PHASE, amount__gte=10000)
+        self.assertEqual(set(ids), {str(pk) for pk in expected.values_list('id', flat=True)})
+
+    def test_unpaginated_by_default(self):
+        """Test: without cursor/page_size every row comes back, as before pagination"""
+        for index in range(60):
+            Transaction.objects.create(
+                project=self.project, customer=self.owner, amount=Decimal(1), transaction_type=TransactionType.DEPOSIT
+            )
+        response = self.client.get('/api/transactions/transactions', **self.headers)
+        self.assertEqual(len(response.json()), 83)
+        self.assertEqual(response.headers['X-Has-More'], 'false')
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_page_size_capped(self):
+        """Test: page_size above the cap is clamped"""
+        for index in range(200):
+            Transaction.objects.create(
+                project=self.project, customer=self.owner, amount=Decimal(1), transaction_type=TransactionType.DEPOSIT
+            )
+        response = self.client.get('/api/transactions/transactions?page_size=1000', **self.headers)
+        self.assertEqual(len(response.json()), 200)
+        self.assertEqual(response.headers['X-Has-More'], 'true')
+
+    def test_tampered_cursor_rejected(self):
+        """Test: a cursor that fails the signature check is a 400"""
+        response = self.client.get('/api/transactions/transactions?page_size=5', **self.headers)
+        cursor = response.headers['X-Next-Cursor']
+        response = self.client.get(f'/api/transactions/transactions?cursor={cursor[:-2]}xx', **self.headers)
+        self.assertEqual(response.status_code, 400)
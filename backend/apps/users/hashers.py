@@ -0,0 +1,18 @@
+"""
+Password hashers
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with iterations taken from PASSWORD_HASH_ITERATIONS
+
+    Same algorithm name as Django's hasher, so existing hashes keep
+    verifying and are upgraded to the tuned work factor on next login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
@@ -0,0 +1,57 @@
+"""
+Django management command to benchmark password verification throughput
+Usage: python manage.py benchmark_login [--seconds 10]
+"""
+import os
+import time
+from concurrent.futures import wait
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from apps.users.services.password_hashing import PasswordHashPool
+
+
+class Command(BaseCommand):
+    help = 'Report logins/sec per core through the login hashing pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seconds',
+            type=float,
+            default=10,
+            help='How long to run the benchmark'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Pool threads (defaults to one per core)'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        duration = options['seconds']
+        cores = os.cpu_count() or 1
+
+        encoded = make_password('benchmark-password')
+        pool = PasswordHashPool(workers=workers, queue_depth=workers, timeout=60)
+
+        self.stdout.write(f"Hasher: {encoded.split('$', 1)[0]}, workers: {workers}, cores: {cores}")
+
+        completed = 0
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        while time.perf_counter() - start < duration:
+            batch = [pool.submit('benchmark-password', encoded) for _ in range(workers)]
+            wait(batch)
+            completed += len(batch)
+        elapsed = time.perf_counter() - start
+        cpu_used = time.process_time() - cpu_start
+
+        per_second = completed / elapsed
+        self.stdout.write("\n" + "="*60)
+        self.stdout.write(f"Logins verified:   {completed}")
+        self.stdout.write(f"Wall time:         {elapsed:.2f} s")
+        self.stdout.write(f"CPU per login:     {cpu_used / completed * 1000:.1f} ms")
+        self.stdout.write(f"Logins/sec:        {per_second:.1f}")
+        self.stdout.write(self.style.SUCCESS(f"Logins/sec/core:   {per_second / min(workers, cores):.1f}"))
+        self.stdout.write("="*60 + "\n")
@@ -18,6 +18,7 @@ from apps.projects.models import (
     Project, ProjectTemplate, Proposal,
     ChatMessage, ChatParticipant, ProjectFeedback, Transaction
 )
+from apps.projects.services.chat_service import ChatService
 from apps.tasks.models import Task
 
 User = get_user_model()
@@ -652,12 +653,10 @@ class Command(BaseCommand):
             team_users.extend(list(project.team_members.all()[:2]))
 
             for i in range(5):  # 5 messages per project
-                message = ChatMessage.objects.create(
-                    project=project,
-                    sender=random.choice(team_users),
-                    message=f'Message {i+1} for project {project.name}',
-                    attachments=[],
-                    is_read=random.choice([True, False]),
+                message = ChatService.post(
+                    project,
+                    random.choice(team_users),
+                    f'Message {i+1} for project {project.name}',
                     message_type='text',
                 )
                 messages.append(message)
@@ -674,8 +673,7 @@ class Command(BaseCommand):
             # Customer
             participant = ChatParticipant.objects.get_or_create(
                 project=project,
-                user=project.customer.user,
-                defaults={'is_typing': False}
+                user=project.customer.user
             )[0]
             participants.append(participant)
 
@@ -683,8 +681,7 @@ class Command(BaseCommand):
             if project.project_manager:
                 participant = ChatParticipant.objects.get_or_create(
                     project=project,
-                    user=project.project_manager,
-                    defaults={'is_typing': False}
+                    user=project.project_manager
                 )[0]
                 participants.append(participant)
 
@@ -692,8 +689,7 @@ class Command(BaseCommand):
             for member in project.team_members.all()[:2]:
                 participant = ChatParticipant.objects.get_or_create(
                     project=project,
-                    user=member,
-                    defaults={'is_typing': False}
+                    user=member
                 )[0]
                 participants.append(participant)
 
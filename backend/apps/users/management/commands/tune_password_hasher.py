@@ -0,0 +1,62 @@
+"""
+Django management command to pick PBKDF2 iterations for a CPU budget
+Usage: python manage.py tune_password_hasher [--budget-ms 250]
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.crypto import pbkdf2, get_random_string
+
+
+class Command(BaseCommand):
+    help = 'Measure this host and recommend PASSWORD_HASH_ITERATIONS for the per-login CPU budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget-ms',
+            type=int,
+            default=settings.LOGIN_HASH_CPU_BUDGET_MS,
+            help='Target CPU time per password hash in milliseconds'
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=5,
+            help='Number of timed runs (the fastest is used)'
+        )
+
+    def _time_iterations(self, iterations, samples):
+        """Best-of-N CPU time for one PBKDF2-SHA256 hash"""
+        salt = get_random_string(22)
+        best = None
+        for _ in range(samples):
+            start = time.process_time()
+            pbkdf2('benchmark-password', salt, iterations)
+            elapsed = time.process_time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        budget = options['budget_ms'] / 1000
+        samples = options['samples']
+
+        # Calibrate with the current setting, then scale linearly
+        current = settings.PASSWORD_HASH_ITERATIONS
+        per_iteration = self._time_iterations(current, samples) / current
+
+        recommended = int(budget / per_iteration) // 1000 * 1000
+        floor = settings.PASSWORD_HASH_MIN_ITERATIONS
+        clamped = max(recommended, floor)
+        actual_ms = self._time_iterations(clamped, samples) * 1000
+
+        self.stdout.write("\n" + "="*60)
+        self.stdout.write(f"Current iterations:     {current:,}")
+        self.stdout.write(f"CPU budget per login:   {options['budget_ms']} ms")
+        self.stdout.write(f"Budget-fit iterations:  {recommended:,}")
+        if clamped != recommended:
+            self.stdout.write(self.style.WARNING(
+                f"Raised to security floor PASSWORD_HASH_MIN_ITERATIONS={floor:,}"
+            ))
+        self.stdout.write(f"Measured hash time:     {actual_ms:.1f} ms")
+        self.stdout.write("="*60)
+        self.stdout.write(self.style.SUCCESS(f"\nSet PASSWORD_HASH_ITERATIONS={clamped}\n"))
@@ -60,6 +60,9 @@ class User(BaseModel, AbstractBaseUser, PermissionsMixin, ActiveMixin):
     is_staff = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
     
+    # Incremented on role change / deactivation to revoke issued JWTs
+    token_version = models.PositiveIntegerField(default=0)
+    
     # Timestamps handled by BaseModel
     
     objects = UserManager()
@@ -90,3 +93,7 @@ class User(BaseModel, AbstractBaseUser, PermissionsMixin, ActiveMixin):
     @property
     def is_customer(self):
         return self.role == UserRole.CUSTOMER
+    
+    def revoke_tokens(self):
+        """Invalidate every access/refresh token issued so far (caller saves)"""
+        self.token_version = (self.token_version or 0) + 1
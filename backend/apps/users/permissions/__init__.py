@@ -0,0 +1,3 @@
+from .roles import RoleSet, normalize_role, ROLE_ALIASES, NO_ADMIN
+
+__all__ = ['RoleSet', 'normalize_role', 'ROLE_ALIASES', 'NO_ADMIN']
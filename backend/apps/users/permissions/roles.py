@@ -0,0 +1,42 @@
+"""
+Role normalization and compiled role sets
+"""
+from typing import Iterable
+from apps.users.models import UserRole
+
+# Legacy spellings still used by routers and older accounts
+ROLE_ALIASES = {
+    'sales': UserRole.SALE.value,
+    'sale': UserRole.SALE.value,
+    'developer': UserRole.DEV.value,
+    'dev': UserRole.DEV.value,
+}
+
+NO_ADMIN = 'no_admin'
+
+
+def normalize_role(role: str) -> str:
+    """Map role aliases (sales/developer) to their canonical value"""
+    return ROLE_ALIASES.get(role, role)
+
+
+class RoleSet:
+    """
+    Allowed roles, normalized once when the rule is declared
+
+    Admin is implicitly allowed unless 'no_admin' is listed.
+    """
+
+    __slots__ = ('roles', 'admin_allowed', 'label')
+
+    def __init__(self, roles: Iterable[str]):
+        roles = tuple(roles)
+        self.admin_allowed = NO_ADMIN not in roles
+        self.roles = frozenset(normalize_role(role) for role in roles if role != NO_ADMIN)
+        self.label = ', '.join(roles)
+
+    def allows(self, role: str) -> bool:
+        """Check whether a user role passes this set"""
+        if role == UserRole.ADMIN and self.admin_allowed:
+            return True
+        return normalize_role(role) in self.roles
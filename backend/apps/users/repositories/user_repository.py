@@ -3,8 +3,26 @@ User repository for database operations
 """
 from typing import Optional, List
 from uuid import UUID
-from apps.users.models import User
+from django.conf import settings
 from django.db.models import Q
+from apps.users.models import User
+from core.utils.cache import TwoTierCache
+
+# Active users resolved from access tokens, keyed by user_id
+user_cache = TwoTierCache(
+    prefix='users:active',
+    l1_timeout=settings.USER_CACHE_L1_TIMEOUT,
+    l2_timeout=settings.USER_CACHE_L2_TIMEOUT,
+)
+
+# Current token_version per user_id (REVOKED_TOKEN_VERSION when inactive)
+token_version_cache = TwoTierCache(
+    prefix='users:token_version',
+    l1_timeout=settings.USER_CACHE_L1_TIMEOUT,
+    l2_timeout=settings.USER_CACHE_L2_TIMEOUT,
+)
+
+REVOKED_TOKEN_VERSION = -1
 
 
 class UserRepository:
@@ -17,6 +35,46 @@ class UserRepository:
             return User.objects.get(id=user_id, is_active=True)
         except User.DoesNotExist:
             return None
+
+    @staticmethod
+    def get_cached_by_id(user_id: UUID) -> Optional[User]:
+        """
+        Get active user by ID through the L1/L2 user cache
+        Falls back to the database on a miss and fills both tiers
+        """
+        user = user_cache.get(str(user_id))
+        if user is not None:
+            return user
+
+        user = UserRepository.get_by_id(user_id)
+        if user:
+            user_cache.set(str(user.id), user)
+        return user
+
+    @staticmethod
+    def get_token_version(user_id: UUID) -> int:
+        """
+        Get the current token version for a user
+        Returns REVOKED_TOKEN_VERSION for missing or inactive users
+        """
+        version = token_version_cache.get(str(user_id))
+        if version is not None:
+            return version
+
+        version = User.objects.filter(
+            id=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        if version is None:
+            version = REVOKED_TOKEN_VERSION
+
+        token_version_cache.set(str(user_id), version)
+        return version
+
+    @staticmethod
+    def invalidate_cache(user_id: UUID) -> None:
+        """Evict user and token version from the L1/L2 caches"""
+        user_cache.delete(str(user_id))
+        token_version_cache.delete(str(user_id))
     
     @staticmethod
     def get_by_email(email: str) -> Optional[User]:
@@ -4,6 +4,7 @@ Authentication API endpoints
 from ninja import Router
 from apps.users.schemas import UserCreate, LoginSchema, TokenResponse, RefreshTokenSchema
 from apps.users.services.auth_service import AuthService
+from api.dependencies.current_user import principal_bearer
 from core.responses.api_response import APIResponse
 
 router = Router(tags=['Authentication'])
@@ -21,9 +22,9 @@ def register(request, payload: UserCreate):
 
 
 @router.post("/login", response=TokenResponse)
-def login(request, payload: LoginSchema):
-    """Login user"""
-    result = auth_service.login(payload.email, payload.password)
+async def login(request, payload: LoginSchema):
+    """Login user (password hash runs in the bounded login pool)"""
+    result = await auth_service.alogin(payload.email, payload.password)
     return result
 
 
@@ -32,3 +33,17 @@ def refresh_token(request, payload: RefreshTokenSchema):
     """Refresh access token"""
     result = auth_service.refresh_token(payload.refresh_token)
     return result
+
+
+@router.post("/logout", response=APIResponse)
+def logout(request, payload: RefreshTokenSchema):
+    """Logout current session (revokes the refresh token family)"""
+    auth_service.logout(payload.refresh_token)
+    return APIResponse.success_response(message="Logged out successfully")
+
+
+@router.post("/logout-all", response=APIResponse, auth=principal_bearer)
+def logout_all(request):
+    """Logout every session of the current user"""
+    auth_service.logout_all(request.auth.id)
+    return APIResponse.success_response(message="All sessions logged out")
@@ -6,7 +6,7 @@ from ninja import Router, Query
 from ninja.errors import HttpError
 from apps.users.schemas import UserOut, UserUpdate, UserPasswordChange, UserListQuery
 from apps.users.services.user_service import UserService
-from api.dependencies.current_user import auth_bearer, get_current_user, require_roles
+from api.dependencies.current_user import auth_bearer, principal_bearer, get_current_user, require_roles
 from core.responses.api_response import APIResponse
 from typing import List
 
@@ -20,7 +20,7 @@ def get_current_user_info(request):
     return request.auth
 
 
-@router.get("", response=List[UserOut])
+@router.get("", response=List[UserOut], auth=principal_bearer)
 @require_roles('admin')
 def list_users(request, query: UserListQuery = Query(...)):
     """
@@ -35,7 +35,7 @@ def list_users(request, query: UserListQuery = Query(...)):
     return result['items']
 
 
-@router.get("/{user_id}", response=UserOut)
+@router.get("/{user_id}", response=UserOut, auth=principal_bearer)
 @require_roles('admin')
 def get_user(request, user_id: UUID):
     """
@@ -46,7 +46,7 @@ def get_user(request, user_id: UUID):
     return user
 
 
-@router.put("/{user_id}", response=UserOut)
+@router.put("/{user_id}", response=UserOut, auth=principal_bearer)
 @require_roles('admin')
 def update_user(request, user_id: UUID, payload: UserUpdate):
     """
@@ -57,7 +57,7 @@ def update_user(request, user_id: UUID, payload: UserUpdate):
     return user
 
 
-@router.delete("/{user_id}", response=APIResponse)
+@router.delete("/{user_id}", response=APIResponse, auth=principal_bearer)
 @require_roles('admin')
 def delete_user(request, user_id: UUID):
     """
@@ -1,18 +1,70 @@
 """
 Authentication service
 """
-from typing import Dict
-from apps.users.models import User
+from typing import Dict, Optional
+from uuid import UUID
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from apps.users.models import User, UserRole
 from apps.users.repositories.user_repository import UserRepository
-from core.utils.jwt_utils import create_access_token, create_refresh_token, verify_token
+from apps.users.services.refresh_token_store import RefreshTokenStore
+from apps.users.services.password_hashing import get_password_hash_pool
+from core.utils.jwt_utils import (
+    create_access_token, create_refresh_token, create_ticket, verify_token_claims, user_claims
+)
 from api.exceptions.base_exception import UnauthorizedException, ValidationException
 
 
+class AuthPrincipal:
+    """
+    Lightweight authenticated identity built from signed token claims
+
+    Exposes the same role helpers as User so require_roles and role checks
+    work without loading the user row. Use get_user() when the full model
+    is needed (FK assignment, profile fields).
+    """
+
+    def __init__(self, user_id, role: str, is_active: bool, token_version: int):
+        self.id = UUID(str(user_id))
+        self.role = role
+        self.is_active = is_active
+        self.token_version = token_version
+        self._user: Optional[User] = None
+
+    def __repr__(self):
+        return f"<AuthPrincipal {self.id} ({self.role})>"
+
+    @property
+    def is_admin(self):
+        return self.role == UserRole.ADMIN
+
+    @property
+    def is_sale(self):
+        return self.role == UserRole.SALE
+
+    @property
+    def is_dev(self):
+        return self.role == UserRole.DEV
+
+    @property
+    def is_customer(self):
+        return self.role == UserRole.CUSTOMER
+
+    def get_user(self) -> User:
+        """Load the full User (through the user cache) on first access"""
+        if self._user is None:
+            self._user = UserRepository.get_cached_by_id(self.id)
+            if not self._user:
+                raise UnauthorizedException("User not found")
+        return self._user
+
+
 class AuthService:
     """Service for authentication operations"""
     
     def __init__(self):
         self.user_repo = UserRepository()
+        self.refresh_store = RefreshTokenStore()
     
     def register(self, user_data: dict) -> User:
         """Register new user"""
@@ -33,54 +85,163 @@ class AuthService:
         if not user:
             raise UnauthorizedException("Invalid credentials")
         
-        # Check password
-        if not user.check_password(password):
+        # Check password in the bounded hashing pool
+        is_valid, upgraded_hash = get_password_hash_pool().verify(password, user.password)
+        if not is_valid:
             raise UnauthorizedException("Invalid credentials")
         
         # Check if user is active
         if not user.is_active:
             raise UnauthorizedException("Account is inactive")
         
-        # Generate tokens
-        access_token = create_access_token(user.id)
-        refresh_token = create_refresh_token(user.id)
+        if upgraded_hash:
+            user.password = upgraded_hash
+            user.save(update_fields=['password'])
+        
+        return self.issue_tokens(user)
+    
+    async def alogin(self, email: str, password: str) -> Dict:
+        """
+        Async login: the hash runs in the bounded pool while the event loop
+        keeps serving other requests
+        """
+        user = await User.objects.filter(email=email).afirst()
+        
+        if not user:
+            raise UnauthorizedException("Invalid credentials")
+        
+        is_valid, upgraded_hash = await get_password_hash_pool().averify(password, user.password)
+        if not is_valid:
+            raise UnauthorizedException("Invalid credentials")
+        
+        if not user.is_active:
+            raise UnauthorizedException("Account is inactive")
+        
+        if upgraded_hash:
+            user.password = upgraded_hash
+            await user.asave(update_fields=['password'])
         
+        return await sync_to_async(self.issue_tokens)(user)
+
+    def issue_tokens(self, user: User, family: Optional[str] = None) -> Dict:
+        """
+        Generate access/refresh tokens carrying the user's identity claims
+        The refresh token is registered in the rotation store (new family
+        on login, same family on refresh)
+        """
+        claims = user_claims(user)
+        refresh_claims = {**claims, **self.refresh_store.issue(family)}
         return {
-            'access_token': access_token,
-            'refresh_token': refresh_token,
+            'access_token': create_access_token(user.id, claims),
+            'refresh_token': create_refresh_token(user.id, refresh_claims),
             'user': user
         }
     
     def refresh_token(self, refresh_token: str) -> Dict:
-        """Refresh access token"""
+        """
+        Rotate refresh token and issue a new access token
+        Each refresh token is single-use; presenting a used one revokes its
+        family. Tokens without a jti (issued before rotation, or not by us)
+        cannot be tracked, so they are rejected and the user logs in again.
+        """
         try:
-            user_id = verify_token(refresh_token, token_type='refresh')
+            payload = verify_token_claims(refresh_token, token_type='refresh')
         except Exception as e:
             raise UnauthorizedException(str(e))
         
-        user = self.user_repo.get_by_id(user_id)
+        if not payload.get('jti') or not payload.get('fam'):
+            raise UnauthorizedException("Refresh token is no longer valid, please log in again")
+        
+        user_id = payload.get('user_id')
+        family = payload['fam']
+        self.refresh_store.consume(user_id, payload['jti'], family, payload.get('issued', payload.get('iat', 0)))
+        
+        user = self.user_repo.get_cached_by_id(user_id)
         if not user:
             raise UnauthorizedException("User not found")
         
+        if payload.get('ver', 0) != user.token_version:
+            raise UnauthorizedException("Token has been revoked")
+        
         # Generate new tokens
-        access_token = create_access_token(user.id)
-        new_refresh_token = create_refresh_token(user.id)
+        return self.issue_tokens(user, family=family)
+    
+    def logout(self, refresh_token: str) -> None:
+        """Revoke the session (refresh token family) the token belongs to"""
+        try:
+            payload = verify_token_claims(refresh_token, token_type='refresh')
+        except Exception as e:
+            raise UnauthorizedException(str(e))
         
-        return {
-            'access_token': access_token,
-            'refresh_token': new_refresh_token,
-            'user': user
-        }
+        if payload.get('fam'):
+            self.refresh_store.revoke_family(payload['fam'])
+    
+    def logout_all(self, user_id: UUID) -> None:
+        """Revoke every refresh token issued to the user"""
+        self.refresh_store.revoke_user(user_id)
     
     def get_current_user(self, token: str) -> User:
         """Get current user from access token"""
         try:
-            user_id = verify_token(token, token_type='access')
+            payload = verify_token_claims(token, token_type='access')
         except Exception as e:
             raise UnauthorizedException(str(e))
         
-        user = self.user_repo.get_by_id(user_id)
+        user = self.user_repo.get_cached_by_id(payload.get('user_id'))
         if not user:
             raise UnauthorizedException("User not found")
         
+        if payload.get('ver', 0) != user.token_version:
+            raise UnauthorizedException("Token has been revoked")
+        
         return user
+    
+    def get_current_principal(self, token: str) -> AuthPrincipal:
+        """
+        Get principal from access token claims without loading the user row
+        Only the cached token version is checked, so revoked tokens fail fast
+        """
+        try:
+            payload = verify_token_claims(token, token_type='access')
+        except Exception as e:
+            raise UnauthorizedException(str(e))
+        
+        if 'role' not in payload:
+            # Token issued before identity claims existed
+            user = self.get_current_user(token)
+            return AuthPrincipal(user.id, user.role, user.is_active, user.token_version)
+        
+        user_id = payload.get('user_id')
+        version = payload.get('ver', 0)
+        if not payload.get('active') or self.user_repo.get_token_version(user_id) != version:
+            raise UnauthorizedException("Token has been revoked")
+        
+        return AuthPrincipal(user_id, payload['role'], True, version)
+
+    def issue_ticket(self, principal, purpose: str, resource) -> Dict:
+        """
+        Short-lived ticket for a URL that must carry its credential in the
+        query string; valid only for purpose on resource
+        """
+        claims = {'role': principal.role, 'active': principal.is_active, 'ver': principal.token_version}
+        return {
+            'ticket': create_ticket(principal.id, purpose, resource, claims),
+            'expires_in': settings.JWT_TICKET_LIFETIME,
+        }
+
+    def get_ticket_principal(self, ticket: str, purpose: str, resource) -> AuthPrincipal:
+        """Principal from a ticket, which must have been issued for purpose on resource"""
+        try:
+            payload = verify_token_claims(ticket, token_type='ticket')
+        except Exception as e:
+            raise UnauthorizedException(str(e))
+
+        if payload.get('purpose') != purpose or payload.get('resource') != str(resource):
+            raise UnauthorizedException("Ticket is not valid for this resource")
+
+        user_id = payload.get('user_id')
+        version = payload.get('ver', 0)
+        if not payload.get('active') or self.user_repo.get_token_version(user_id) != version:
+            raise UnauthorizedException("Token has been revoked")
+
+        return AuthPrincipal(user_id, payload['role'], True, version)
@@ -12,7 +12,7 @@ import secrets
 
 from apps.users.models import User, SocialAccount, SocialProvider
 from apps.users.repositories.user_repository import UserRepository
-from core.utils.jwt_utils import create_access_token, create_refresh_token
+from apps.users.services.auth_service import AuthService
 from api.exceptions.base_exception import ValidationException, UnauthorizedException
 
 
@@ -215,8 +215,9 @@ class GoogleOAuthService:
         )
 
         # Step 4: Generate JWT tokens
-        access_token = create_access_token(user.id)
-        refresh_token = create_refresh_token(user.id)
+        tokens = AuthService().issue_tokens(user)
+        access_token = tokens['access_token']
+        refresh_token = tokens['refresh_token']
 
         # Step 5: Update last login
         social_account = SocialAccount.objects.get(
@@ -0,0 +1,105 @@
+"""
+Bounded worker pool for password hashing
+Keeps expensive hash verification off the request thread and sheds load
+when too many logins are queued, instead of stalling every worker
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Tuple
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from api.exceptions.base_exception import ServiceUnavailableException
+
+
+def _verify_password(password: str, encoded: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify password against encoded hash (runs in a pool thread)
+
+    Returns (is_valid, upgraded_hash). upgraded_hash is set when the stored
+    hash uses outdated parameters; it is computed here so the request thread
+    only has to save it. No database access happens in the pool.
+    """
+    upgraded = []
+    is_valid = check_password(
+        password,
+        encoded,
+        setter=lambda raw_password: upgraded.append(make_password(raw_password))
+    )
+    return is_valid, (upgraded[0] if upgraded else None)
+
+
+class PasswordHashPool:
+    """
+    Thread pool with a hard cap on running + queued hash jobs
+
+    PBKDF2 (hashlib/OpenSSL), bcrypt and argon2 all release the GIL while
+    hashing, so threads scale across cores without a process pool.
+    Submissions beyond workers + queue_depth are rejected immediately;
+    callers waiting longer than the latency budget get a 503.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, timeout: float):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Created lazily so threads are started after gunicorn forks
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix='password-hash'
+                    )
+        return self._executor
+
+    def submit(self, password: str, encoded: str):
+        """Queue a verification job or raise if the pool is saturated"""
+        if not self._slots.acquire(blocking=False):
+            raise ServiceUnavailableException("Too many login attempts in progress, please retry")
+
+        future = self.executor.submit(_verify_password, password, encoded)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def verify(self, password: str, encoded: str) -> Tuple[bool, Optional[str]]:
+        """Verify password, blocking the caller for at most the latency budget"""
+        future = self.submit(password, encoded)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise ServiceUnavailableException("Login is taking too long, please retry")
+
+    async def averify(self, password: str, encoded: str) -> Tuple[bool, Optional[str]]:
+        """Verify password without blocking the event loop"""
+        future = self.submit(password, encoded)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise ServiceUnavailableException("Login is taking too long, please retry")
+
+
+_pool: Optional[PasswordHashPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_password_hash_pool() -> PasswordHashPool:
+    """Process-wide pool configured from LOGIN_HASH_* settings"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordHashPool(
+                    workers=settings.LOGIN_HASH_WORKERS,
+                    queue_depth=settings.LOGIN_HASH_QUEUE_DEPTH,
+                    timeout=settings.LOGIN_HASH_TIMEOUT,
+                )
+    return _pool
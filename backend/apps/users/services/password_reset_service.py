@@ -11,6 +11,7 @@ from django.utils import timezone
 
 from apps.users.models import User, PasswordResetToken
 from apps.users.repositories.user_repository import UserRepository
+from apps.users.services.refresh_token_store import RefreshTokenStore
 from api.exceptions.base_exception import ValidationException, NotFoundException
 
 
@@ -158,6 +159,9 @@ class PasswordResetService:
         user.set_password(new_password)
         user.save(update_fields=['password'])
 
+        # Sign out every existing session
+        RefreshTokenStore().revoke_user(user.id)
+
         # Mark token as used
         reset_token.mark_as_used()
 
@@ -0,0 +1,87 @@
+"""
+Refresh token rotation store
+Tracks issued refresh tokens in the shared cache (Redis) so /auth/refresh
+can detect reuse and revoke sessions without touching the database
+"""
+import time
+import uuid
+from typing import Optional
+from django.conf import settings
+from django.core.cache import caches
+from api.exceptions.base_exception import UnauthorizedException
+
+
+class RefreshTokenStore:
+    """
+    Refresh token families kept in the 'default' cache
+
+    Keys (all expire with JWT_REFRESH_TOKEN_LIFETIME):
+    - auth:refresh:jti:<jti>              -> family id, present while unused
+    - auth:refresh:family:<family>        -> set when the family is revoked
+    - auth:refresh:user:<user_id>         -> revocation time (epoch seconds,
+                                             sub-second); tokens issued
+                                             before it are rejected
+
+    Every operation is a single-key O(1) command, so the store is shared
+    safely by all workers and hosts pointing at the same Redis.
+    """
+
+    prefix = 'auth:refresh'
+
+    @property
+    def cache(self):
+        return caches['default']
+
+    @property
+    def ttl(self) -> int:
+        return settings.JWT_REFRESH_TOKEN_LIFETIME
+
+    def _jti_key(self, jti: str) -> str:
+        return f"{self.prefix}:jti:{jti}"
+
+    def _family_key(self, family: str) -> str:
+        return f"{self.prefix}:family:{family}"
+
+    def _user_key(self, user_id) -> str:
+        return f"{self.prefix}:user:{user_id}"
+
+    def issue(self, family: Optional[str] = None) -> dict:
+        """
+        Register a new refresh token, continuing a family or starting one
+        Returns the jti/fam claims to embed in the token, plus the issue
+        time with sub-second precision (JWT iat is whole seconds) so a
+        login right after a revocation is not mistaken for an older token
+        """
+        jti = uuid.uuid4().hex
+        family = family or uuid.uuid4().hex
+        self.cache.set(self._jti_key(jti), family, self.ttl)
+        return {'jti': jti, 'fam': family, 'issued': time.time()}
+
+    def consume(self, user_id, jti: str, family: str, issued_at: float) -> None:
+        """
+        Mark refresh token as used; raise if it was revoked or already used
+
+        A second use of the same jti means the token leaked (or a client
+        replayed it), so the whole family is revoked.
+        """
+        revoked = self.cache.get_many([self._family_key(family), self._user_key(user_id)])
+
+        if self._family_key(family) in revoked:
+            raise UnauthorizedException("Token has been revoked")
+
+        revoked_before = revoked.get(self._user_key(user_id))
+        if revoked_before is not None and issued_at < revoked_before:
+            raise UnauthorizedException("Token has been revoked")
+
+        # DEL is atomic: exactly one concurrent caller sees the key
+        if not self.cache.delete(self._jti_key(jti)):
+            self.revoke_family(family)
+            raise UnauthorizedException("Refresh token reuse detected")
+
+    def revoke_family(self, family: str) -> None:
+        """Revoke every refresh token descended from one login"""
+        self.cache.set(self._family_key(family), 1, self.ttl)
+
+    def revoke_user(self, user_id) -> None:
+        """Revoke all refresh tokens issued to a user so far"""
+        self.cache.set(self._user_key(user_id), time.time(), self.ttl)
@@ -0,0 +1,41 @@
+"""
+User model signal handlers
+"""
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.users.models import User
+from apps.users.repositories.user_repository import UserRepository
+
+
+@receiver(pre_save, sender=User)
+def revoke_tokens_on_privilege_change(sender, instance, update_fields=None, **kwargs):
+    """
+    Bump token_version when role or is_active changes
+    Tokens carry role/active claims, so old ones must stop being accepted
+    """
+    if instance._state.adding:
+        return
+    if update_fields is not None and not {'role', 'is_active'} & set(update_fields):
+        return
+
+    previous = User.objects.filter(pk=instance.pk).values('role', 'is_active').first()
+    if not previous:
+        return
+
+    if previous['role'] != instance.role or previous['is_active'] != instance.is_active:
+        instance.revoke_tokens()
+        if update_fields is not None and 'token_version' not in update_fields:
+            # save() will not write token_version, persist it separately
+            User.objects.filter(pk=instance.pk).update(token_version=instance.token_version)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """
+    Evict cached user on save (profile/role change, deactivation) or delete
+    Evicts again after commit so a concurrent read cannot re-cache the old row
+    """
+    UserRepository.invalidate_cache(instance.id)
+    transaction.on_commit(lambda: UserRepository.invalidate_cache(instance.id))
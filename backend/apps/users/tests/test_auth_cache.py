@@ -0,0 +1,68 @@
+"""
+Tests for the authenticated user cache used by AuthBearer
+"""
+from django.core.cache import caches
+from django.test import TestCase
+from apps.users.models import User
+from apps.users.repositories.user_repository import UserRepository
+from apps.users.services.auth_service import AuthService
+from core.utils.jwt_utils import create_access_token
+
+
+class AuthUserCacheTestCase(TestCase):
+    """User lookups by access token go through L1/L2 and are evicted on save"""
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['local'].clear()
+        self.user = User.objects.create_user(
+            email='cached@test.com',
+            password='cached123',
+            full_name='Cached User',
+            role='customer'
+        )
+        self.token = create_access_token(self.user.id)
+        self.auth_service = AuthService()
+
+    def test_repeated_lookup_hits_no_database(self):
+        """Test: second lookup for the same token is served from cache"""
+        self.auth_service.get_current_user(self.token)
+
+        with self.assertNumQueries(0):
+            user = self.auth_service.get_current_user(self.token)
+        self.assertEqual(user.id, self.user.id)
+
+    def test_l2_refills_l1(self):
+        """Test: an L1 miss is served from L2 without a query"""
+        self.auth_service.get_current_user(self.token)
+        caches['local'].clear()
+
+        with self.assertNumQueries(0):
+            user = self.auth_service.get_current_user(self.token)
+        self.assertEqual(user.email, 'cached@test.com')
+
+    def test_profile_change_invalidates(self):
+        """Test: saved changes are visible on the next lookup"""
+        self.auth_service.get_current_user(self.token)
+
+        UserRepository.update(self.user, {'full_name': 'Renamed User'})
+
+        user = self.auth_service.get_current_user(self.token)
+        self.assertEqual(user.full_name, 'Renamed User')
+
+    def test_deactivation_invalidates(self):
+        """Test: a soft-deleted user can no longer authenticate"""
+        self.auth_service.get_current_user(self.token)
+
+        UserRepository.delete(self.user)
+
+        with self.assertRaises(Exception):
+            self.auth_service.get_current_user(self.token)
+
+    def test_cached_instances_are_not_shared(self):
+        """Test: mutating a returned user does not leak into the cache"""
+        user = self.auth_service.get_current_user(self.token)
+        user.full_name = 'Mutated'
+
+        again = self.auth_service.get_current_user(self.token)
+        self.assertEqual(again.full_name, 'Cached User')
@@ -0,0 +1,178 @@
+"""
+Tests for identity claims in JWTs and token version revocation
+"""
+from django.core.cache import caches
+from django.test import TestCase, Client
+from apps.users.models import User
+from apps.users.repositories.user_repository import UserRepository
+from apps.users.services.auth_service import AuthService, AuthPrincipal
+from apps.users.services.password_hashing import PasswordHashPool
+from api.exceptions.base_exception import UnauthorizedException, ServiceUnavailableException
+from core.utils.jwt_utils import create_refresh_token, user_claims
+
+
+class AuthTokenClaimsTestCase(TestCase):
+    """Principal auth reads role from signed claims; version bumps revoke"""
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['local'].clear()
+        self.client = Client()
+        self.auth_service = AuthService()
+        self.admin = User.objects.create_user(
+            email='admin@test.com',
+            password='admin123',
+            full_name='Admin User',
+            role='admin'
+        )
+        self.customer = User.objects.create_user(
+            email='customer@test.com',
+            password='customer123',
+            full_name='Customer User',
+            role='customer'
+        )
+
+    def test_principal_from_claims(self):
+        """Test: principal carries id/role and needs no query on a warm cache"""
+        token = self.auth_service.issue_tokens(self.admin)['access_token']
+        self.auth_service.get_current_principal(token)
+
+        with self.assertNumQueries(0):
+            principal = self.auth_service.get_current_principal(token)
+        self.assertIsInstance(principal, AuthPrincipal)
+        self.assertEqual(principal.id, self.admin.id)
+        self.assertTrue(principal.is_admin)
+
+    def test_admin_endpoint_rejects_customer_without_sql(self):
+        """Test: role-gated endpoint answers 403 from claims alone"""
+        token = self.auth_service.issue_tokens(self.customer)['access_token']
+        self.auth_service.get_current_principal(token)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/finance/finance/dashboard',
+                HTTP_AUTHORIZATION=f'Bearer {token}'
+            )
+        self.assertEqual(response.status_code, 403)
+
+    def test_role_change_revokes_tokens(self):
+        """Test: tokens issued before a role change are rejected"""
+        tokens = self.auth_service.issue_tokens(self.customer)
+        UserRepository.update(self.customer, {'role': 'admin'})
+
+        with self.assertRaises(UnauthorizedException):
+            self.auth_service.get_current_principal(tokens['access_token'])
+        with self.assertRaises(UnauthorizedException):
+            self.auth_service.get_current_user(tokens['access_token'])
+        with self.assertRaises(UnauthorizedException):
+            self.auth_service.refresh_token(tokens['refresh_token'])
+
+    def test_deactivation_revokes_tokens(self):
+        """Test: tokens of a deactivated user are rejected"""
+        token = self.auth_service.issue_tokens(self.customer)['access_token']
+        UserRepository.delete(self.customer)
+
+        with self.assertRaises(UnauthorizedException):
+            self.auth_service.get_current_principal(token)
+
+    def test_profile_update_keeps_tokens(self):
+        """Test: non-privilege changes do not revoke tokens"""
+        token = self.auth_service.issue_tokens(self.customer)['access_token']
+        UserRepository.update(self.customer, {'full_name': 'Renamed'})
+
+        principal = self.auth_service.get_current_principal(token)
+        self.assertEqual(principal.get_user().full_name, 'Renamed')
+
+
+class RefreshTokenRotationTestCase(TestCase):
+    """Refresh tokens are single-use and revocable per family and per user"""
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['local'].clear()
+        self.auth_service = AuthService()
+        self.user = User.objects.create_user(
+            email='refresh@test.com',
+            password='refresh123',
+            full_name='Refresh User',
+            role='customer'
+        )
+
+    def test_rotation_without_database(self):
+        """Test: refresh on a warm cache issues new tokens with no query"""
+        tokens = self.auth_service.issue_tokens(self.user)
+        UserRepository.get_cached_by_id(self.user.id)
+
+        with self.assertNumQueries(0):
+            rotated = self.auth_service.refresh_token(tokens['refresh_token'])
+        self.assertNotEqual(rotated['refresh_token'], tokens['refresh_token'])
+
+    def test_reuse_revokes_family(self):
+        """Test: replaying a used token kills the whole family"""
+        tokens = self.auth_service.issue_tokens(self.user)
+        rotated = self.auth_service.refresh_token(tokens['refresh_token'])
+
+        with self.assertRaises(UnauthorizedException):
+            self.auth_service.refresh_token(tokens['refresh_token'])
+        with self.assertRaises(UnauthorizedException):
+            self.auth_service.refresh_token(rotated['refresh_token'])
+
+    def test_logout_all_revokes_every_family(self):
+        """Test: bulk revocation rejects tokens from all logins"""
+        first = self.auth_service.issue_tokens(self.user)
+        second = self.auth_service.issue_tokens(self.user)
+
+        self.auth_service.logout_all(self.user.id)
+
+        for tokens in (first, second):
+            with self.assertRaises(UnauthorizedException):
+                self.auth_service.refresh_token(tokens['refresh_token'])
+
+        # A login in the same second as the revocation is not affected
+        fresh = self.auth_service.issue_tokens(self.user)
+        self.auth_service.refresh_token(fresh['refresh_token'])
+
+    def test_token_without_jti_rejected(self):
+        """Test: untracked refresh tokens cannot bypass rotation or revocation"""
+        token = create_refresh_token(self.user.id, user_claims(self.user))
+
+        with self.assertRaises(UnauthorizedException):
+            self.auth_service.refresh_token(token)
+
+
+class LoginHashPoolTestCase(TestCase):
+    """Password checks run in a bounded pool that sheds excess load"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='pool@test.com',
+            password='pool12345',
+            full_name='Pool User'
+        )
+
+    def test_verify_in_pool(self):
+        """Test: pool verifies correct and wrong passwords"""
+        pool = PasswordHashPool(workers=1, queue_depth=1, timeout=5)
+        self.assertTrue(pool.verify('pool12345', self.user.password)[0])
+        self.assertFalse(pool.verify('wrong-password', self.user.password)[0])
+
+    def test_saturated_pool_rejects(self):
+        """Test: submissions beyond workers + queue depth get a 503"""
+        pool = PasswordHashPool(workers=1, queue_depth=0, timeout=5)
+        pool._slots.acquire()
+
+        with self.assertRaises(ServiceUnavailableException):
+            pool.verify('pool12345', self.user.password)
+
+        pool._slots.release()
+        self.assertTrue(pool.verify('pool12345', self.user.password)[0])
+
+    def test_async_login_endpoint(self):
+        """Test: /auth/login (async) returns tokens"""
+        response = Client().post(
+            '/api/auth/login',
+            data={'email': 'pool@test.com', 'password': 'pool12345'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh_token', response.json())
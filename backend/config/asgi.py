@@ -1,5 +1,7 @@
 """
 ASGI config for project.
+Serves the API, including the long-lived chat event streams
+(apps/projects/services/chat_stream_service.py).
 """
 import os
 from django.core.asgi import get_asgi_application
@@ -5,6 +5,7 @@ Base settings file - shared across all environments.
 import os
 from pathlib import Path
 from decouple import config
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -84,9 +85,35 @@ CACHES = {
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         }
+    },
+    # Per-process LRU used as L1 in front of Redis (see core/utils/cache.py)
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'operis-local',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        }
     }
 }
 
+# Password hashing
+# PBKDF2 iterations are tuned per host with `manage.py tune_password_hasher`
+PASSWORD_HASHERS = [
+    'apps.users.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = config('PASSWORD_HASH_ITERATIONS', default=720000, cast=int)
+PASSWORD_HASH_MIN_ITERATIONS = 600000  # OWASP floor for PBKDF2-SHA256
+LOGIN_HASH_CPU_BUDGET_MS = config('LOGIN_HASH_CPU_BUDGET_MS', default=250, cast=int)
+
+# Login hashing pool (see apps/users/services/password_hashing.py)
+LOGIN_HASH_WORKERS = config('LOGIN_HASH_WORKERS', default=os.cpu_count() or 2, cast=int)
+LOGIN_HASH_QUEUE_DEPTH = config('LOGIN_HASH_QUEUE_DEPTH', default=32, cast=int)
+LOGIN_HASH_TIMEOUT = config('LOGIN_HASH_TIMEOUT', default=2.0, cast=float)  # seconds
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -120,6 +147,16 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    # Content-addressed chat attachments; any Django storage backend (e.g. S3) can be swapped in
+    'chat_attachments': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': MEDIA_ROOT / 'chat'},
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -131,12 +168,48 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3001",
     "http://127.0.0.1:3001",
 ]
+# Keyset pagination cursors (core/utils/pagination.py)
+CORS_EXPOSE_HEADERS = ['X-Next-Cursor', 'X-Has-More']
+# Retry-safe payment requests (apps/projects/services/idempotency_service.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # JWT Settings
 JWT_SECRET_KEY = config('JWT_SECRET_KEY', default=SECRET_KEY)
 JWT_ALGORITHM = 'HS256'
 JWT_ACCESS_TOKEN_LIFETIME = 60 * 60  # 1 hour
 JWT_REFRESH_TOKEN_LIFETIME = 60 * 60 * 24 * 7  # 7 days
+JWT_TICKET_LIFETIME = 60 * 5  # link tickets for ?ticket= URLs (SSE, attachment links)
+
+# Authenticated user cache (AuthBearer lookups)
+USER_CACHE_L1_TIMEOUT = config('USER_CACHE_L1_TIMEOUT', default=5, cast=int)  # seconds, per process
+USER_CACHE_L2_TIMEOUT = config('USER_CACHE_L2_TIMEOUT', default=300, cast=int)  # seconds, Redis
+
+# Idempotency-Key handling for payment endpoints (apps/projects/services/idempotency_service.py)
+IDEMPOTENCY_TTL = config('IDEMPOTENCY_TTL', default=60 * 60 * 24, cast=int)  # seconds a response is replayed
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=60, cast=int)  # seconds before an unfinished claim is abandoned
+IDEMPOTENCY_WAIT_TIMEOUT = config('IDEMPOTENCY_WAIT_TIMEOUT', default=10.0, cast=float)  # seconds a duplicate waits
+
+# Project chat Server-Sent Events (apps/projects/services/chat_stream_service.py)
+CHAT_STREAM_HEARTBEAT = config('CHAT_STREAM_HEARTBEAT', default=15.0, cast=float)  # seconds between keep-alive comments
+CHAT_STREAM_MAX_AGE = config('CHAT_STREAM_MAX_AGE', default=60 * 15, cast=int)  # seconds before a stream is closed for reconnect
+CHAT_STREAM_RETRY_MS = 3000  # client reconnect delay
+CHAT_STREAM_REPLAY_LIMIT = 200  # missed messages replayed on resume before asking for a reload
+# Per-user unread counters in Redis (apps/projects/services/chat_unread_service.py)
+CHAT_UNREAD_TTL = config('CHAT_UNREAD_TTL', default=60 * 60, cast=int)  # seconds before counters are rebuilt from the database
+# Chat presence and typing, Redis only (apps/projects/services/chat_presence_service.py)
+CHAT_PRESENCE_ONLINE_WINDOW = 60  # seconds since last activity a user still counts as online
+CHAT_PRESENCE_WRITE_INTERVAL = 1  # seconds; repeated presence writes per process are coalesced
+CHAT_TYPING_TTL = 6  # seconds a typing indicator lasts without a refresh
+CHAT_LAST_SEEN_TTL = 60 * 60 * 24 * 30  # seconds last-seen is remembered
+CHAT_MEMBERS_TTL = 60 * 5  # seconds chat membership is cached for presence checks
+# Resumable chat uploads (apps/projects/services/chat_upload_service.py)
+CHAT_UPLOAD_TEMP_DIR = config('CHAT_UPLOAD_TEMP_DIR', default=str(MEDIA_ROOT / 'uploads'))  # local disk, partial files
+CHAT_UPLOAD_MAX_SIZE = config('CHAT_UPLOAD_MAX_SIZE', default=1024 ** 3, cast=int)  # bytes per file
+CHAT_UPLOAD_CHUNK_SIZE = 8 * 1024 ** 2  # largest chunk accepted per request, bytes
+CHAT_UPLOAD_TTL = 60 * 60 * 24  # seconds an unfinished upload can be resumed
+CHAT_UPLOAD_WRITE_TIMEOUT = 60 * 10  # seconds before an unfinished chunk write is abandoned
+CHAT_THUMBNAIL_SIZE = (320, 320)
+CHAT_THUMBNAIL_WORKERS = 2  # background thumbnail threads per process; 0 = inline
 
 # Email Settings
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
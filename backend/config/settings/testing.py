@@ -22,5 +22,12 @@ PASSWORD_HASHERS = [
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'operis-local',
     }
 }
+
+# In-memory SQLite is per connection: generate thumbnails on the request thread
+CHAT_THUMBNAIL_WORKERS = 0
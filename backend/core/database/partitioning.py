@@ -0,0 +1,267 @@
+"""
+PostgreSQL monthly range partitioning
+Converts an append-only table to declarative partitions on a timestamp
+column and keeps the partition set rolling
+"""
+import re
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from django.db import connections, transaction
+from django.utils import timezone
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bound(month: date) -> str:
+    """Local midnight on the first of the month, so partitions follow report months"""
+    return timezone.make_aware(datetime(month.year, month.month, 1), timezone.get_current_timezone()).isoformat()
+
+
+def range_clause(month: date) -> str:
+    """FOR VALUES clause of a monthly partition (bounds are generated, never user input)"""
+    return f"FOR VALUES FROM ('{month_bound(month)}') TO ('{month_bound(add_months(month, 1))}')"
+
+
+class PartitioningError(Exception):
+    """The table cannot be (re)partitioned as requested"""
+
+
+class MonthlyPartitioner:
+    """
+    Range partitions named <table>_pYYYY_MM plus a <table>_default catch-all
+
+    Postgres requires the partition key in every unique index, so the
+    primary key becomes (id, <column>) and unique indexes that do not
+    include the column are created on each partition instead of the
+    parent. New partitions copy those from the newest existing partition.
+
+    Every method returns the DDL it ran; with dry_run=True the catalog is
+    still read but nothing is written.
+    """
+
+    def __init__(self, table: str, column: str = 'created_at', using: str = 'default', dry_run: bool = False):
+        self.table = table
+        self.column = column
+        self.using = using
+        self.dry_run = dry_run
+        self.statements: List[str] = []
+        self._name_pattern = re.compile(rf'^{re.escape(table)}_p(\d{{4}})_(\d{{2}})$')
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    @property
+    def default_partition(self) -> str:
+        return f'{self.table}_default'
+
+    def partition_name(self, month: date) -> str:
+        return f'{self.table}_p{month:%Y_%m}'
+
+    def _run(self, cursor, sql: str) -> None:
+        self.statements.append(sql)
+        if not self.dry_run:
+            cursor.execute(sql)
+
+    def _fetch(self, cursor, sql: str, params=None) -> list:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    def _check_backend(self) -> None:
+        if self.connection.vendor != 'postgresql':
+            raise PartitioningError("Declarative partitioning requires PostgreSQL")
+
+    # Catalog
+
+    def is_partitioned(self, cursor) -> bool:
+        rows = self._fetch(cursor, "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [self.table])
+        return bool(rows)
+
+    def partitions(self, cursor) -> Dict[date, str]:
+        """Attached monthly partitions by month"""
+        rows = self._fetch(cursor, """
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+        """, [self.table])
+        months = {}
+        for (name,) in rows:
+            match = self._name_pattern.match(name)
+            if match:
+                months[date(int(match.group(1)), int(match.group(2)), 1)] = name
+        return months
+
+    def _indexes(self, cursor, table: str) -> List[Tuple[str, str, bool]]:
+        """(name, definition, unique) of a table's own indexes, excluding the primary key"""
+        return self._fetch(cursor, """
+            SELECT c.relname, pg_get_indexdef(i.indexrelid), i.indisunique
+            FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = to_regclass(%s) AND NOT i.indisprimary
+              AND NOT EXISTS (SELECT 1 FROM pg_inherits h WHERE h.inhrelid = i.indexrelid)
+            ORDER BY c.relname
+        """, [table])
+
+    def _retarget(self, definition: str, name: str, table: str, if_not_exists: bool = False) -> str:
+        """Index definition renamed to name and pointed at table"""
+        return re.sub(
+            r'^CREATE (UNIQUE )?INDEX \S+ ON (ONLY )?\S+ ',
+            lambda m: f"CREATE {m.group(1) or ''}INDEX {'IF NOT EXISTS ' if if_not_exists else ''}{name} ON {table} ",
+            definition,
+        )
+
+    def _partition_unique_indexes(self, cursor, partition: str, templates: List[Tuple[str, str]]) -> None:
+        for suffix, definition in templates:
+            name = f'{partition}_{suffix}'[:63]
+            self._run(cursor, self._retarget(definition, name, partition, if_not_exists=True))
+
+    def _unique_templates(self, cursor, source: str) -> List[Tuple[str, str]]:
+        """(suffix, definition) of unique indexes kept per partition, read from source"""
+        templates = []
+        for name, definition, unique in self._indexes(cursor, source):
+            if unique:
+                suffix = name[len(source) + 1:] if name.startswith(f'{source}_') else name
+                templates.append((suffix, definition))
+        return templates
+
+    # Partition maintenance
+
+    def create_partition(self, cursor, month: date, templates: List[Tuple[str, str]]) -> str:
+        """Partition for month; rows already in the default partition for that range are moved in"""
+        name = self.partition_name(month)
+        in_range = (
+            f"{self.column} >= '{month_bound(month)}' AND {self.column} < '{month_bound(add_months(month, 1))}'"
+        )
+        in_default = self._fetch(cursor, f"SELECT EXISTS (SELECT 1 FROM {self.default_partition} WHERE {in_range})")[0][0]
+
+        if in_default:
+            # A new partition may not overlap rows held by the default one
+            self._run(cursor, f"ALTER TABLE {self.table} DETACH PARTITION {self.default_partition}")
+        self._run(cursor, f"CREATE TABLE {name} PARTITION OF {self.table} {range_clause(month)}")
+        self._partition_unique_indexes(cursor, name, templates)
+        if in_default:
+            self._run(cursor, (
+                f"WITH moved AS (DELETE FROM {self.default_partition} WHERE {in_range} RETURNING *) "
+                f"INSERT INTO {self.table} SELECT * FROM moved"
+            ))
+            self._run(cursor, f"ALTER TABLE {self.table} ATTACH PARTITION {self.default_partition} DEFAULT")
+        return name
+
+    def ensure_partitions(self, months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+        """Create any missing partition from the current month to months_ahead months ahead"""
+        self._check_backend()
+        current = month_start(today or timezone.localdate())
+        created = []
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            if not self.is_partitioned(cursor):
+                raise PartitioningError(f"{self.table} is not partitioned; run the conversion first")
+            existing = self.partitions(cursor)
+            newest = existing[max(existing)] if existing else self.default_partition
+            templates = self._unique_templates(cursor, newest)
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                if month not in existing:
+                    created.append(self.create_partition(cursor, month, templates))
+        return created
+
+    def detach_partitions(self, retain_months: int, drop: bool = False, today: Optional[date] = None) -> List[str]:
+        """
+        Detach monthly partitions older than retain_months before the current month
+        Detached partitions stay as plain tables (archive) unless drop is set.
+        """
+        self._check_backend()
+        cutoff = add_months(month_start(today or timezone.localdate()), -retain_months)
+        detached = []
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            for month, name in sorted(self.partitions(cursor).items()):
+                if month >= cutoff:
+                    continue
+                self._run(cursor, f"ALTER TABLE {self.table} DETACH PARTITION {name}")
+                if drop:
+                    self._run(cursor, f"DROP TABLE {name}")
+                detached.append(name)
+        return detached
+
+    # Conversion
+
+    def convert(self, primary_key: str = 'id', months_ahead: int = 3, keep_legacy: bool = False) -> List[str]:
+        """
+        Rebuild the table as a partitioned one and copy every row across
+        Runs in one transaction under an ACCESS EXCLUSIVE lock: plan a
+        maintenance window proportional to the table size. Index and
+        foreign-key names are preserved so later migrations still apply.
+        """
+        self._check_backend()
+        legacy = f'{self.table}_legacy'
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            if self.is_partitioned(cursor):
+                raise PartitioningError(f"{self.table} is already partitioned")
+
+            referencing = self._fetch(cursor, """
+                SELECT conrelid::regclass::text FROM pg_constraint
+                WHERE contype = 'f' AND confrelid = to_regclass(%s)
+            """, [self.table])
+            if referencing:
+                tables = ', '.join(row[0] for row in referencing)
+                raise PartitioningError(f"Foreign keys from {tables} point at {self.table}; they cannot reference a partitioned table")
+
+            self._run(cursor, f"LOCK TABLE {self.table} IN ACCESS EXCLUSIVE MODE")
+
+            indexes = self._indexes(cursor, self.table)
+            foreign_keys = self._fetch(cursor, """
+                SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+                WHERE contype = 'f' AND conrelid = to_regclass(%s) ORDER BY conname
+            """, [self.table])
+            primary = self._fetch(cursor, """
+                SELECT conname FROM pg_constraint WHERE contype = 'p' AND conrelid = to_regclass(%s)
+            """, [self.table])
+            first, last = self._fetch(cursor, f"SELECT min({self.column}), max({self.column}) FROM {self.table}")[0]
+
+            # Free the index and constraint names for the new table
+            self._run(cursor, f"ALTER TABLE {self.table} RENAME TO {legacy}")
+            if primary:
+                self._run(cursor, f"ALTER TABLE {legacy} RENAME CONSTRAINT {primary[0][0]} TO {legacy}_pkey")
+            for name, _, _ in indexes:
+                self._run(cursor, f"ALTER INDEX {name} RENAME TO {name[:56]}_legacy")
+
+            self._run(cursor, (
+                f"CREATE TABLE {self.table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+                f"INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE ({self.column})"
+            ))
+            self._run(cursor, (
+                f"ALTER TABLE {self.table} ADD CONSTRAINT {primary[0][0] if primary else self.table + '_pkey'} "
+                f"PRIMARY KEY ({primary_key}, {self.column})"
+            ))
+            for name, definition in foreign_keys:
+                self._run(cursor, f"ALTER TABLE {self.table} ADD CONSTRAINT {name} {definition}")
+
+            templates = []
+            for name, definition, unique in indexes:
+                if unique:
+                    # Cannot be global without the partition key: one per partition
+                    templates.append((name, definition))
+                else:
+                    self._run(cursor, self._retarget(definition, name, self.table))
+
+            self._run(cursor, f"CREATE TABLE {self.default_partition} PARTITION OF {self.table} DEFAULT")
+            self._partition_unique_indexes(cursor, self.default_partition, templates)
+
+            current = month_start(timezone.localdate())
+            month = month_start(timezone.localtime(first).date()) if first else current
+            end = add_months(max(current, month_start(timezone.localtime(last).date()) if last else current), months_ahead)
+            while month <= end:
+                name = self.partition_name(month)
+                self._run(cursor, f"CREATE TABLE {name} PARTITION OF {self.table} {range_clause(month)}")
+                self._partition_unique_indexes(cursor, name, templates)
+                month = add_months(month, 1)
+
+            self._run(cursor, f"INSERT INTO {self.table} SELECT * FROM {legacy}")
+            if not keep_legacy:
+                self._run(cursor, f"DROP TABLE {legacy}")
+            self._run(cursor, f"ANALYZE {self.table}")
+        return self.statements
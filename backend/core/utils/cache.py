@@ -0,0 +1,82 @@
+"""
+Cache utilities
+Two-tier cache: in-process LRU (L1) in front of the shared Redis cache (L2)
+"""
+import logging
+from typing import Any, Optional
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TwoTierCache:
+    """
+    Read-through cache with a per-process L1 and a shared L2
+
+    L1 is the 'local' cache alias (LocMemCache - LRU, pickled values, so
+    callers never share a mutable instance). L2 is the 'default' alias
+    (django_redis). L1 entries live only a few seconds because other
+    workers cannot evict them; L2 is invalidated explicitly.
+
+    Redis failures are logged and treated as a miss so that an outage
+    degrades to database reads instead of failing every request.
+    """
+
+    def __init__(self, prefix: str, l1_timeout: int, l2_timeout: int,
+                 l1_alias: str = 'local', l2_alias: str = 'default'):
+        self.prefix = prefix
+        self.l1_timeout = l1_timeout
+        self.l2_timeout = l2_timeout
+        self.l1_alias = l1_alias
+        self.l2_alias = l2_alias
+
+    @property
+    def l1(self):
+        return caches[self.l1_alias]
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def make_key(self, key: Any) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get value from L1, then L2 (re-filling L1 on an L2 hit)"""
+        cache_key = self.make_key(key)
+
+        value = self.l1.get(cache_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        try:
+            value = self.l2.get(cache_key, _MISSING)
+        except Exception:
+            logger.warning("L2 cache read failed for %s", cache_key, exc_info=True)
+            return None
+
+        if value is _MISSING:
+            return None
+
+        self.l1.set(cache_key, value, self.l1_timeout)
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        """Store value in both tiers"""
+        cache_key = self.make_key(key)
+        self.l1.set(cache_key, value, self.l1_timeout)
+        try:
+            self.l2.set(cache_key, value, self.l2_timeout)
+        except Exception:
+            logger.warning("L2 cache write failed for %s", cache_key, exc_info=True)
+
+    def delete(self, key: Any) -> None:
+        """Evict value from both tiers"""
+        cache_key = self.make_key(key)
+        self.l1.delete(cache_key)
+        try:
+            self.l2.delete(cache_key)
+        except Exception:
+            logger.warning("L2 cache delete failed for %s", cache_key, exc_info=True)
@@ -4,12 +4,18 @@ JWT utilities for authentication
 import jwt
 from datetime import datetime, timedelta
 from django.conf import settings
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
-def create_access_token(user_id: str) -> str:
-    """Create JWT access token"""
+def create_access_token(user_id: str, claims: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Create JWT access token
+
+    claims: extra signed claims (role, active, ver) so authorization
+    can be decided from the token without loading the user row
+    """
     payload = {
+        **(claims or {}),
         'user_id': str(user_id),
         'exp': datetime.utcnow() + timedelta(seconds=settings.JWT_ACCESS_TOKEN_LIFETIME),
         'iat': datetime.utcnow(),
@@ -18,9 +24,10 @@ def create_access_token(user_id: str) -> str:
     return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 
-def create_refresh_token(user_id: str) -> str:
+def create_refresh_token(user_id: str, claims: Optional[Dict[str, Any]] = None) -> str:
     """Create JWT refresh token"""
     payload = {
+        **(claims or {}),
         'user_id': str(user_id),
         'exp': datetime.utcnow() + timedelta(seconds=settings.JWT_REFRESH_TOKEN_LIFETIME),
         'iat': datetime.utcnow(),
@@ -29,6 +36,32 @@ def create_refresh_token(user_id: str) -> str:
     return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 
+def create_ticket(user_id: str, purpose: str, resource: str, claims: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Create a short-lived JWT that only opens one purpose on one resource
+    For URLs that carry their credential in the query string
+    """
+    payload = {
+        **(claims or {}),
+        'user_id': str(user_id),
+        'purpose': purpose,
+        'resource': str(resource),
+        'exp': datetime.utcnow() + timedelta(seconds=settings.JWT_TICKET_LIFETIME),
+        'iat': datetime.utcnow(),
+        'type': 'ticket'
+    }
+    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+def user_claims(user) -> Dict[str, Any]:
+    """Identity claims embedded in tokens issued for a user"""
+    return {
+        'role': user.role,
+        'active': user.is_active,
+        'ver': user.token_version,
+    }
+
+
 def decode_token(token: str) -> Dict[str, Any]:
     """Decode and verify JWT token"""
     try:
@@ -40,11 +73,16 @@ def decode_token(token: str) -> Dict[str, Any]:
         raise Exception("Invalid token")
 
 
-def verify_token(token: str, token_type: str = 'access') -> str:
-    """Verify token and return user_id"""
+def verify_token_claims(token: str, token_type: str = 'access') -> Dict[str, Any]:
+    """Verify token and return its full payload"""
     payload = decode_token(token)
-    
+
     if payload.get('type') != token_type:
         raise Exception(f"Invalid token type. Expected {token_type}")
-    
-    return payload.get('user_id')
+
+    return payload
+
+
+def verify_token(token: str, token_type: str = 'access') -> str:
+    """Verify token and return user_id"""
+    return verify_token_claims(token, token_type).get('user_id')
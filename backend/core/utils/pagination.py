@@ -1,8 +1,11 @@
 """
 Pagination utilities
 """
-from typing import TypeVar, Generic, List
+from typing import TypeVar, Generic, List, Optional, Sequence
+from django.core import signing
+from django.db.models import Q
 from pydantic import BaseModel
+from api.exceptions.base_exception import APIException
 
 T = TypeVar('T')
 
@@ -40,3 +43,105 @@ def paginate(queryset, page: int = 1, page_size: int = 10):
         'page_size': page_size,
         'total_pages': total_pages
     }
+
+
+# Response headers carrying keyset pagination state for list endpoints
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+HAS_MORE_HEADER = 'X-Has-More'
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a unique ordering
+
+    Instead of OFFSET, each page continues strictly after the last row of
+    the previous one: WHERE (created_at, id) < (:created_at, :id). With an
+    index matching the ordering every page is an index range scan, so page
+    N costs the same as page 1. The last key of the ordering must be unique
+    (normally the primary key).
+
+    Cursors are signed, opaque strings; a tampered or malformed cursor is
+    rejected with a 400.
+
+    With opt_in=True (endpoints that used to return every row) a request
+    without cursor or page_size still gets all rows in one response, so
+    clients that predate pagination keep working unchanged.
+    """
+
+    salt = 'core.utils.pagination.keyset'
+
+    def __init__(self, ordering: Sequence[str] = ('-created_at', '-id'),
+                 default_page_size: int = 50, max_page_size: int = 200, opt_in: bool = False):
+        self.opt_in = opt_in
+        self.ordering = list(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.default_page_size = default_page_size
+        self.max_page_size = max_page_size
+
+    def encode_cursor(self, item) -> str:
+        values = []
+        for field in self.fields:
+            value = getattr(item, field)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        return signing.dumps(values, salt=self.salt, compress=True)
+
+    def decode_cursor(self, model, cursor: str) -> list:
+        try:
+            values = signing.loads(cursor, salt=self.salt)
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise APIException("Invalid cursor")
+
+    def _after(self, values: list) -> Q:
+        """Rows strictly after the cursor in the paginator ordering"""
+        condition = Q()
+        for position in range(len(self.fields) - 1, -1, -1):
+            field = self.fields[position]
+            lookup = 'lt' if self.ordering[position].startswith('-') else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[position]})
+            if position < len(self.fields) - 1:
+                step |= Q(**{field: values[position]}) & condition
+            condition = step
+        return condition
+
+    def clamp_page_size(self, page_size: Optional[int]) -> int:
+        if not page_size or page_size < 1:
+            return self.default_page_size
+        return min(page_size, self.max_page_size)
+
+    def paginate(self, queryset, cursor: Optional[str] = None, page_size: Optional[int] = None):
+        """
+        One page of queryset in the paginator ordering
+        Returns items, next_cursor (None on the last page), has_more and page_size
+        """
+        queryset = queryset.order_by(*self.ordering)
+        if self.opt_in and not cursor and not page_size:
+            items = list(queryset)
+            return {'items': items, 'next_cursor': None, 'has_more': False, 'page_size': len(items)}
+
+        page_size = self.clamp_page_size(page_size)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(queryset.model, cursor)))
+
+        # One extra row tells whether another page exists
+        items = list(queryset[:page_size + 1])
+        has_more = len(items) > page_size
+        items = items[:page_size]
+
+        return {
+            'items': items,
+            'next_cursor': self.encode_cursor(items[-1]) if has_more else None,
+            'has_more': has_more,
+            'page_size': page_size
+        }
+
+    def set_headers(self, response, page) -> None:
+        """Expose the cursor on a temporal ninja response"""
+        response[HAS_MORE_HEADER] = 'true' if page['has_more'] else 'false'
+        if page['next_cursor']:
+            response[NEXT_CURSOR_HEADER] = page['next_cursor']
@@ -0,0 +1,86 @@
+"""
+Time period utilities
+Calendar buckets for reports grouped by day/week/month/year
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, Optional, Tuple
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek, TruncYear
+from django.utils import timezone
+
+PERIOD_TRUNC = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'year': TruncYear,
+}
+
+# Range used when the caller gives no start date, in buckets
+DEFAULT_BUCKETS = {
+    'day': 30,
+    'week': 12,
+    'month': 12,
+    'year': 5,
+}
+
+
+def bucket_start(day: date, period: str) -> date:
+    """First day of the bucket containing day (weeks start on Monday, like TruncWeek)"""
+    if period == 'day':
+        return day
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def next_bucket(start: date, period: str) -> date:
+    """First day of the bucket after the one starting at start"""
+    if period == 'day':
+        return start + timedelta(days=1)
+    if period == 'week':
+        return start + timedelta(weeks=1)
+    if period == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return date(start.year + 1, 1, 1)
+
+
+def previous_bucket(start: date, period: str) -> date:
+    """First day of the bucket before the one starting at start"""
+    if period == 'day':
+        return start - timedelta(days=1)
+    if period == 'week':
+        return start - timedelta(weeks=1)
+    if period == 'month':
+        return (start - timedelta(days=1)).replace(day=1)
+    return date(start.year - 1, 1, 1)
+
+
+def resolve_range(period: str, start_date: Optional[date], end_date: Optional[date]) -> Tuple[date, date]:
+    """
+    Inclusive local date range, defaulting to the last DEFAULT_BUCKETS
+    buckets up to today. start_date is aligned to its bucket start.
+    """
+    end_date = end_date or timezone.localdate()
+    if start_date is None:
+        start_date = bucket_start(end_date, period)
+        for _ in range(DEFAULT_BUCKETS[period] - 1):
+            start_date = previous_bucket(start_date, period)
+    return bucket_start(start_date, period), end_date
+
+
+def iter_buckets(period: str, start_date: date, end_date: date) -> Iterator[date]:
+    """Start dates of every bucket overlapping [start_date, end_date]"""
+    current = bucket_start(start_date, period)
+    while current <= end_date:
+        yield current
+        current = next_bucket(current, period)
+
+
+def local_day_bounds(start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+    """Aware [start, end) datetimes covering whole local days"""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start_date, time.min), tz),
+        timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz),
+    )
@@ -0,0 +1,230 @@
+"""
+Publish/subscribe utilities
+Fans small JSON events out to every process holding a subscriber: Redis
+pub/sub when Redis is the cache backend, an in-process broker otherwise
+(tests, local development)
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Optional
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per subscriber before new ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """
+    One subscriber to one channel, consumed from async code
+
+        async with broker.subscribe(channel) as subscription:
+            event = await subscription.get(timeout=15)  # None on timeout
+    """
+
+    async def open(self) -> None:
+        raise NotImplementedError
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        raise NotImplementedError
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class InMemorySubscription(Subscription):
+
+    def __init__(self, broker: 'InMemoryBroker', channel: str):
+        self.broker = broker
+        self.channel = channel
+        self.loop = None
+        self.queue = None
+
+    async def open(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        with self.broker.lock:
+            self.broker.subscribers[self.channel].add(self)
+
+    def deliver(self, message: str) -> None:
+        # Publishers run in worker threads; hand the message to the subscriber's loop
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+        except RuntimeError:
+            pass  # loop already closed
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        try:
+            return json.loads(await asyncio.wait_for(self.queue.get(), timeout))
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self) -> None:
+        with self.broker.lock:
+            self.broker.subscribers[self.channel].discard(self)
+
+
+class InMemoryBroker:
+    """Delivers only within this process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def publish(self, channel: str, event: dict) -> int:
+        message = json.dumps(event, cls=DjangoJSONEncoder)
+        with self.lock:
+            subscribers = list(self.subscribers[channel])
+        for subscription in subscribers:
+            subscription.deliver(message)
+        return len(subscribers)
+
+    def subscribe(self, channel: str) -> InMemorySubscription:
+        return InMemorySubscription(self, channel)
+
+
+class RedisSubscription(Subscription):
+    """A queue registered with the process-wide RedisSubscriberHub"""
+
+    def __init__(self, broker: 'RedisBroker', channel: str):
+        self.broker = broker
+        self.channel = channel
+        self.hub = None
+        self.queue = None
+
+    async def open(self) -> None:
+        self.hub = self.broker.hub()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        await self.hub.add(self.channel, self.queue)
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self) -> None:
+        if self.queue is not None:
+            await self.hub.remove(self.channel, self.queue)
+
+
+class RedisSubscriberHub:
+    """
+    One Redis pub/sub connection per process (event loop), shared by all
+    subscribers
+
+    Redis SUBSCRIBE/UNSUBSCRIBE are sent when a channel gets its first or
+    loses its last local subscriber; a single reader task fans incoming
+    messages out to the subscribers' queues. A thousand open event streams
+    therefore cost one connection, not a thousand.
+    """
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+        self.queues = defaultdict(set)
+        self.lock = asyncio.Lock()
+        self.reader = None
+
+    async def add(self, channel: str, queue: asyncio.Queue) -> None:
+        async with self.lock:
+            if not self.queues[channel]:
+                await self.pubsub.subscribe(channel)
+            self.queues[channel].add(queue)
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.create_task(self.read())
+
+    async def remove(self, channel: str, queue: asyncio.Queue) -> None:
+        async with self.lock:
+            self.queues[channel].discard(queue)
+            if not self.queues[channel]:
+                del self.queues[channel]
+                try:
+                    await self.pubsub.unsubscribe(channel)
+                except Exception:
+                    logger.warning("Unsubscribing from %s failed", channel, exc_info=True)
+
+    async def read(self) -> None:
+        while self.queues:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # The client reconnects and resubscribes on the next call
+                logger.warning("Reading from Redis pub/sub failed", exc_info=True)
+                await asyncio.sleep(1)
+                continue
+            if not message or message['type'] != 'message':
+                continue
+            channel = message['channel']
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            event = json.loads(message['data'])
+            for queue in list(self.queues.get(channel, ())):
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    logger.warning("Subscriber on %s is not keeping up; event dropped", channel)
+
+
+class RedisBroker:
+    """
+    Redis pub/sub: every node subscribed to a channel receives each event
+    Delivery is at-most-once; subscribers that were disconnected resume
+    from their own source of truth (e.g. the database).
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.hubs = {}
+
+    def publish(self, channel: str, event: dict) -> int:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default').publish(channel, json.dumps(event, cls=DjangoJSONEncoder))
+
+    def hub(self) -> RedisSubscriberHub:
+        # Async connections are bound to the loop they were created on
+        loop = asyncio.get_running_loop()
+        if loop not in self.hubs:
+            from redis import asyncio as redis_asyncio
+            self.hubs = {key: hub for key, hub in self.hubs.items() if not key.is_closed()}
+            self.hubs[loop] = RedisSubscriberHub(redis_asyncio.from_url(self.url).pubsub())
+        return self.hubs[loop]
+
+    def subscribe(self, channel: str) -> RedisSubscription:
+        return RedisSubscription(self, channel)
+
+
+_broker = None
+
+
+def get_broker():
+    """Process-wide broker, chosen from the 'default' cache backend"""
+    global _broker
+    if _broker is None:
+        cache = settings.CACHES['default']
+        if cache['BACKEND'].startswith('django_redis.'):
+            _broker = RedisBroker(cache['LOCATION'])
+        else:
+            _broker = InMemoryBroker()
+    return _broker
+
+
+def publish(channel: str, event: dict) -> int:
+    """Publish event; broker failures are logged, never raised to the caller"""
+    try:
+        return get_broker().publish(channel, event)
+    except Exception:
+        logger.warning("Publishing to %s failed", channel, exc_info=True)
+        return 0